@@ -1,18 +1,29 @@
 from flask import Flask
 import logging
 import os
+import sys
+from pathlib import Path
 from routes import main_bp
+from task_queue import TaskQueue, TaskWorkerPool
 
-def create_app():
+# 讓 worker 可以載入專案根目錄的 main.py
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+def create_app(start_workers=True):
     app = Flask(__name__)
     
     # 設定
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'shrimp-secret')
+    app.config['TASK_DB'] = os.environ.get('SHRIMP_TASK_DB', str(ROOT_DIR / 'tasks.db'))
+    app.config['TASK_WORKERS'] = int(os.environ.get('SHRIMP_TASK_WORKERS', '2'))
+    app.config['TASK_MAX_ATTEMPTS'] = int(os.environ.get('SHRIMP_TASK_MAX_ATTEMPTS', '3'))
     
     # 註冊路由
     app.register_blueprint(main_bp)
     
     # 設定日誌
+    os.makedirs("logs", exist_ok=True)
     logging.basicConfig(
         level=logging.INFO,
         format='[%(asctime)s] %(levelname)s: %(message)s',
@@ -22,9 +33,22 @@ def create_app():
         ]
     )
     
+    # 任務佇列：存在 SQLite，服務重啟後未完成的任務會繼續處理
+    task_queue = TaskQueue(app.config['TASK_DB'], max_attempts=app.config['TASK_MAX_ATTEMPTS'])
+    app.extensions['task_queue'] = task_queue
+    
+    if start_workers:
+        from main import CompanyShrimp
+        
+        shrimp = CompanyShrimp()
+        workers = TaskWorkerPool(task_queue, shrimp.run_flow, workers=app.config['TASK_WORKERS'])
+        workers.start()
+        app.extensions['task_workers'] = workers
+    
     return app
 
 if __name__ == '__main__':
     app = create_app()
     print("公司蝦服務啟動在 http://localhost:18080")
-    app.run(host='0.0.0.0', port=18080, debug=True)
+    # 關閉 reloader，避免開發模式下啟動兩組 worker
+    app.run(host='0.0.0.0', port=18080, debug=True, use_reloader=False)
@@ -1,36 +1,59 @@
-from flask import Blueprint, render_template, request, jsonify
+from flask import Blueprint, Response, render_template, request, jsonify, current_app
 import logging
 
 main_bp = Blueprint('main', __name__)
 logger = logging.getLogger("shrimp.app")
 
-# 模擬任務隊列
-task_queue = []
+# 單次請求最多可新增的任務數
+MAX_BATCH_SIZE = 1000
+
+def get_task_queue():
+    return current_app.extensions['task_queue']
 
 @main_bp.route('/')
 def index():
-    return render_template('index.html', tasks=task_queue)
+    return render_template('index.html', tasks=get_task_queue().recent(50))
 
 @main_bp.route('/api/tasks', methods=['POST'])
 def add_task():
-    data = request.json
-    url = data.get('url')
-    if not url:
+    data = request.get_json(silent=True) or {}
+    urls = data.get('urls') or ([data['url']] if data.get('url') else [])
+    urls = [url.strip() for url in urls if isinstance(url, str) and url.strip()]
+    if not urls:
         return jsonify({"status": "error", "message": "Missing URL"}), 400
+    if len(urls) > MAX_BATCH_SIZE:
+        return jsonify({"status": "error", "message": f"Too many URLs (max {MAX_BATCH_SIZE})"}), 400
     
-    task = {
-        "id": len(task_queue) + 1,
-        "url": url,
-        "status": "pending"
-    }
-    task_queue.append(task)
-    logger.info(f"已新增任務: {url}")
+    tasks = get_task_queue().enqueue(urls)
+    logger.info(f"已新增 {len(tasks)} 個任務")
+    if 'urls' in data:
+        return jsonify({"status": "success", "tasks": tasks})
+    return jsonify({"status": "success", "task": tasks[0]})
+
+@main_bp.route('/api/tasks/<int:task_id>')
+def get_task(task_id):
+    task = get_task_queue().get(task_id)
+    if task is None:
+        return jsonify({"status": "error", "message": "Task not found"}), 404
     return jsonify({"status": "success", "task": task})
 
 @main_bp.route('/api/status')
 def get_status():
+    task_queue = get_task_queue()
+    counts = task_queue.counts()
     return jsonify({
         "status": "running",
-        "queue_count": len(task_queue),
-        "recent_tasks": task_queue[-5:]
+        "queue_count": counts["pending"] + counts["running"],
+        "counts": counts,
+        "recent_tasks": task_queue.recent(5)
     })
+
+@main_bp.route('/metrics')
+def metrics():
+    from utils.metrics import METRICS
+    
+    lines = ["# HELP shrimp_tasks 任務佇列中各狀態的任務數", "# TYPE shrimp_tasks gauge"]
+    for status, count in sorted(get_task_queue().counts().items()):
+        lines.append(f'shrimp_tasks{{status="{status}"}} {count}')
+    body = METRICS.to_prometheus().lstrip("\n") + "\n".join(lines) + "\n"
+    return Response(body, mimetype="text/plain; version=0.0.4")
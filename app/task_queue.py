@@ -0,0 +1,214 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+# 任務狀態：pending -> running -> done / failed（失敗未達上限時退回 pending 重試）
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    error TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    available_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    duration REAL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_pending ON tasks (status, available_at, id);
+"""
+
+
+class TaskQueue:
+    def __init__(self, db_path="tasks.db", max_attempts=3, retry_delay=30):
+        self.db_path = str(db_path)
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.logger = logging.getLogger("shrimp.tasks")
+        self._local = threading.local()
+        # 每個新任務一個喚醒訊號；worker 還沒開始等待時送出的訊號也會保留，不會遺失
+        self._wakeup = threading.Condition()
+        self._signals = 0
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # 每個執行緒各用一條連線；WAL 模式讓讀取不會被寫入擋住
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, urls):
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            ids = [
+                conn.execute(
+                    "INSERT INTO tasks (url, status, max_attempts, created_at, available_at) VALUES (?, ?, ?, ?, ?)",
+                    (url, STATUS_PENDING, self.max_attempts, now, now),
+                ).lastrowid
+                for url in urls
+            ]
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self.notify(len(ids))
+        return [self.get(task_id) for task_id in ids]
+
+    def claim(self):
+        # 以 IMMEDIATE 交易取得寫入鎖，確保同一任務只會被一個 worker 取走
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id FROM tasks WHERE status = ? AND available_at <= ? ORDER BY id LIMIT 1",
+                (STATUS_PENDING, now),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE tasks SET status = ?, attempts = attempts + 1, started_at = ? WHERE id = ?",
+                (STATUS_RUNNING, now, row["id"]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get(row["id"])
+
+    def complete(self, task_id, result, duration):
+        self._connect().execute(
+            "UPDATE tasks SET status = ?, result = ?, error = NULL, finished_at = ?, duration = ? WHERE id = ?",
+            (STATUS_DONE, json.dumps(result, ensure_ascii=False), time.time(), duration, task_id),
+        )
+
+    def fail(self, task_id, error, duration):
+        task = self.get(task_id)
+        now = time.time()
+        if task["attempts"] < task["max_attempts"]:
+            # 退回佇列，重試間隔隨次數加倍
+            delay = self.retry_delay * 2 ** (task["attempts"] - 1)
+            self._connect().execute(
+                "UPDATE tasks SET status = ?, error = ?, available_at = ?, duration = ? WHERE id = ?",
+                (STATUS_PENDING, error, now + delay, duration, task_id),
+            )
+            self.logger.warning(f"任務 {task_id} 失敗，{delay} 秒後重試: {error}")
+        else:
+            self._connect().execute(
+                "UPDATE tasks SET status = ?, error = ?, finished_at = ?, duration = ? WHERE id = ?",
+                (STATUS_FAILED, error, now, duration, task_id),
+            )
+            self.logger.error(f"任務 {task_id} 已達重試上限: {error}")
+
+    def recover(self):
+        # 服務中斷時仍在執行的任務退回佇列
+        cursor = self._connect().execute(
+            "UPDATE tasks SET status = ? WHERE status = ?", (STATUS_PENDING, STATUS_RUNNING)
+        )
+        if cursor.rowcount:
+            self.logger.info(f"已將 {cursor.rowcount} 個中斷的任務退回佇列")
+            self.notify(cursor.rowcount)
+
+    def get(self, task_id):
+        row = self._connect().execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def recent(self, limit=50):
+        rows = self._connect().execute("SELECT * FROM tasks ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def counts(self):
+        rows = self._connect().execute("SELECT status, COUNT(*) AS n FROM tasks GROUP BY status").fetchall()
+        counts = {status: 0 for status in (STATUS_PENDING, STATUS_RUNNING, STATUS_DONE, STATUS_FAILED)}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+    def notify(self, count=1):
+        with self._wakeup:
+            self._signals += count
+            self._wakeup.notify(count)
+
+    def wait_for_work(self, timeout):
+        # 已有未取用的訊號時立即返回，否則最多等待 timeout 秒
+        with self._wakeup:
+            if not self._signals:
+                self._wakeup.wait(timeout)
+            if self._signals:
+                self._signals -= 1
+
+    def _to_dict(self, row):
+        task = dict(row)
+        if task.get("result"):
+            task["result"] = json.loads(task["result"])
+        return task
+
+
+class TaskWorkerPool:
+    def __init__(self, task_queue, handler, workers=2, poll_interval=1.0):
+        self.task_queue = task_queue
+        self.handler = handler
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.logger = logging.getLogger("shrimp.workers")
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        self.task_queue.recover()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"shrimp-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self.logger.info(f"已啟動 {self.workers} 個任務 worker")
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self.task_queue.notify(len(self._threads))
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                task = self.task_queue.claim()
+            except Exception as e:
+                self.logger.error(f"取得任務失敗: {str(e)}")
+                task = None
+            if task is None:
+                self.task_queue.wait_for_work(self.poll_interval)
+                continue
+            self._process(task)
+
+    def _process(self, task):
+        self.logger.info(f"開始處理任務 {task['id']}: {task['url']}")
+        start = time.perf_counter()
+        try:
+            # 任務 ID 作為上架請求的識別：同一任務重試時不會重複建立商品
+            result = self.handler(task["url"], request_id=f"task-{task['id']}")
+            duration = time.perf_counter() - start
+            if result is None:
+                self.task_queue.fail(task["id"], "處理失敗，詳見日誌", duration)
+            else:
+                self.task_queue.complete(task["id"], result, duration)
+                self.logger.info(f"任務 {task['id']} 完成，耗時 {duration:.1f} 秒")
+        except Exception as e:
+            self.task_queue.fail(task["id"], str(e), time.perf_counter() - start)
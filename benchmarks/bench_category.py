@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分類索引效能測試
+
+以 data/shopee_categories.json 擴充出數千個末層分類的合成分類樹，
+比較舊做法（每個商品逐一掃描所有末層分類名稱）與 CategoryIndex 的速度，
+並量測建立索引、從 pickle 載入與解析整份目錄（預設 5 萬個商品）的時間。
+
+用法：python benchmarks/bench_category.py [--products 50000] [--baseline 500]
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from utils.category_index import CategoryIndex, load_tree  # noqa: E402
+
+# 每個末層分類加上這些修飾詞，擴充成更大的分類樹
+MODIFIERS = ("", "兒童", "專業", "迷你", "大型", "戶外", "旅行", "商用", "復古", "無線",
+             "智能", "輕量", "加厚", "防水", "折疊", "日式")
+NAME_WORDS = ("熱銷", "現貨", "新款", "韓版", "質感", "加大", "台灣出貨", "限時", "免運", "送禮")
+
+
+def build_tree():
+    """每個末層分類展開成多個「修飾詞 + 名稱」的末層分類"""
+    categories = load_tree(ROOT_DIR / "data" / "shopee_categories.json")
+    tree, next_id = [], 900000
+    for category in categories:
+        if category["has_children"]:
+            tree.append(category)
+            continue
+        tree.append(dict(category, has_children=True))
+        for modifier in MODIFIERS:
+            next_id += 1
+            name = modifier + category["display_category_name"]
+            tree.append({"category_id": next_id, "parent_category_id": category["category_id"],
+                         "original_category_name": name, "display_category_name": name, "has_children": False})
+    return tree
+
+
+def build_products(tree, count: int, seed: int = 0):
+    """商品名稱包含某個末層分類名稱與其他詞；部分商品附上分類文字（末層、上層或留空）"""
+    rng = random.Random(seed)
+    leaves = [c for c in tree if not c["has_children"]]
+    parents = {c["category_id"]: c for c in tree}
+    products = []
+    for i in range(count):
+        leaf = rng.choice(leaves)
+        words = rng.sample(NAME_WORDS, 2) + [leaf["display_category_name"], f"{rng.randint(1, 99)}號"]
+        rng.shuffle(words)
+        category = rng.choice(["", leaf["display_category_name"],
+                               parents[leaf["parent_category_id"]]["display_category_name"]])
+        products.append({"name": " ".join(words), "category": category})
+    return products
+
+
+def linear_scan(leaves, product):
+    """舊做法：逐一比對所有末層分類名稱，取出現在文字中最長的一個"""
+    text = f"{product['category']} {product['name']}"
+    best = None
+    for leaf in leaves:
+        name = leaf["display_category_name"]
+        if name in text and (best is None or len(name) > len(best["display_category_name"])):
+            best = leaf
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分類索引效能測試")
+    parser.add_argument("--products", type=int, default=50000)
+    parser.add_argument("--baseline", type=int, default=500, help="逐一掃描只測這麼多個商品再換算")
+    args = parser.parse_args()
+
+    tree = build_tree()
+    leaves = [c for c in tree if not c["has_children"]]
+    products = build_products(tree, args.products)
+    print(f"分類樹：{len(tree)} 個節點、{len(leaves)} 個末層分類；目錄：{len(products)} 個商品")
+
+    start = time.perf_counter()
+    for product in products[:args.baseline]:
+        linear_scan(leaves, product)
+    per_item = (time.perf_counter() - start) / args.baseline
+    print(f"逐一掃描：{per_item * 1000:.3f} ms/個，{len(products)} 個約需 {per_item * len(products):.1f} 秒")
+
+    with tempfile.TemporaryDirectory() as folder:
+        tree_file = Path(folder) / "categories.json"
+        tree_file.write_text(json.dumps({"category_list": tree}, ensure_ascii=False), encoding="utf-8")
+        # 同義詞指向原本的末層分類，擴充後的分類樹中已不是末層，這裡不使用
+        synonyms_file = None
+
+        start = time.perf_counter()
+        CategoryIndex.load(tree_file, synonyms_file, cache_dir=folder)
+        print(f"建立索引並存檔：{(time.perf_counter() - start) * 1000:.0f} ms"
+              f"（{(Path(folder) / 'category_index.pkl').stat().st_size / 1024:.0f} KB）")
+
+        start = time.perf_counter()
+        index = CategoryIndex.load(tree_file, synonyms_file, cache_dir=folder)
+        print(f"從 pickle 載入：{(time.perf_counter() - start) * 1000:.0f} ms")
+
+    start = time.perf_counter()
+    results = [index.resolve(p["category"], p["name"]) for p in products]
+    elapsed = time.perf_counter() - start
+    resolved = sum(1 for r in results if r)
+    print(f"索引解析：{elapsed:.2f} 秒（{len(products) / elapsed:,.0f} 個/秒），找到分類 {resolved}/{len(products)} 個")
+    print(f"快取：{index.cache_info()}")
+
+    # 與逐一掃描的結果比較（合成資料中，名稱包含的最長末層分類即為正解）
+    sample = products[:args.baseline]
+    agree = sum(1 for p, r in zip(sample, results)
+                if r and (linear_scan(leaves, p) or {}).get("category_id") == int(r["category_id"]))
+    print(f"與逐一掃描一致：{agree}/{len(sample)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI 文案效能測試
+
+以本地 OpenAI 相容替身（benchmarks/mock_openai_server.py）比較：
+- 逐筆：每個商品一個請求、一次一個（batch_size=1, workers=1）
+- 分批同時：batch_size 個商品一個請求，workers 個請求同時進行
+- 快取：同一份目錄再跑一次，全部由磁碟快取取得
+
+用法：python benchmarks/bench_copywriter.py [--items 64] [--batch-size 8] [--workers 4] [--latency 0.3]
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks.corpus import build_catalog  # noqa: E402
+from benchmarks.mock_openai_server import start_server  # noqa: E402
+from plugins.ai_copywriter import AiCopywriter  # noqa: E402
+
+
+def run(label: str, server, catalog, cache_dir, **options):
+    host, port = server.server_address
+    before = (server.state.requests, server.state.throttled)
+    writer = AiCopywriter(api_base=f"http://{host}:{port}/v1", model="mock-model", cache_dir=cache_dir,
+                          retry_backoff=0.2, **options)
+    try:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            copies = writer.write_many(catalog)
+        elapsed = time.perf_counter() - start
+    finally:
+        writer.close()
+
+    written = sum(1 for copy in copies if copy.get("title"))
+    requests = server.state.requests - before[0]
+    throttled = server.state.throttled - before[1]
+    print(f"{label:<10} {written:>4}/{len(catalog)} 個  {elapsed:7.2f} 秒  {len(catalog) / elapsed:8.1f} 個/秒"
+          f"  請求 {requests:>3} 次  429 {throttled:>3} 次")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI 文案效能測試")
+    parser.add_argument("--items", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=8, help="用戶端每秒請求上限")
+    parser.add_argument("--latency", type=float, default=0.3, help="替身每個請求的固定延遲")
+    parser.add_argument("--item-latency", type=float, default=0.02, help="替身每個商品增加的延遲")
+    parser.add_argument("--server-limit", type=float, default=10, help="替身每秒請求上限")
+    args = parser.parse_args()
+
+    server = start_server(latency=args.latency, item_latency=args.item_latency, rate_limit=args.server_limit)
+    catalog = build_catalog(args.items, seed=7)
+    try:
+        with tempfile.TemporaryDirectory() as folder:
+            sequential = run("逐筆", server, catalog, Path(folder) / "sequential",
+                             batch_size=1, workers=1, rate_limit=args.rate)
+            batched = run("分批同時", server, catalog, Path(folder) / "batched",
+                          batch_size=args.batch_size, workers=args.workers, rate_limit=args.rate)
+            run("快取", server, catalog, Path(folder) / "batched",
+                batch_size=args.batch_size, workers=args.workers, rate_limit=args.rate)
+        print(f"\n分批同時比逐筆快 {sequential / batched:.1f} 倍")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+商品頁解析效能測試
+
+比較各解析器處理大型商品頁的速度（頁/秒）。未指定檔案時使用
+合成的大型商品頁（大量導覽列、商品卡片與圖片）。
+
+用法：python benchmarks/bench_extractor.py [頁面.html ...] [--rounds N]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from utils.html_scanner import available_backends, scan_html  # noqa: E402
+from utils.product_extractor import ProductExtractor  # noqa: E402
+
+
+def build_synthetic_page(cards: int = 2000) -> str:
+    """產生模擬電商網站的大型商品頁"""
+    product = {
+        "@context": "https://schema.org",
+        "@type": "Product",
+        "name": "測試商品 超大容量保溫瓶 1000ml",
+        "description": "316 不鏽鋼內膽，保溫 24 小時",
+        "image": [f"https://cdn.example.com/p/main_{i}.jpg" for i in range(8)],
+        "offers": {"@type": "Offer", "price": "590", "priceCurrency": "TWD"},
+    }
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>",
+        "<title>測試商品</title>",
+        '<meta property="og:title" content="測試商品 超大容量保溫瓶 1000ml">',
+        '<meta property="og:description" content="316 不鏽鋼內膽">',
+        '<meta property="og:image" content="https://cdn.example.com/p/main_0.jpg">',
+        '<meta name="twitter:title" content="測試商品">',
+        f'<script type="application/ld+json">{json.dumps(product, ensure_ascii=False)}</script>',
+        "<script>window.dataLayer = [];" + "var x = 1;" * 500 + "</script>",
+        "</head><body><nav><ul>",
+    ]
+    parts.extend(f'<li><a href="/c/{i}"><img src="/icons/nav_{i}.png">分類 {i}</a></li>' for i in range(200))
+    parts.append("</ul></nav><main><h1>測試商品 超大容量保溫瓶 1000ml</h1><div class='gallery'>")
+    parts.extend(f'<img src="https://cdn.example.com/p/main_{i}.jpg" alt="商品圖 {i}">' for i in range(8))
+    parts.append("</div><section class='related'><h2>相關商品</h2>")
+    parts.extend(
+        f'<div class="card"><a href="/p/{i}"><img data-src="https://cdn.example.com/p/{i}_thumb.jpg">'
+        f'<span class="name">推薦商品 {i}</span><span class="price">${100 + i}</span></a></div>'
+        for i in range(cards)
+    )
+    parts.append("</section></main><footer>" + "<p>頁尾文字</p>" * 300 + "</footer></body></html>")
+    return "".join(parts)
+
+
+def bench(label: str, func, rounds: int) -> float:
+    """執行並返回每秒次數"""
+    func()  # 暖機
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    elapsed = time.perf_counter() - start
+    rate = rounds / elapsed
+    print(f"  {label:<28} {rate:8.1f} 頁/秒  ({elapsed / rounds * 1000:7.2f} ms/頁)")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="商品頁解析效能測試")
+    parser.add_argument("pages", nargs="*", help="已存檔的商品頁 HTML")
+    parser.add_argument("--rounds", type=int, default=20, help="每個解析器執行次數")
+    args = parser.parse_args()
+
+    if args.pages:
+        pages = [(Path(p).name, Path(p).read_text(encoding="utf-8")) for p in args.pages]
+    else:
+        pages = [("synthetic", build_synthetic_page())]
+
+    for name, html in pages:
+        print(f"{name}：{len(html.encode('utf-8')) / 1024:.0f} KB")
+
+        # 舊做法：BeautifulSoup html.parser 建完整 DOM 樹再多次 find_all
+        try:
+            from bs4 import BeautifulSoup
+
+            def legacy():
+                soup = BeautifulSoup(html, "html.parser")
+                soup.find_all("meta")
+                soup.find_all("script", {"type": "application/ld+json"})
+                soup.find_all(["h1", "h2"])
+                soup.find_all("img")
+
+            bench("bs4 html.parser (舊)", legacy, args.rounds)
+        except ImportError:
+            pass
+
+        for backend in available_backends():
+            bench(f"scan_html[{backend}]", lambda: scan_html(html, backend), args.rounds)
+
+        extractor = ProductExtractor()
+        bench(f"完整提取[{extractor.parser}]",
+              lambda: extractor._extract_from_html(scan_html(html, extractor.parser), "https://shop.example.com/p/1"),
+              args.rounds)
+
+
+if __name__ == "__main__":
+    main()
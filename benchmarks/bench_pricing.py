@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+定價效能測試
+
+以 10 萬個價格比較：舊版每次重新解析文字規則、PricingEngine 逐筆計算、
+price_many 整批計算（有安裝 numpy 時另外測試陣列運算）。
+計時前先確認規則的編譯結果（check_rules），解析錯誤時直接中止。
+
+用法：python benchmarks/bench_pricing.py [--count 100000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from core.pricing import PricingEngine, _numpy, compile_rule  # noqa: E402
+
+
+RULES = ["原價加成 30%", "打 95 折", "手續費 10 元", "最低售價 50 元", "最高售價 99,999 元", "四捨五入到 10 元"]
+
+
+# 規則文字 -> 預期的編譯結果（repr）；曾經解析錯誤的規則都列在這裡
+EXPECTED_STEPS = {
+    "max 500": "<ceiling 500.0>",
+    "min 50": "<floor 50.0>",
+    "x 1.2": "<multiply markup 1.2>",
+    "上限 500": "<ceiling 500.0>",
+    "售價上限 999": "<ceiling 999.0>",
+    "無條件進位到十位": "<round ceil 10>",
+    "四捨五入到百位": "<round nearest 100>",
+    "折扣 10%": "<multiply 0.9>",
+    "加 30%": "<multiply markup 1.3>",
+    "加 1.5%": "<multiply markup 1.015>",
+    "原價 + 10%": "<multiply markup 1.1>",
+    "加 30 元": "<fee 30.0>",
+}
+
+
+def check_rules():
+    for rule, expected in EXPECTED_STEPS.items():
+        step = repr(compile_rule(rule))
+        assert step == expected, f"{rule!r} 編譯為 {step}，預期 {expected}"
+    # 折扣規則不會取代 markup_percentage
+    engine = PricingEngine.from_config({"markup_percentage": 30, "rules": ["折扣 10%"]})
+    assert engine.price(100) == 117, engine
+    engine = PricingEngine.from_config({"markup_percentage": 30, "rules": ["加成 20%"]})
+    assert engine.price(100) == 120, engine
+    print(f"規則解析檢查通過（{len(EXPECTED_STEPS) + 2} 項）")
+
+
+def legacy_price(price_text: str, rules: list) -> str:
+    """舊版 ShopeeListingGenerator 的做法：每個商品都重新掃描規則文字"""
+    price = float("".join(filter(str.isdigit, price_text)))
+    for rule in rules:
+        if "加成" in rule or "markup" in rule.lower():
+            price *= 1 + float("".join(filter(str.isdigit, rule))) / 100
+        elif "折扣" in rule or "discount" in rule.lower():
+            price *= 1 - float("".join(filter(str.isdigit, rule))) / 100
+    return str(int(max(1, price)))
+
+
+def bench(label: str, func, count: int) -> float:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {elapsed * 1000:9.1f} ms  {count / elapsed:12,.0f} 個/秒")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="定價效能測試")
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+
+    check_rules()
+    rng = random.Random(1)
+    prices = [f"NT${rng.randint(10, 20000):,}" for _ in range(args.count)]
+    numbers = [float(p[3:].replace(",", "")) for p in prices]
+
+    print(f"規則：{RULES}")
+    bench("舊版（每次解析規則）", lambda: [legacy_price(p, RULES) for p in prices], args.count)
+
+    engine = PricingEngine(RULES)
+    print(f"編譯結果：{engine.steps}")
+    bench("PricingEngine.price", lambda: [engine.price(p) for p in prices], args.count)
+    bench("price_many（純 Python）", lambda: engine.price_many(prices, use_numpy=False), args.count)
+    bench("price_many（數字輸入）", lambda: engine.price_many(numbers, use_numpy=False), args.count)
+
+    if _numpy():
+        bench("price_many（numpy）", lambda: engine.price_many(numbers, use_numpy=True), args.count)
+        assert engine.price_many(numbers, use_numpy=True) == engine.price_many(numbers, use_numpy=False)
+    else:
+        print("未安裝 numpy，略過陣列運算")
+
+
+if __name__ == "__main__":
+    main()
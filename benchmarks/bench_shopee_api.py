@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+蝦皮 API 用戶端壓力測試
+
+以多個執行緒對本地替身建立大量商品，替身會隨機回傳 503（商品已寫入但回應遺失）
+並在超過每秒上限時回傳 429。輸出吞吐量、延遲與重試統計，並檢查有沒有重複建立的商品。
+
+用法：python benchmarks/bench_shopee_api.py [--items 200] [--threads 16] [--rate 40] [--server-limit 50]
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks.mock_shopee_server import start_server  # noqa: E402
+from plugins.shopee_api import ShopeeApiClient  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="蝦皮 API 用戶端壓力測試")
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--rate", type=float, default=40, help="用戶端每秒請求上限")
+    parser.add_argument("--server-limit", type=float, default=50, help="替身每秒請求上限")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--fail-rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    server = start_server(latency=args.latency, fail_rate=args.fail_rate, rate_limit=args.server_limit, seed=1)
+    host, port = server.server_address
+    client = ShopeeApiClient("test", "1", api_base=f"http://{host}:{port}", rate_limit=args.rate,
+                             pool_size=args.threads, max_retries=5, retry_backoff=0.1)
+
+    def create(i):
+        try:
+            return client.create_item({"shop_id": "1", "item_name": f"測試商品 {i}", "price": 100 + i})["item_id"]
+        except Exception as e:
+            return f"失敗：{e}"
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(pool.map(create, range(args.items)))
+    elapsed = time.perf_counter() - start
+
+    succeeded = sum(isinstance(r, int) for r in results)
+    print(f"建立 {succeeded}/{args.items} 個商品，耗時 {elapsed:.2f} 秒（{succeeded / elapsed:.1f} 個/秒）")
+    print(f"替身實際寫入 {len(server.state.items)} 個商品，重複 {len(server.state.items) - succeeded} 個")
+    print(f"替身回傳 503：{server.state.failures} 次，429：{server.state.throttled} 次")
+    print(json.dumps(client.metrics.summary(), ensure_ascii=False, indent=2))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+啟動時間測試
+
+以 python -X importtime 分析 import main 載入了哪些模組與各自耗時，
+並量測 python main.py --help 的整體時間（有常駐服務時一併量測 --remote）。
+超過時間預算，或啟動時就載入了 Pillow、requests 等重量級模組時以結束代碼 1 回報，
+可放在 cron 或 CI 中檢查。
+
+用法：python benchmarks/bench_startup.py [--budget-ms 50] [--runs 5] [--top 15]
+"""
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# 只有實際處理商品時才需要的模組，不應在啟動時載入
+HEAVY_MODULES = ("PIL", "requests", "bs4", "lxml", "selectolax", "dotenv", "selenium", "numpy", "flask", "asyncio")
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_profile(statement: str = "import main") -> List[Dict]:
+    """執行 statement 並解析 -X importtime 的輸出（微秒）"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        m = _IMPORTTIME.match(line)
+        if m:
+            modules.append({
+                "module": m.group(4),
+                "self_us": int(m.group(1)),
+                "cumulative_us": int(m.group(2)),
+                "depth": len(m.group(3)) // 2,
+            })
+    return modules
+
+
+def wall_time(args: List[str], runs: int) -> float:
+    """執行 runs 次並返回中位數（毫秒）"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=ROOT_DIR, capture_output=True, check=False)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def daemon_running() -> bool:
+    result = subprocess.run([sys.executable, "main.py", "daemon", "--status"], cwd=ROOT_DIR, capture_output=True)
+    return result.returncode == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="啟動時間測試")
+    parser.add_argument("--budget-ms", type=float, default=50, help="import main 的時間預算（毫秒）")
+    parser.add_argument("--runs", type=int, default=5, help="量測整體時間的次數")
+    parser.add_argument("--top", type=int, default=15, help="列出最耗時的模組數")
+    args = parser.parse_args()
+
+    modules = import_profile()
+    ours = [m for m in modules if m["module"] == "main"]
+    main_ms = ours[-1]["cumulative_us"] / 1000 if ours else 0.0
+    loaded = {m["module"].split(".")[0] for m in modules}
+    heavy = sorted(loaded & set(HEAVY_MODULES))
+
+    print(f"import main：{main_ms:.1f} ms（預算 {args.budget_ms:.0f} ms），共載入 {len(modules)} 個模組")
+    print("\n最耗時的模組（含子模組）：")
+    for m in sorted(modules, key=lambda m: m["cumulative_us"], reverse=True)[:args.top]:
+        print(f"  {m['cumulative_us'] / 1000:8.1f} ms  {m['module']}")
+
+    print(f"\npython main.py --help：{wall_time(['main.py', '--help'], args.runs):.0f} ms（{args.runs} 次中位數）")
+    if daemon_running():
+        remote = wall_time(["main.py", "--remote", "--help"], args.runs)
+        print(f"python main.py --remote --help：{remote:.0f} ms")
+
+    failed = False
+    if heavy:
+        print(f"\n❌ 啟動時載入了重量級模組：{', '.join(heavy)}")
+        failed = True
+    if main_ms > args.budget_ms:
+        print(f"\n❌ import main 超過時間預算：{main_ms:.1f} ms > {args.budget_ms:.0f} ms")
+        failed = True
+    if not failed:
+        print("\n✅ 啟動時間在預算內")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+離線效能測試組
+
+以存檔的商品頁、產生的圖片與合成目錄（見 benchmarks/corpus.py）測量：
+- extract：ProductExtractor._extract_from_html（每個存檔頁面）
+- optimize：ImageDownloader.optimize_image（每張測試圖片）
+- generate：ShopeeListingGenerator.generate（合成目錄）
+- flow：CompanyShrimp.run_flow 對本機替身伺服器的完整流程（冷快取與熱快取）
+
+每項輸出每秒次數、每次耗時與 Python 記憶體峰值（tracemalloc，不含 Pillow 的影像緩衝區）。
+以 --save 存下結果，之後用 --compare 比較修改前後的差異。
+
+用法：python benchmarks/bench_suite.py [--only extract,optimize] [--rounds N] [--save 結果.json] [--compare 基準.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks.corpus import FixtureServer, build_catalog, load_images, load_pages  # noqa: E402
+
+try:
+    import resource  # 只有 Unix 有
+except ImportError:
+    resource = None
+
+SUITES = ("extract", "optimize", "generate", "flow")
+
+
+def measure(func: Callable[[], object], rounds: int, ops_per_round: int = 1) -> Dict:
+    """執行 rounds 次，返回每秒次數、每次耗時與記憶體峰值；被測函式的輸出不顯示"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()  # 暖機
+        start = time.perf_counter()
+        for _ in range(rounds):
+            func()
+        elapsed = time.perf_counter() - start
+
+        # 另外跑一次量記憶體，避免 tracemalloc 的額外負擔影響計時
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    ops = rounds * ops_per_round
+    return {
+        "ops_per_sec": round(ops / elapsed, 2),
+        "ms_per_op": round(elapsed / ops * 1000, 3),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def bench_extract(rounds: int) -> Dict[str, Dict]:
+    from utils.html_scanner import scan_html
+    from utils.product_extractor import ProductExtractor
+
+    extractor = ProductExtractor()
+    results = {}
+    for name, html in load_pages().items():
+        source = f"https://shop.fixture.test/{name}"
+        results[f"extract[{name}]"] = measure(
+            lambda: extractor._extract_from_html(scan_html(html, extractor.parser), source), rounds * 50)
+    return results
+
+
+def bench_optimize(rounds: int) -> Dict[str, Dict]:
+    from utils.image_downloader import ImageDownloader
+
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        downloader = ImageDownloader(download_folder=folder, optimize_workers=0)
+        try:
+            for name, data in load_images().items():
+                results[f"optimize[{name}]"] = measure(lambda: downloader.optimize_image(data), rounds)
+        finally:
+            downloader.close()
+    return results
+
+
+def bench_generate(rounds: int) -> Dict[str, Dict]:
+    from plugins.shopee_generator import ShopeeListingGenerator
+
+    generator = ShopeeListingGenerator(
+        pricing_rules=["原價加成 30%", "最低售價 50 元", "尾數 9"],
+        pricing_config={"markup_percentage": 30, "rules": ["最低售價 50 元", "尾數 9"]},
+    )
+    catalog = build_catalog(1000)
+
+    def run():
+        for product in catalog:
+            generator.generate(product)
+
+    return {"generate[1000 商品]": measure(run, rounds, len(catalog))}
+
+
+def bench_flow(rounds: int) -> Dict[str, Dict]:
+    from main import CompanyShrimp
+
+    def create_app(workdir: Path) -> "CompanyShrimp":
+        """使用暫存目錄的快取與下載資料夾，不影響正式環境"""
+        with contextlib.redirect_stdout(io.StringIO()):
+            app = CompanyShrimp()
+        app.config["cache"] = dict(app.config.get("cache", {}), folder=str(workdir / "cache"))
+        app.download_folder = workdir / "downloads"
+        app.download_folder.mkdir(parents=True, exist_ok=True)
+        return app
+
+    results = {}
+    with FixtureServer() as server:
+        urls = [server.page_url(name) for name in load_pages()]
+
+        def cold():
+            # 每次都用全新的快取，包含下載與壓縮所有圖片
+            workdir = Path(tempfile.mkdtemp(prefix="shrimp-bench-"))
+            app = create_app(workdir)
+            try:
+                for url in urls:
+                    if app.run_flow(url) is None:
+                        raise RuntimeError(f"run_flow 失敗：{url}")
+            finally:
+                app.close()
+                shutil.rmtree(workdir, ignore_errors=True)
+
+        results[f"run_flow[冷快取, {len(urls)} 頁]"] = measure(cold, rounds, len(urls))
+
+        workdir = Path(tempfile.mkdtemp(prefix="shrimp-bench-"))
+        app = create_app(workdir)
+        try:
+            def warm():
+                for url in urls:
+                    app.run_flow(url)
+
+            results[f"run_flow[熱快取, {len(urls)} 頁]"] = measure(warm, rounds * 5, len(urls))
+        finally:
+            app.close()
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+BENCHES = {
+    "extract": bench_extract,
+    "optimize": bench_optimize,
+    "generate": bench_generate,
+    "flow": bench_flow,
+}
+
+
+def print_results(results: Dict[str, Dict], baseline: Dict[str, Dict] = None):
+    header = f"{'項目':<36} {'次/秒':>10} {'ms/次':>10} {'峰值 KB':>10}"
+    if baseline:
+        header += f" {'速度變化':>10}"
+    print(header)
+    for name, stats in results.items():
+        line = f"{name:<36} {stats['ops_per_sec']:>10.1f} {stats['ms_per_op']:>10.3f} {stats['peak_kb']:>10.1f}"
+        before = (baseline or {}).get(name)
+        if before:
+            change = stats["ops_per_sec"] / before["ops_per_sec"] - 1
+            line += f" {change:>+9.1%}"
+        print(line)
+
+
+def max_rss_mb():
+    """行程的最大 RSS（MB）；沒有 resource 模組（Windows）時改用 psutil，都沒有時返回 None"""
+    if resource is not None:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 以 KB 為單位，macOS 以 bytes 為單位
+        return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    # Windows 有峰值工作集，其他平台只有目前的 RSS
+    return getattr(info, "peak_wset", info.rss) / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="離線效能測試組")
+    parser.add_argument("--only", help=f"只執行指定項目，以逗號分隔（{','.join(SUITES)}）")
+    parser.add_argument("--rounds", type=int, default=3, help="每個項目的執行次數")
+    parser.add_argument("--save", help="將結果存成 JSON")
+    parser.add_argument("--compare", help="與先前 --save 的結果比較")
+    args = parser.parse_args()
+
+    suites = args.only.split(",") if args.only else SUITES
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        parser.error(f"未知的項目：{', '.join(sorted(unknown))}")
+
+    results = {}
+    for suite in suites:
+        print(f"執行 {suite}...", file=sys.stderr)
+        results.update(BENCHES[suite](args.rounds))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    print_results(results, baseline)
+    rss_mb = max_rss_mb()
+    if rss_mb is not None:
+        print(f"\n行程最大 RSS：{rss_mb:.1f} MB")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "rounds": args.rounds, "results": results},
+                      f, ensure_ascii=False, indent=2)
+        print(f"結果已存到：{args.save}")
+
+
+if __name__ == "__main__":
+    main()
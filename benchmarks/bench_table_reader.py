@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+表格讀取效能測試
+
+產生一份供應商格式的 CSV（預設 20 萬列；裝有 openpyxl 時另存一份 XLSX），比較：
+- 一次載入：csv.DictReader 讀成清單後再逐列對應標題與標準化
+- 逐批讀取：ProductExtractor.iter_file，每批 500 個
+
+兩者對每個商品做相同的處理（大部分時間花在圖片網址正規化），差別只在讀取方式。
+計時與記憶體分開量測，記憶體為 Python 配置的峰值（tracemalloc）；逐批讀取的峰值只與批次大小有關，
+不隨列數增加。
+
+用法：python benchmarks/bench_table_reader.py [--rows 200000] [--chunk 500] [--xlsx-rows 20000]
+"""
+
+import argparse
+import csv
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from utils.product_extractor import ProductExtractor  # noqa: E402
+from utils.table_reader import to_product  # noqa: E402
+
+HEADERS = ["商品名稱", "商品描述", "售價", "分類", "圖片 1", "圖片 2", "SKU", "庫存"]
+WORDS = ("純棉", "韓版", "加厚", "保溫", "不鏽鋼", "北歐風", "收納盒", "T恤", "後背包", "藍牙耳機", "現貨", "免運")
+
+
+def build_rows(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    for i in range(count):
+        name = "".join(rng.sample(WORDS, 3))
+        yield [
+            f"{name} {i}", f"{name}，{'、'.join(rng.sample(WORDS, 5))}。" * 3, str(rng.randint(50, 5000)),
+            rng.choice(("上衣", "居家生活", "3C 周邊")),
+            f"https://cdn.example.com/p/{i}/1.jpg", f"https://cdn.example.com/p/{i}/2.jpg|https://cdn.example.com/p/{i}/3.jpg",
+            f"SKU-{i:07d}", str(rng.randint(0, 999)),
+        ]
+
+
+def write_csv(file_path: Path, rows: int):
+    with open(file_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADERS)
+        writer.writerows(build_rows(rows))
+
+
+def write_xlsx(file_path: Path, rows: int) -> bool:
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        return False
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet()
+    worksheet.append(HEADERS)
+    for row in build_rows(rows):
+        worksheet.append(row)
+    workbook.save(file_path)
+    return True
+
+
+def load_all(extractor: ProductExtractor, file_path: Path) -> int:
+    with open(file_path, "r", encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.DictReader(f))
+    products = [extractor._normalize_product_info(to_product(row)) for row in rows]
+    return len(products)
+
+
+def stream(extractor: ProductExtractor, file_path: Path, chunk: int) -> int:
+    return sum(len(products) for products in extractor.iter_file(file_path, chunk))
+
+
+def measure(label: str, func, *args):
+    start = time.perf_counter()
+    count = func(*args)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    print(f"{label:<14} {count:>8} 個  {elapsed:>6.2f} 秒  {count / elapsed:>9,.0f} 個/秒  峰值 {peak / 1024 / 1024:>7.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="表格讀取效能測試")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--chunk", type=int, default=500)
+    parser.add_argument("--xlsx-rows", type=int, default=20000, help="XLSX 寫檔較慢，另外指定列數")
+    args = parser.parse_args()
+
+    extractor = ProductExtractor()
+    with tempfile.TemporaryDirectory() as folder:
+        csv_file = Path(folder) / "products.csv"
+        write_csv(csv_file, args.rows)
+        print(f"CSV：{args.rows} 列，{csv_file.stat().st_size / 1024 / 1024:.1f} MB")
+        measure("一次載入", load_all, extractor, csv_file)
+        measure("逐批讀取", stream, extractor, csv_file, args.chunk)
+
+        xlsx_file = Path(folder) / "products.xlsx"
+        if write_xlsx(xlsx_file, args.xlsx_rows):
+            print(f"XLSX：{args.xlsx_rows} 列，{xlsx_file.stat().st_size / 1024 / 1024:.1f} MB")
+            measure("逐批讀取", stream, extractor, xlsx_file, args.chunk)
+        else:
+            print("未安裝 openpyxl，略過 XLSX")
+
+
+if __name__ == "__main__":
+    main()
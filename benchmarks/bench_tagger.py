@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+關鍵字標記效能測試
+
+以合成的中英文關鍵字字典（預設 100 到 10 萬個）與不同長度的文字，比較：
+- 自動機：KeywordAutomaton.findall，一次掃描找出所有關鍵字
+- 逐一搜尋：對每個關鍵字執行 keyword in text（舊做法的延伸）
+
+輸出每個字元的狀態轉移次數與平均耗時（ns/字）。轉移次數不超過 2，與字典大小和文字長度無關；
+耗時隨字典變大略增，是狀態表變大後 CPU 快取命中率下降所致，逐一搜尋則與字典大小成正比。
+
+用法：python benchmarks/bench_tagger.py [--sizes 100,1000,10000,100000] [--lengths 1000,10000,100000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from utils.keyword_tagger import KeywordAutomaton, normalize  # noqa: E402
+
+# 常用漢字範圍中取 3000 字，避免大字典時幾乎每兩個字都是關鍵字
+CJK_CHARS = [chr(0x4E00 + i * 7) for i in range(3000)]
+ASCII_LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def build_keywords(count: int, rng: random.Random):
+    keywords = set()
+    while len(keywords) < count:
+        if rng.random() < 0.7:
+            keywords.add("".join(rng.choices(CJK_CHARS, k=rng.randint(2, 4))))
+        else:
+            keywords.add("".join(rng.choices(ASCII_LETTERS, k=rng.randint(3, 8))))
+    return sorted(keywords)
+
+
+def build_text(length: int, keywords, rng: random.Random) -> str:
+    """隨機文字中每約 50 字插入一個字典中的關鍵字"""
+    parts, size = [], 0
+    while size < length:
+        if rng.random() < 0.02:
+            part = f" {rng.choice(keywords)} "
+        else:
+            part = rng.choice(CJK_CHARS) if rng.random() < 0.8 else rng.choice(ASCII_LETTERS + " ")
+        parts.append(part)
+        size += len(part)
+    return "".join(parts)[:length]
+
+
+def steps_per_char(automaton: KeywordAutomaton, text: str) -> float:
+    """每個字元的狀態轉移次數（含失敗轉移）；與機器無關，用來確認掃描是線性的"""
+    goto, fail = automaton._goto, automaton._fail
+    state, steps = 0, 0
+    for ch in text:
+        next_state = goto[state].get(ch)
+        steps += 1
+        while next_state is None:
+            if not state:
+                next_state = 0
+                break
+            state = fail[state]
+            next_state = goto[state].get(ch)
+            steps += 1
+        state = next_state
+    return steps / len(text)
+
+
+def timed(func, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="關鍵字標記效能測試")
+    parser.add_argument("--sizes", default="100,1000,10000,100000", help="字典大小，以逗號分隔")
+    parser.add_argument("--lengths", default="1000,10000,100000", help="文字長度，以逗號分隔")
+    parser.add_argument("--naive-limit", type=int, default=10000, help="字典超過此大小時不執行逐一搜尋")
+    args = parser.parse_args()
+
+    sizes = [int(n) for n in args.sizes.split(",")]
+    lengths = [int(n) for n in args.lengths.split(",")]
+    rng = random.Random(0)
+
+    print(f"{'字典':>8} {'建立 ms':>9} {'文字長度':>9} {'比對數':>7} {'轉移/字':>8} {'自動機 ns/字':>13} {'逐一搜尋 ns/字':>15}")
+    for size in sizes:
+        keywords = build_keywords(size, rng)
+        start = time.perf_counter()
+        automaton = KeywordAutomaton((keyword, keyword) for keyword in keywords).build()
+        build_ms = (time.perf_counter() - start) * 1000
+
+        for length in lengths:
+            text = normalize(build_text(length, keywords, rng))
+            repeat = max(5, 200000 // length)
+            elapsed, matches = timed(lambda: automaton.findall(text, normalized=True), repeat)
+            line = (f"{size:>8} {build_ms:>9.0f} {length:>9} {len(matches):>7} {steps_per_char(automaton, text):>8.2f}"
+                    f" {elapsed / length * 1e9:>13.0f}")
+            if size <= args.naive_limit:
+                naive, _ = timed(lambda: [k for k in keywords if k in text], 1)
+                line += f" {naive / length * 1e9:>15.0f}"
+            else:
+                line += f" {'-':>15}"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+圖片上傳效能測試
+
+對本地的蝦皮 API 替身上傳一組圖片，比較逐張上傳與並行上傳的耗時，
+並確認重複內容會沿用已上傳的圖片 ID、暫時性錯誤會重試。
+
+用法：python benchmarks/bench_uploader.py [--images 12] [--latency 0.2] [--fail-rate 0.1]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks.mock_shopee_server import start_server  # noqa: E402
+from plugins.shopee_uploader import ImageIdStore, ShopeeUploader  # noqa: E402
+
+
+def make_images(folder: Path, count: int) -> list:
+    """產生內容各不相同的測試圖片檔"""
+    paths = []
+    for i in range(count):
+        path = folder / f"image_{i}.jpg"
+        path.write_bytes(b"\xff\xd8\xff\xe0" + f"image-{i}".encode() * 2000)
+        paths.append(str(path))
+    return paths
+
+
+def run(label: str, uploader: ShopeeUploader, images: list) -> list:
+    start = time.perf_counter()
+    ids = uploader._upload_images(images)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<16} {len(ids):>3}/{len(images)} 張  {elapsed:6.2f} 秒")
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description="圖片上傳效能測試")
+    parser.add_argument("--images", type=int, default=12)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--fail-rate", type=float, default=0.1)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    server = start_server(latency=args.latency, fail_rate=args.fail_rate, seed=1)
+    host, port = server.server_address
+    api_base = f"http://{host}:{port}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        images = make_images(Path(tmp), args.images)
+
+        def uploader(workers: int, store: ImageIdStore = None) -> ShopeeUploader:
+            return ShopeeUploader("https://shopee.tw", "test", "1", api_base=api_base, upload_workers=workers,
+                                  retry_backoff=0.05, image_id_store=store or ImageIdStore())
+
+        serial_ids = run("逐張上傳", uploader(1), images)
+        concurrent_ids = run(f"並行上傳 x{args.workers}", uploader(args.workers), images)
+        assert serial_ids == concurrent_ids, "並行上傳的圖片 ID 順序不一致"
+
+        store = ImageIdStore(Path(tmp) / "image_ids.json")
+        run("首次（寫入記錄）", uploader(args.workers, store), images)
+        uploads = server.state.uploads
+        run("重複內容", uploader(args.workers, ImageIdStore(Path(tmp) / "image_ids.json")), images)
+        print(f"重複內容實際上傳次數：{server.state.uploads - uploads}")
+
+    print(f"替身回傳的暫時性錯誤（已重試）：{server.state.failures}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+上傳流程行為檢查
+
+對本地的蝦皮 API 替身執行 ShopeeUploader，確認：
+- 圖片 ID 記錄：兩個商品共用的圖片只上傳一次，換一個上傳工具實例（從檔案載入記錄）後也沿用
+- 重試：圖片上傳遇到 503 時退避重試，最後仍取得正確的圖片 ID
+- 順序：並行上傳時各請求完成的順序不同，返回的圖片 ID 仍依原本的圖片順序
+- 圖片網址：尚未下載到本地的圖片網址遇到 503 時也會重試
+- 建立商品：同一請求的重試不會重複建立，不同請求的相同內容會建立新商品
+
+每項通過時印出 ✅，失敗時印出原因並以結束碼 1 結束。
+
+用法：python benchmarks/check_uploader.py
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks.mock_shopee_server import image_bytes, image_id_for, start_server  # noqa: E402
+from plugins.shopee_uploader import ImageIdStore, ShopeeUploader  # noqa: E402
+
+
+def make_images(folder: Path, count: int, prefix: str = "image") -> list:
+    """產生內容各不相同的測試圖片檔"""
+    paths = []
+    for i in range(count):
+        path = folder / f"{prefix}_{i}.jpg"
+        path.write_bytes(b"\xff\xd8\xff\xe0" + f"{prefix}-{i}".encode() * 200)
+        paths.append(str(path))
+    return paths
+
+
+def expected_ids(paths: list) -> list:
+    return [image_id_for(Path(path).read_bytes()) for path in paths]
+
+
+class Checker:
+    def __init__(self, folder: Path):
+        self.folder = folder
+        self.failed = 0
+
+    def uploader(self, server, workers: int = 4, store: ImageIdStore = None) -> ShopeeUploader:
+        host, port = server.server_address
+        return ShopeeUploader("https://shopee.tw", "test", "1", api_base=f"http://{host}:{port}",
+                              upload_workers=workers, retry_backoff=0.01, rate_limit=0,
+                              image_id_store=store or ImageIdStore())
+
+    def run(self, label: str, check):
+        server = start_server(seed=1)
+        try:
+            check(server)
+            print(f"✅ {label}")
+        except AssertionError as e:
+            self.failed += 1
+            print(f"❌ {label}：{e}")
+        finally:
+            server.shutdown()
+
+    def image_id_reuse(self, server):
+        first = make_images(self.folder, 3, "reuse")
+        # 第二個商品沿用第一個商品的第一張圖（內容相同、檔名不同），另有一張新圖
+        shared = self.folder / "reuse_copy.jpg"
+        shared.write_bytes(Path(first[0]).read_bytes())
+        second = [str(shared)] + make_images(self.folder, 1, "reuse_new")
+        record_file = self.folder / "image_ids.json"
+
+        uploader = self.uploader(server, store=ImageIdStore(record_file))
+        ids = uploader._upload_images(first)
+        assert ids == expected_ids(first), f"圖片 ID 不符：{ids}"
+        ids = uploader._upload_images(second)
+        assert ids == expected_ids(second), f"第二個商品的圖片 ID 不符：{ids}"
+        assert server.state.uploads == 4, f"共用的圖片應只上傳一次，實際上傳 {server.state.uploads} 次"
+
+        ids = self.uploader(server, store=ImageIdStore(record_file))._upload_images(first + second)
+        assert ids == expected_ids(first + second), f"沿用記錄的圖片 ID 不符：{ids}"
+        assert server.state.uploads == 4, f"從記錄檔載入後仍重新上傳了 {server.state.uploads - 4} 張"
+
+    def retry_on_5xx(self, server):
+        images = make_images(self.folder, 1, "retry")
+        server.state.fail_next = 2
+        uploader = self.uploader(server, workers=1)
+        ids = uploader._upload_images(images)
+        assert ids == expected_ids(images), f"重試後的圖片 ID 不符：{ids}"
+        assert server.state.failures == 2 and server.state.uploads == 1, \
+            f"預期 2 次 503 後成功 1 次，實際 503 {server.state.failures} 次、成功 {server.state.uploads} 次"
+        retries = uploader.api.metrics.summary()["/api/v2/media_space/upload_image"]["retries"]
+        assert retries == 2, f"重試次數應為 2，實際 {retries}"
+
+    def ordered_concurrent(self, server):
+        images = make_images(self.folder, 16, "order")
+        server.state.latency_jitter = 0.05
+        ids = self.uploader(server, workers=8)._upload_images(images)
+        assert ids == expected_ids(images), "並行上傳返回的圖片 ID 與圖片順序不一致"
+        assert server.state.uploads == 16, f"應上傳 16 張，實際 {server.state.uploads} 張"
+
+    def remote_image_retry(self, server):
+        host, port = server.server_address
+        url = f"http://{host}:{port}/images/remote.jpg"
+        server.state.fail_next = 1
+        ids = self.uploader(server, workers=1)._upload_images([url])
+        assert ids == [image_id_for(image_bytes("remote.jpg"))], f"圖片網址上傳結果不符：{ids}"
+        assert server.state.downloads == 1 and server.state.failures == 1, \
+            f"預期下載失敗 1 次後成功，實際失敗 {server.state.failures} 次、成功 {server.state.downloads} 次"
+
+    def idempotent_create(self, server):
+        images = make_images(self.folder, 1, "item")
+        listing = {"title": "測試商品", "description": "說明", "price": "100", "stock": "10",
+                   "category": "未分類", "images": images}
+        uploader = self.uploader(server)
+        first = uploader.upload(listing, request_id="task-1")
+        again = uploader.upload(listing, request_id="task-1")
+        assert first["success"] and again["item_id"] == first["item_id"], "同一請求重送時建立了新商品"
+        relist = uploader.upload(listing)
+        assert relist["item_id"] != first["item_id"], "不同請求的相同內容被當成重複請求"
+        assert len(server.state.items) == 2, f"替身應有 2 個商品，實際 {len(server.state.items)} 個"
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        checker = Checker(Path(tmp))
+        checker.run("圖片 ID 記錄沿用", checker.image_id_reuse)
+        checker.run("圖片上傳遇到 5xx 重試", checker.retry_on_5xx)
+        checker.run("並行上傳維持圖片順序", checker.ordered_concurrent)
+        checker.run("圖片網址下載重試", checker.remote_image_retry)
+        checker.run("建立商品的冪等鍵", checker.idempotent_create)
+    if checker.failed:
+        print(f"{checker.failed} 項檢查失敗")
+        sys.exit(1)
+    print("全部通過")
+
+
+if __name__ == "__main__":
+    main()
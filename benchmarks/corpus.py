@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+離線效能測試資料
+
+- 商品頁：benchmarks/fixtures/pages/ 下存檔的 HTML，圖片網址指向 FIXTURE_HOST
+- 圖片：依 IMAGE_SPECS 以固定亂數種子產生不同尺寸的 JPEG/PNG（第一次使用時寫入 fixtures/images/）
+- 目錄：build_catalog() 產生合成的商品資料
+- FixtureServer：在本機提供上述頁面與圖片，取代網路上的商品頁與圖床
+
+用法：python benchmarks/corpus.py（重新產生圖片並列出所有測試資料）
+"""
+
+import io
+import random
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from PIL import Image, ImageDraw, ImageFilter
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+PAGES_DIR = FIXTURES_DIR / "pages"
+IMAGES_DIR = FIXTURES_DIR / "images"
+
+# 存檔頁面中的圖片網址都使用這個主機，由 FixtureServer 改寫為本機位址
+FIXTURE_HOST = "https://cdn.fixture.test"
+
+# 檔名、尺寸、模式；涵蓋小縮圖到需要多次壓縮的大圖
+IMAGE_SPECS: List[Tuple[str, Tuple[int, int], str]] = [
+    ("small_300.jpg", (300, 300), "RGB"),
+    ("medium_800.jpg", (800, 800), "RGB"),
+    ("large_2000.jpg", (2000, 1500), "RGB"),
+    ("huge_4000.jpg", (4000, 3000), "RGB"),
+    ("logo_256.png", (256, 256), "RGBA"),
+    ("photo_1200.png", (1200, 1200), "RGB"),
+]
+
+PRODUCT_WORDS = ["保溫瓶", "連帽大學T", "手工皂", "藍牙耳機", "收納盒", "瑜珈墊", "行動電源", "帆布包"]
+PRODUCT_TAGS = ["新品", "限量", "優惠", "熱銷", ""]
+CATEGORIES = ["廚房用品", "服飾", "居家用品", "電子產品", ""]
+
+
+def load_pages() -> Dict[str, str]:
+    """讀取所有存檔的商品頁：{檔名: HTML}"""
+    return {path.name: path.read_text(encoding="utf-8") for path in sorted(PAGES_DIR.glob("*.html"))}
+
+
+def make_image(size: Tuple[int, int], mode: str, seed: int) -> Image.Image:
+    """產生接近照片的圖片：漸層背景、色塊加上雜訊，壓縮難度與實際商品照相近"""
+    rng = random.Random(seed)
+    width, height = size
+    base = Image.linear_gradient("L").resize(size).convert("RGB")
+    tint = Image.new("RGB", size, tuple(rng.randrange(256) for _ in range(3)))
+    img = Image.blend(base, tint, 0.6)
+
+    draw = ImageDraw.Draw(img)
+    for _ in range(40):
+        x, y = rng.randrange(width), rng.randrange(height)
+        r = rng.randrange(max(2, min(size) // 20), max(3, min(size) // 4))
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=tuple(rng.randrange(256) for _ in range(3)))
+    img = img.filter(ImageFilter.GaussianBlur(2))
+
+    noise = Image.frombytes("L", size, rng.randbytes(width * height)).convert("RGB")
+    img = Image.blend(img, noise, 0.1)
+    if mode == "RGBA":
+        img = img.convert("RGBA")
+        img.putalpha(Image.radial_gradient("L").resize(size))
+    return img
+
+
+def ensure_images(force: bool = False) -> Dict[str, Path]:
+    """產生圖片測試資料（已存在則沿用），返回 {檔名: 路徑}"""
+    IMAGES_DIR.mkdir(parents=True, exist_ok=True)
+    paths = {}
+    for seed, (name, size, mode) in enumerate(IMAGE_SPECS):
+        path = IMAGES_DIR / name
+        if force or not path.exists():
+            img = make_image(size, mode, seed)
+            if path.suffix == ".jpg":
+                img.save(path, "JPEG", quality=95)
+            else:
+                img.save(path, "PNG")
+        paths[name] = path
+    return paths
+
+
+def load_images() -> Dict[str, bytes]:
+    """讀取圖片測試資料：{檔名: 原始檔內容}"""
+    return {name: path.read_bytes() for name, path in ensure_images().items()}
+
+
+def build_catalog(count: int, base_url: str = FIXTURE_HOST, seed: int = 0) -> List[Dict]:
+    """產生合成的商品目錄，圖片網址指向 base_url 下的圖片測試資料"""
+    rng = random.Random(seed)
+    image_names = [name for name, _, _ in IMAGE_SPECS if not name.startswith("huge")]
+    products = []
+    for i in range(count):
+        word = rng.choice(PRODUCT_WORDS)
+        tag = rng.choice(PRODUCT_TAGS)
+        images = rng.sample(image_names, rng.randint(1, 3))
+        products.append({
+            "name": f"{word} 第 {i} 款" + (f"【{tag}】" if tag else ""),
+            "description": f"{word}，編號 {i}。" + "細節說明。" * rng.randint(1, 40),
+            "price": f"NT$ {rng.randint(50, 5000):,}",
+            "category": rng.choice(CATEGORIES),
+            "images": [f"{base_url}/images/{name}?v={i}" for name in images],
+            "metadata": {"sku": f"SKU-{i:05d}"},
+        })
+    return products
+
+
+class _FixtureHandler(SimpleHTTPRequestHandler):
+    """提供 fixtures 目錄；HTML 中的 FIXTURE_HOST 改寫為本機位址"""
+
+    def send_head(self):
+        if not self.path.split("?")[0].endswith(".html"):
+            return super().send_head()
+        path = Path(self.translate_path(self.path))
+        if not path.is_file():
+            self.send_error(404)
+            return None
+        body = path.read_text(encoding="utf-8").replace(FIXTURE_HOST, self.server.base_url).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        return io.BytesIO(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """在背景執行緒提供商品頁與圖片：{base_url}/pages/<檔名>、{base_url}/images/<檔名>"""
+
+    def __init__(self, port: int = 0):
+        ensure_images()
+        handler = partial(_FixtureHandler, directory=str(FIXTURES_DIR))
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.server.daemon_threads = True
+        host, port = self.server.server_address
+        self.base_url = self.server.base_url = f"http://{host}:{port}"
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fixture-server", daemon=True)
+        self._thread.start()
+
+    def page_url(self, name: str) -> str:
+        return f"{self.base_url}/pages/{name}"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def main():
+    """測試用"""
+    for name, path in ensure_images(force=True).items():
+        with Image.open(path) as img:
+            print(f"{name:<16} {img.size[0]}x{img.size[1]:<6} {path.stat().st_size / 1024:8.1f} KB")
+    for name, html in load_pages().items():
+        print(f"{name:<24} {len(html.encode('utf-8')) / 1024:6.1f} KB")
+    print(build_catalog(1)[0])
+
+
+if __name__ == "__main__":
+    main()
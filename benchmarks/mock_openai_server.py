@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OpenAI 相容 API 本地替身
+
+模擬 /v1/chat/completions：讀取使用者訊息中的 {"items": [...]}，
+為每個商品回傳固定格式的標題與描述。延遲為每個請求的固定延遲加上每個商品的生成時間，
+超過每秒請求上限時回傳 429 並附上 Retry-After，用來測試 AI 文案的分批、限速與快取。
+
+用法：python benchmarks/mock_openai_server.py [--port 8767] [--latency 0.5] [--item-latency 0.05] [--rate-limit 5]
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+class MockOpenAiState:
+    """記錄收到的請求與商品數，供測試檢查"""
+
+    def __init__(self, latency: float = 0.0, item_latency: float = 0.0, rate_limit: float = 0):
+        self.latency = latency
+        self.item_latency = item_latency
+        self.rate_limit = rate_limit
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.items = 0
+        self.throttled = 0
+        self._window = (0, 0)
+
+    def over_limit(self) -> bool:
+        """以每秒固定視窗計算請求數"""
+        if not self.rate_limit:
+            return False
+        with self.lock:
+            second = int(time.time())
+            window, count = self._window
+            count = count + 1 if window == second else 1
+            self._window = (second, count)
+            if count > self.rate_limit:
+                self.throttled += 1
+                return True
+            return False
+
+
+class MockOpenAiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        state = self.server.state
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        if not self.path.endswith("/chat/completions"):
+            self._send(404, {"error": {"message": self.path}})
+            return
+        if state.over_limit():
+            self._send(429, {"error": {"message": "Rate limit reached"}}, {"Retry-After": "1"})
+            return
+
+        try:
+            request = json.loads(body or b"{}")
+            items = json.loads(request["messages"][-1]["content"])["items"]
+        except (ValueError, KeyError, IndexError, TypeError):
+            self._send(400, {"error": {"message": "使用者訊息需為 {\"items\": [...]}"}})
+            return
+
+        time.sleep(state.latency + state.item_latency * len(items))
+        with state.lock:
+            state.requests += 1
+            state.items += len(items)
+
+        output = {"items": [
+            {
+                "id": item["id"],
+                "title": f"【熱銷】{item.get('name', '')}",
+                "description": f"{item.get('name', '')}\n\n商品特色：\n{item.get('description', '')}",
+            }
+            for item in items
+        ]}
+        content = json.dumps(output, ensure_ascii=False)
+        prompt_tokens = sum(len(m.get("content", "")) for m in request["messages"])
+        self._send(200, {
+            "id": f"chatcmpl-mock-{state.requests}",
+            "object": "chat.completion",
+            "model": request.get("model", ""),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": f"```json\n{content}\n```"}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(content),
+                      "total_tokens": prompt_tokens + len(content)},
+        })
+
+    def _send(self, status: int, data: dict, headers: Optional[dict] = None):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(port: int = 0, latency: float = 0.0, item_latency: float = 0.0,
+                 rate_limit: float = 0) -> ThreadingHTTPServer:
+    """在背景執行緒啟動替身伺服器，port 為 0 時自動選擇；以 server.server_address 取得位址"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), MockOpenAiHandler)
+    server.daemon_threads = True
+    server.state = MockOpenAiState(latency, item_latency, rate_limit)
+    threading.Thread(target=server.serve_forever, name="mock-openai", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI 相容 API 本地替身")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--latency", type=float, default=0.5, help="每個請求的固定延遲秒數")
+    parser.add_argument("--item-latency", type=float, default=0.05, help="每個商品增加的延遲秒數")
+    parser.add_argument("--rate-limit", type=float, default=0, help="每秒請求上限，0 為不限制")
+    args = parser.parse_args()
+
+    server = start_server(args.port, args.latency, args.item_latency, args.rate_limit)
+    host, port = server.server_address
+    print(f"OpenAI API 替身已啟動：http://{host}:{port}/v1（Ctrl+C 結束）")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+蝦皮 API 本地替身
+
+模擬圖片上傳、商品建立與更新端點，可設定回應延遲、失敗比例與每秒請求上限，
+用來在沒有 Shopee Open API 權限時測試上傳流程、限速與重試。
+
+- 超過每秒上限時回傳 429 並附上 Retry-After
+- state.fail_next 設為 N 時，接下來 N 個圖片上傳或圖片下載請求回傳 503（行為檢查用，結果固定）
+- latency_jitter 讓每個請求的延遲不同，並行請求完成的順序因此與送出順序不同
+- GET /images/<名稱> 回傳內容固定的測試圖片，模擬尚未下載到本地的圖片網址
+- 建立商品的失敗發生在商品寫入之後（模擬回應遺失），
+  帶相同 Idempotency-Key 重送時回傳同一個商品 ID，不帶則會重複建立
+
+用法：python benchmarks/mock_shopee_server.py [--port 8766] [--latency 0.2] [--fail-rate 0.1] [--rate-limit 20]
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+class MockShopeeState:
+    """記錄收到的請求，供測試檢查"""
+
+    def __init__(self, latency: float = 0.0, fail_rate: float = 0.0, rate_limit: float = 0,
+                 seed: Optional[int] = None, latency_jitter: float = 0.0):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.fail_rate = fail_rate
+        self.fail_next = 0
+        self.rate_limit = rate_limit
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.uploads = 0
+        self.downloads = 0
+        self.failures = 0
+        self.throttled = 0
+        self.items = []
+        self.updates = []
+        self.idempotency = {}
+        self._window = (0, 0)
+
+    def delay(self) -> float:
+        with self.lock:
+            return self.latency + (self.random.uniform(0, self.latency_jitter) if self.latency_jitter else 0)
+
+    def should_fail(self) -> bool:
+        with self.lock:
+            if self.fail_next > 0:
+                self.fail_next -= 1
+                self.failures += 1
+                return True
+            failed = self.random.random() < self.fail_rate
+            if failed:
+                self.failures += 1
+            return failed
+
+    def over_limit(self) -> bool:
+        """以每秒固定視窗計算請求數"""
+        if not self.rate_limit:
+            return False
+        with self.lock:
+            second = int(time.time())
+            window, count = self._window
+            count = count + 1 if window == second else 1
+            self._window = (second, count)
+            if count > self.rate_limit:
+                self.throttled += 1
+                return True
+            return False
+
+    def create_item(self, payload: dict, key: Optional[str]) -> int:
+        with self.lock:
+            if key and key in self.idempotency:
+                return self.idempotency[key]
+            self.items.append(payload)
+            item_id = len(self.items)
+            if key:
+                self.idempotency[key] = item_id
+            return item_id
+
+
+def image_bytes(name: str) -> bytes:
+    """GET /images/<名稱> 回傳的內容，測試端可用來計算預期的圖片 ID"""
+    return b"\xff\xd8\xff\xe0" + f"remote-{name}".encode() * 500
+
+
+def image_id_for(content: bytes) -> str:
+    """替身為圖片內容產生的圖片 ID"""
+    return "img_" + hashlib.sha256(content).hexdigest()[:16]
+
+
+class MockShopeeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        state = self.server.state
+        if not self.path.startswith("/images/"):
+            self._send(404, {"error": "not_found", "message": self.path})
+            return
+        time.sleep(state.delay())
+        if state.should_fail():
+            self._send(503, {"error": "service_unavailable", "message": "模擬的暫時性錯誤"})
+            return
+        with state.lock:
+            state.downloads += 1
+        body = image_bytes(self.path[len("/images/"):])
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        state = self.server.state
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        if state.over_limit():
+            self._send(429, {"error": "too_many_requests", "message": "超過請求上限"}, {"Retry-After": "1"})
+            return
+        time.sleep(state.delay())
+
+        if self.path == "/api/v2/media_space/upload_image":
+            if state.should_fail():
+                self._send(503, {"error": "service_unavailable", "message": "模擬的暫時性錯誤"})
+                return
+            with state.lock:
+                state.uploads += 1
+            image_id = image_id_for(self._file_part(body))
+            self._send(200, {"error": "", "message": "", "response": {"image_info": {"image_id": image_id}}})
+        elif self.path == "/api/v2/product/create_item":
+            item_id = state.create_item(json.loads(body or b"{}"), self.headers.get("Idempotency-Key"))
+            if state.should_fail():
+                self._send(503, {"error": "service_unavailable", "message": "模擬的暫時性錯誤"})
+                return
+            self._send(200, {"error": "", "message": "", "item_id": item_id})
+        elif self.path == "/api/v2/product/update_item":
+            payload = json.loads(body or b"{}")
+            with state.lock:
+                state.updates.append(payload)
+            self._send(200, {"error": "", "message": "", "item_id": payload.get("item_id")})
+        else:
+            self._send(404, {"error": "not_found", "message": self.path})
+
+    def _file_part(self, body: bytes) -> bytes:
+        """取出 multipart 中的檔案內容（boundary 每次不同，不能直接雜湊整個 body）"""
+        boundary = self.headers.get("Content-Type", "").partition("boundary=")[2].encode()
+        for part in body.split(b"--" + boundary):
+            headers, sep, content = part.partition(b"\r\n\r\n")
+            if sep and b"filename=" in headers:
+                return content[:-2] if content.endswith(b"\r\n") else content
+        return body
+
+    def _send(self, status: int, data: dict, headers: Optional[dict] = None):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(port: int = 0, latency: float = 0.0, fail_rate: float = 0.0, rate_limit: float = 0,
+                 seed: Optional[int] = None, latency_jitter: float = 0.0) -> ThreadingHTTPServer:
+    """在背景執行緒啟動替身伺服器，port 為 0 時自動選擇；以 server.server_address 取得位址"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), MockShopeeHandler)
+    server.daemon_threads = True
+    server.state = MockShopeeState(latency, fail_rate, rate_limit, seed, latency_jitter)
+    threading.Thread(target=server.serve_forever, name="mock-shopee", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="蝦皮 API 本地替身")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.2, help="每個請求的延遲秒數")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="回傳 503 的比例")
+    parser.add_argument("--rate-limit", type=float, default=0, help="每秒請求上限，0 為不限制")
+    args = parser.parse_args()
+
+    server = start_server(args.port, args.latency, args.fail_rate, args.rate_limit)
+    host, port = server.server_address
+    print(f"蝦皮 API 替身已啟動：http://{host}:{port}（Ctrl+C 結束）")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,35 @@
 import os
 import requests
 import logging
-from uuid import uuid4
+from utils.image_cache import ImageCache
 
 class ImageDownloader:
-    def __init__(self, download_dir="downloads"):
+    def __init__(self, download_dir="downloads", cache_max_mb=1024):
         self.download_dir = download_dir
         self.logger = logging.getLogger("shrimp.downloader")
         if not os.path.exists(self.download_dir):
             os.makedirs(self.download_dir)
+        # 以內容雜湊命名，重複下載的同一張圖片只會存一份
+        self.cache = ImageCache(self.download_dir, max_size_mb=cache_max_mb)
 
     def download(self, urls):
         downloaded_paths = []
         for url in urls:
             try:
+                cached = self.cache.lookup_url(url)
+                if cached:
+                    self.logger.info(f"圖片快取命中: {url}")
+                    downloaded_paths.append(str(cached))
+                    continue
                 self.logger.info(f"正在下載圖片: {url}")
                 response = requests.get(url, timeout=10)
                 if response.status_code == 200:
-                    filename = f"{uuid4().hex}.jpg"
-                    filepath = os.path.join(self.download_dir, filename)
-                    with open(filepath, 'wb') as f:
-                        f.write(response.content)
-                    downloaded_paths.append(filepath)
+                    source_hash = ImageCache.hash_bytes(response.content)
+                    filepath = self.cache.lookup_source(url, source_hash)
+                    if not filepath:
+                        filepath = self.cache.store(url, source_hash, response.content)
+                    downloaded_paths.append(str(filepath))
             except Exception as e:
                 self.logger.error(f"下載圖片失敗: {url}, 錯誤: {str(e)}")
+        self.cache.flush()
         return downloaded_paths
@@ -1,16 +1,301 @@
 import logging
+import math
+import re
+
+logger = logging.getLogger("shrimp.pricing")
+
+NUMBER = r"(\d+(?:,\d{3})*(?:\.\d+)?)"
+_NUMBER_RE = re.compile(NUMBER)
+
+
+def parse_number(text):
+    match = _NUMBER_RE.search(text if isinstance(text, str) else str(text))
+    if match is None:
+        raise ValueError(f"找不到數字: {text}")
+    return float(match.group(1).replace(",", ""))
+
+
+def parse_price(value):
+    # "NT$1,299.50"、"$100 - $200" 等格式取第一個數字
+    if isinstance(value, (int, float)):
+        return float(value)
+    return parse_number(value)
+
+
+class PriceStep:
+    # 定價流程中的一個步驟：scalar() 產生處理單一價格的函式，apply_array 處理 numpy 陣列
+    def __init__(self, kind, value, mode=None, source=None):
+        self.kind = kind
+        self.value = value
+        self.mode = mode
+        self.source = source
+
+    def scalar(self):
+        kind, value, mode = self.kind, self.value, self.mode
+        if kind == "affine":
+            mul, add = value
+            return lambda price: price * mul + add
+        if kind == "multiply":
+            return lambda price: price * value
+        if kind == "fee":
+            return lambda price: price + value
+        if kind == "floor":
+            return lambda price: price if price >= value else value
+        if kind == "ceiling":
+            return lambda price: price if price <= value else value
+        if kind == "round":
+            # 先去掉浮點誤差，避免 130.00000001 被進位到 140
+            rounder = {"ceil": math.ceil, "floor": math.floor}.get(mode)
+            if rounder is None:
+                return lambda price: math.floor(round(price / value, 9) + 0.5) * value
+            return lambda price: rounder(round(price / value, 9)) * value
+        if kind == "ending":
+            # 尾數：調整為不低於原價、個位數為指定數字的價格，例如 123 -> 129
+            def ending(price):
+                whole = math.ceil(round(price, 9))
+                return whole + (value - whole) % 10
+            return ending
+        raise ValueError(f"未知的定價步驟: {kind}")
+
+    def apply(self, price):
+        return self.scalar()(price)
+
+    def apply_array(self, prices, np):
+        kind, value = self.kind, self.value
+        if kind == "affine":
+            return prices * value[0] + value[1]
+        if kind == "multiply":
+            return prices * value
+        if kind == "fee":
+            return prices + value
+        if kind == "floor":
+            return np.maximum(prices, value)
+        if kind == "ceiling":
+            return np.minimum(prices, value)
+        if kind == "round":
+            units = np.round(prices / value, 9)
+            if self.mode == "ceil":
+                units = np.ceil(units)
+            elif self.mode == "floor":
+                units = np.floor(units)
+            else:
+                units = np.floor(units + 0.5)
+            return units * value
+        if kind == "ending":
+            whole = np.ceil(np.round(prices, 9))
+            return whole + np.mod(value - whole, 10)
+        raise ValueError(f"未知的定價步驟: {kind}")
+
+    def __repr__(self):
+        mode = f" {self.mode}" if self.mode else ""
+        return f"<{self.kind}{mode} {self.value}>"
+
+
+def fuse_steps(steps):
+    # 相鄰的乘法與加法合併為一個 price * a + b，減少每個價格要跑的步驟
+    fused = []
+    for step in steps:
+        if step.kind not in ("multiply", "fee"):
+            fused.append(step)
+            continue
+        mul, add = (step.value, 0.0) if step.kind == "multiply" else (1.0, step.value)
+        if fused and fused[-1].kind == "affine":
+            prev_mul, prev_add = fused[-1].value
+            fused[-1] = PriceStep("affine", (prev_mul * mul, prev_add * mul + add))
+        else:
+            fused.append(PriceStep("affine", (mul, add)))
+    return fused
+
+
+# 加成步驟的 mode；from_config 只在沒有加成步驟時才套用 markup_percentage，折扣不算
+MARKUP = "markup"
+
+
+def _percent_up(m):
+    return PriceStep("multiply", 1 + parse_number(m.group(1)) / 100, MARKUP)
+
+
+def _percent_down(m):
+    return PriceStep("multiply", 1 - parse_number(m.group(1)) / 100)
+
+
+def _zhe(m):
+    # 9 折 = 0.9、85 折 = 0.85
+    n = parse_number(m.group(1))
+    return PriceStep("multiply", n / 10 if n < 10 else n / 100)
+
+
+def _rounding(m):
+    keyword = m.group(1).lower()
+    if keyword in ("無條件進位", "ceil", "round up"):
+        mode = "ceil"
+    elif keyword in ("無條件捨去", "round down"):
+        mode = "floor"
+    else:
+        mode = "nearest"
+    if m.group(2):
+        step = parse_number(m.group(2))
+    else:
+        step = PLACES.get(m.group(3), 1)
+    return PriceStep("round", step, mode)
+
+
+# 「進位到十位」等以位數表示的單位
+PLACES = {"個": 1, "十": 10, "百": 100, "千": 1000}
+
+# 文字規則：依序嘗試，第一個符合的樣式決定步驟類型
+TEXT_RULES = [
+    (r"(?:折扣|打折|降價|減價|discount)\s*" + NUMBER + r"\s*%", _percent_down),
+    (r"打?\s*" + NUMBER + r"\s*折(?!扣)", _zhe),
+    (r"(?:加成|加價|漲價|上調|markup|加|\+)\s*" + NUMBER + r"\s*%", _percent_up),
+    # x 前後不能是英文字母，避免「max 500」被當成乘以 500
+    (r"(?:乘以|乘|[×*]|(?<![a-z])x(?![a-z]))\s*" + NUMBER + r"(?!\s*%)",
+     lambda m: PriceStep("multiply", parse_number(m.group(1)), MARKUP)),
+    (r"(?:最低(?:售價|價格|價)?|(?:售價|價格)?下限|不低於|min(?:imum)?)\s*" + NUMBER,
+     lambda m: PriceStep("floor", parse_number(m.group(1)))),
+    (r"(?:最高(?:售價|價格|價)?|(?:售價|價格)?上限|不高於|不超過|max(?:imum)?)\s*" + NUMBER,
+     lambda m: PriceStep("ceiling", parse_number(m.group(1)))),
+    (r"(?:尾數|ending)\s*(?:為|with)?\s*(\d)(?!\d)", lambda m: PriceStep("ending", int(m.group(1)))),
+    (r"(無條件進位|無條件捨去|四捨五入|round up|round down|round|ceil)(?:[^\d個十百千]*?(?:" + NUMBER + r"|([個十百千])位))?",
+     _rounding),
+    # 數字後面不能接數字，避免回溯成「加 3」而略過「加 30%」的 % 檢查
+    (r"(?:手續費|服務費|包裝費|加|fee|\+)\s*" + NUMBER + r"(?![\d.,])\s*(?:元|塊)?(?!\s*[%折])",
+     lambda m: PriceStep("fee", parse_number(m.group(1)))),
+    (r"(?:減|折抵|-)\s*" + NUMBER + r"(?![\d.,])\s*(?:元|塊)(?!\s*[%折])", lambda m: PriceStep("fee", -parse_number(m.group(1)))),
+]
+_COMPILED_TEXT_RULES = [(re.compile(pattern, re.IGNORECASE), build) for pattern, build in TEXT_RULES]
+
+# 結構化規則：{"type": "markup", "value": 30}
+DICT_RULES = {
+    "markup": lambda v, r: PriceStep("multiply", 1 + v / 100, MARKUP),
+    "discount": lambda v, r: PriceStep("multiply", 1 - v / 100),
+    "multiply": lambda v, r: PriceStep("multiply", v, MARKUP),
+    "fee": lambda v, r: PriceStep("fee", v),
+    "floor": lambda v, r: PriceStep("floor", v),
+    "ceiling": lambda v, r: PriceStep("ceiling", v),
+    "round": lambda v, r: PriceStep("round", v or 1, r.get("mode", "nearest")),
+    "ending": lambda v, r: PriceStep("ending", int(v)),
+}
+
+
+def compile_rule(rule):
+    # 無法辨識的規則（例如「滿 500 元免運」）返回 None
+    if isinstance(rule, dict):
+        build = DICT_RULES.get(rule.get("type"))
+        if build is None:
+            return None
+        return build(float(rule.get("value", 0)), rule)
+    for regex, build in _COMPILED_TEXT_RULES:
+        match = regex.search(str(rule))
+        if match:
+            step = build(match)
+            step.source = rule
+            return step
+    return None
+
+
+class PricingEngine:
+    # 規則只在建立時解析一次，之後每個價格只需依序套用編譯好的步驟
+    def __init__(self, rules=None, decimals=0, min_price=1):
+        self.decimals = decimals
+        self.min_price = min_price
+        self.steps = []
+        self.ignored = []
+        for rule in rules or []:
+            step = compile_rule(rule)
+            if step is None:
+                logger.warning(f"定價規則無法辨識，已略過: {rule}")
+                self.ignored.append(rule)
+            else:
+                self.steps.append(step)
+        self._compile()
+
+    @classmethod
+    def from_config(cls, pricing_config):
+        pricing_config = pricing_config or {}
+        engine = cls(pricing_config.get("rules") or [], decimals=pricing_config.get("decimals", 0))
+        # 沒有加成規則時才使用 markup_percentage，避免與文字規則重複加成；折扣規則不影響
+        markup = pricing_config.get("markup_percentage") or 0
+        if markup and not any(step.mode == MARKUP for step in engine.steps):
+            engine.steps.insert(0, PriceStep("multiply", 1 + markup / 100, MARKUP, source="markup_percentage"))
+        base_price = pricing_config.get("base_price") or 0
+        if base_price:
+            engine.steps.insert(0, PriceStep("fee", base_price, source="base_price"))
+        engine._compile()
+        return engine
+
+    def price(self, original_price):
+        price = parse_price(original_price)
+        for func in self._funcs:
+            price = func(price)
+        return self._finish(price)
+
+    def price_many(self, prices, use_numpy=None):
+        # 有 numpy 時整批以陣列運算，否則每個步驟對整份清單跑一次
+        np = _numpy() if use_numpy is not False else None
+        if use_numpy and np is None:
+            raise ImportError("需要安裝 numpy: pip install numpy")
+        values = [parse_price(p) for p in prices]
+
+        if np is not None:
+            array = np.asarray(values, dtype=float)
+            for step in self._plan:
+                array = step.apply_array(array, np)
+            scale = 10 ** self.decimals
+            array = np.maximum(np.floor(np.round(array * scale, 9) + 0.5) / scale, self.min_price)
+            return array.tolist()
+
+        for func in self._funcs:
+            values = [func(v) for v in values]
+        finish = self._finish
+        return [finish(v) for v in values]
+
+    def format(self, price):
+        if self.decimals:
+            return f"{price:.{self.decimals}f}"
+        return str(int(price))
+
+    def _compile(self):
+        self._plan = fuse_steps(self.steps)
+        self._funcs = [step.scalar() for step in self._plan]
+
+    def _finish(self, price):
+        # 四捨五入（不使用 round() 的銀行家捨入）
+        scale = 10 ** self.decimals
+        price = math.floor(round(price * scale, 9) + 0.5) / scale
+        return price if price >= self.min_price else self.min_price
+
+    def __repr__(self):
+        return f"<PricingEngine {self.steps}>"
+
+
+_numpy_module = None
+
+
+def _numpy():
+    global _numpy_module
+    if _numpy_module is None:
+        try:
+            import numpy
+            _numpy_module = numpy
+        except ImportError:
+            _numpy_module = False
+    return _numpy_module or None
+
 
 class PricingCalculator:
     def __init__(self, config=None):
         self.config = config or {"markup_ratio": 1.3, "add_fee": 10}
         self.logger = logging.getLogger("shrimp.pricing")
+        self.engine = PricingEngine([
+            {"type": "multiply", "value": self.config.get("markup_ratio", 1.3)},
+            {"type": "fee", "value": self.config.get("add_fee", 10)},
+            {"type": "round", "value": 1, "mode": "floor"},
+        ], min_price=0)
 
     def calculate(self, original_price):
         try:
-            markup_ratio = self.config.get("markup_ratio", 1.3)
-            add_fee = self.config.get("add_fee", 10)
-            
-            final_price = int(original_price * markup_ratio + add_fee)
+            final_price = int(self.engine.price(original_price))
             self.logger.info(f"計算定價: 原價 {original_price} -> 售價 {final_price}")
             return final_price
         except Exception as e:
@@ -1,21 +1,20 @@
 import logging
-import time
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.webdriver.common.by import By
+from plugins.browser_pool import BrowserPool, wait_for, wait_for_page
+
+SELLER_HOME = "https://seller.shopee.tw"
 
 class ShopeeUploader:
-    def __init__(self, headless=False):
+    def __init__(self, headless=False, pool=None):
         self.logger = logging.getLogger("shrimp.uploader")
-        self.options = Options()
-        if headless:
-            self.options.add_argument("--headless")
+        # 共用連線池時瀏覽器在上架之間保持開啟，不必每次重新啟動與登入
+        self.owns_pool = pool is None
+        self.pool = pool or BrowserPool(size=1, headless=headless)
         self.driver = None
 
     def start_driver(self):
         try:
-            self.driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=self.options)
+            self.driver = self.pool.acquire()
             return True
         except Exception as e:
             self.logger.error(f"啟動瀏覽器失敗: {str(e)}")
@@ -23,21 +22,37 @@ class ShopeeUploader:
 
     def login(self, username, password):
         self.logger.info(f"嘗試登入蝦皮帳號: {username}")
-        # 這裡實作 Selenium 登入邏輯
-        time.sleep(2)
+        self.driver.get(SELLER_HOME)
+        wait_for_page(self.driver)
+        if "login" not in self.driver.current_url:
+            self.logger.info("已沿用保存的登入狀態")
+            return True
+        wait_for(self.driver, (By.NAME, "loginKey")).send_keys(username)
+        self.driver.find_element(By.NAME, "password").send_keys(password)
+        wait_for(self.driver, (By.XPATH, "//button[contains(text(), '登入')]"), clickable=True).click()
+        wait_for_page(self.driver)
+        self.pool.save_cookies(self.driver)
         return True
 
     def upload(self, product_data):
+        # 目前只會開啟新增商品頁面，表單填寫尚未實作，因此一律返回 False，由人工完成上架
         self.logger.info(f"正在上架商品: {product_data.get('name')}")
         try:
-            # 這裡實作 Selenium 上架流程
-            time.sleep(5)
-            self.logger.info("上架成功！")
-            return True
+            self.driver.get(f"{SELLER_HOME}/portal/product/new")
+            wait_for_page(self.driver)
+            if "login" in self.driver.current_url:
+                self.logger.error("上架失敗: 瀏覽器尚未登入蝦皮賣家中心")
+                return False
+            self.logger.warning("尚未實作自動填寫商品表單，已開啟新增商品頁面，請手動完成上架")
+            return False
         except Exception as e:
             self.logger.error(f"上架失敗: {str(e)}")
             return False
 
     def close(self):
+        # 瀏覽器歸還給連線池，由連線池決定是否關閉
         if self.driver:
-            self.driver.quit()
+            self.pool.release(self.driver)
+            self.driver = None
+        if self.owns_pool:
+            self.pool.close()
@@ -7,17 +7,23 @@
 import os
 import json
 import sys
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
 # 將專案根目錄加入路徑
 ROOT_DIR = Path(__file__).parent
 sys.path.insert(0, str(ROOT_DIR))
 
+from utils.metrics import METRICS
+
 class CompanyShrimp:
     def __init__(self):
         self.config = self.load_config()
         self.download_folder = Path(self.config["image_settings"]["download_folder"])
         self.download_folder.mkdir(exist_ok=True)
+        self._components = {}
+        self._components_lock = threading.RLock()
         self.setup_environment()
 
     def load_config(self):
@@ -37,7 +43,12 @@ class CompanyShrimp:
             "shopee": {
                 "shop_url": "",
                 "api_key": "",
-                "shop_id": ""
+                "shop_id": "",
+                "api_base": "https://partner.shopee.tw",
+                "upload_workers": 4,
+                "rate_limit": 10,
+                "max_retries": 3,
+                "browser_pool_size": 2
             },
             "pricing": {
                 "base_price": 0,
@@ -49,12 +60,51 @@ class CompanyShrimp:
             "image_settings": {
                 "max_size_kb": 1024,
                 "formats": ["jpg", "jpeg", "png"],
-                "download_folder": "./downloads"
+                "download_folder": "./downloads",
+                "max_workers": 4,
+                "per_host_limit": 2,
+                "optimize_workers": 0,
+                "cache_max_mb": 1024,
+                "max_download_mb": 20,
+                "max_pixels": 40000000
             },
             "ai": {
                 "api_endpoint": "",
                 "model": "",
-                "temperature": 0.7
+                "temperature": 0.7,
+                "batch_size": 8,
+                "workers": 4,
+                "rate_limit": 1.0,
+                "max_retries": 3,
+                "timeout": 60
+            },
+            "cache": {
+                "folder": "./cache",
+                "revalidate": True
+            },
+            "extractor": {
+                "parser": "auto",
+                "sites": []
+            },
+            "category": {
+                "tree_file": "data/shopee_categories.json",
+                "synonyms_file": "data/category_synonyms.json",
+                "min_score": 0.5
+            },
+            "keywords": {
+                "dictionary_file": "data/keywords.json"
+            },
+            "batch": {
+                "extract_workers": 4,
+                "download_workers": 2,
+                "generate_workers": 1,
+                "upload_workers": 2,
+                "queue_size": 32,
+                "engine": "threads"
+            },
+            "daemon": {
+                "host": "127.0.0.1",
+                "port": 18765
             }
         }
         
@@ -77,54 +127,228 @@ class CompanyShrimp:
         else:
             print("警告：未找到 .env 檔案")
 
-    def download_images(self, urls, folder=None):
-        """下載圖片"""
+    def _component(self, name, factory):
+        """取得共用元件，第一次使用時才建立（多執行緒安全）"""
+        component = self._components.get(name)
+        if component is None:
+            with self._components_lock:
+                component = self._components.get(name)
+                if component is None:
+                    component = factory()
+                    self._components[name] = component
+        return component
+
+    @property
+    def http_cache(self):
+        """網頁與圖片共用的條件式請求快取（config 的 cache.revalidate 關閉時為 None）"""
+        cache_config = self.config.get("cache", {})
+        if not cache_config.get("revalidate", True):
+            return None
+        
+        def create():
+            from utils.http_cache import HttpCache
+            
+            cache_folder = Path(cache_config.get("folder", "./cache"))
+            return HttpCache(cache_folder / "http_cache.json")
+        
+        return self._component("http_cache", create)
+
+    @property
+    def extractor(self):
+        """共用的商品資訊提取器"""
+        def create():
+            from utils.product_extractor import ProductExtractor
+            from utils.site_extractors import build_registry
+            
+            extractor_config = self.config.get("extractor", {})
+            return ProductExtractor(
+                http_cache=self.http_cache,
+                parser=extractor_config.get("parser", "auto"),
+                sites=build_registry(extractor_config.get("sites", []))
+            )
+        
+        return self._component("extractor", create)
+
+    @property
+    def downloader(self):
+        """共用的圖片下載器（連線、快取與壓縮行程池在多個商品間重複使用）"""
+        return self._component("downloader", lambda: self.create_downloader(self.download_folder))
+
+    @property
+    def generator(self):
+        """共用的上架資料生成器"""
+        def create():
+            from plugins.shopee_generator import ShopeeListingGenerator
+            
+            return ShopeeListingGenerator(
+                pricing_rules=self.config["pricing"]["rules"],
+                ai_config=self.config["ai"],
+                pricing_config=self.config["pricing"],
+                copywriter=self.copywriter,
+                category_index=self.category_index,
+                tagger=self.tagger
+            )
+        
+        return self._component("generator", create)
+
+    @property
+    def category_index(self):
+        """蝦皮分類索引（config 的 category.tree_file 未設定時為 None）"""
+        category_config = self.config.get("category", {})
+        if not category_config.get("tree_file"):
+            return None
+        
+        def create():
+            from utils.category_index import CategoryIndex
+            
+            synonyms_file = category_config.get("synonyms_file")
+            return CategoryIndex.load(
+                ROOT_DIR / category_config["tree_file"],
+                synonyms_file=ROOT_DIR / synonyms_file if synonyms_file else None,
+                cache_dir=Path(self.config.get("cache", {}).get("folder", "./cache")),
+                min_score=category_config.get("min_score", 0.5)
+            )
+        
+        return self._component("category_index", create)
+
+    @property
+    def tagger(self):
+        """關鍵字標記（config 的 keywords.dictionary_file 未設定時為 None）"""
+        dictionary_file = self.config.get("keywords", {}).get("dictionary_file")
+        if not dictionary_file:
+            return None
+        
+        def create():
+            from utils.keyword_tagger import KeywordTagger
+            
+            return KeywordTagger.load(ROOT_DIR / dictionary_file)
+        
+        return self._component("tagger", create)
+
+    @property
+    def copywriter(self):
+        """AI 文案（config 的 ai 區段未設定 api_endpoint 或 model 時為 None）"""
+        def create():
+            from plugins.ai_copywriter import AiCopywriter
+            
+            cache_folder = Path(self.config.get("cache", {}).get("folder", "./cache"))
+            return AiCopywriter.from_config(self.config.get("ai", {}), cache_dir=cache_folder / "ai_copy")
+        
+        ai_config = self.config.get("ai", {})
+        if not ai_config.get("api_endpoint"):
+            return None
+        return self._component("copywriter", create)
+
+    @property
+    def uploader(self):
+        """共用的蝦皮上傳工具"""
+        def create():
+            from plugins.browser_pool import BrowserPool
+            from plugins.shopee_uploader import ImageIdStore, ShopeeUploader
+            
+            shopee_config = self.config["shopee"]
+            cache_folder = Path(self.config.get("cache", {}).get("folder", "./cache"))
+            return ShopeeUploader(
+                shop_url=shopee_config["shop_url"],
+                api_key=shopee_config["api_key"],
+                shop_id=shopee_config["shop_id"],
+                api_base=shopee_config.get("api_base", "https://partner.shopee.tw"),
+                upload_workers=shopee_config.get("upload_workers", 4),
+                max_retries=shopee_config.get("max_retries", 3),
+                rate_limit=shopee_config.get("rate_limit", 10),
+                image_id_store=ImageIdStore(cache_folder / "shopee_image_ids.json"),
+                category_index=self.category_index,
+                # 瀏覽器在第一次使用自動化上傳時才會啟動
+                browser_pool=BrowserPool(
+                    size=shopee_config.get("browser_pool_size", 2),
+                    profile_dir=cache_folder / "browser_profiles"
+                )
+            )
+        
+        return self._component("uploader", create)
+
+    def create_downloader(self, folder):
+        """依設定建立圖片下載器"""
         from utils.image_downloader import ImageDownloader
         
-        downloader = ImageDownloader(
-            download_folder=folder or self.download_folder,
-            max_size_kb=self.config["image_settings"]["max_size_kb"]
+        image_settings = self.config["image_settings"]
+        return ImageDownloader(
+            download_folder=folder,
+            max_size_kb=image_settings["max_size_kb"],
+            max_workers=image_settings.get("max_workers", 4),
+            per_host_limit=image_settings.get("per_host_limit", 2),
+            optimize_workers=image_settings.get("optimize_workers", 0),
+            cache_max_mb=image_settings.get("cache_max_mb", 1024),
+            http_cache=self.http_cache,
+            max_download_mb=image_settings.get("max_download_mb", 20),
+            max_pixels=image_settings.get("max_pixels", 40_000_000)
         )
+
+    def download_images(self, urls, folder=None):
+        """下載圖片"""
+        if folder:
+            with self.create_downloader(folder) as downloader:
+                return downloader.download_urls(urls)
         
-        return downloader.download_urls(urls)
+        return self.downloader.download_urls(urls)
 
     def extract_product_info(self, source):
         """提取商品資訊"""
-        from utils.product_extractor import ProductExtractor
-        
-        extractor = ProductExtractor()
-        
         if source.startswith("http"):
             # 從網址提取
-            return extractor.from_url(source)
+            return self.extractor.from_url(source)
         else:
             # 從檔案提取
-            return extractor.from_file(source)
+            return self.extractor.from_file(source)
 
-    def generate_listing(self, product_info):
-        """生成蝦皮上架資料"""
-        from plugins.shopee_generator import ShopeeListingGenerator
-        
-        generator = ShopeeListingGenerator(
-            pricing_rules=self.config["pricing"]["rules"],
-            ai_config=self.config["ai"]
-        )
-        
-        return generator.generate(product_info)
+    def normalize_product_info(self, data):
+        """標準化已含商品欄位的資料"""
+        return self.extractor._normalize_product_info(data)
 
-    def upload_to_shopee(self, listing_data):
-        """上傳到蝦皮"""
-        from plugins.shopee_uploader import ShopeeUploader
-        
-        uploader = ShopeeUploader(
-            shop_url=self.config["shopee"]["shop_url"],
-            api_key=self.config["shopee"]["api_key"],
-            shop_id=self.config["shopee"]["shop_id"]
-        )
-        
-        return uploader.upload(listing_data)
+    def prefetch_copy(self, product_info):
+        """先送出 AI 文案請求並返回 Future（未啟用 AI 時為 None），與其他商品一起分批處理"""
+        copywriter = self.copywriter
+        return copywriter.submit(product_info) if copywriter else None
+
+    def generate_listing(self, product_info, copy=None):
+        """生成蝦皮上架資料；copy 為 prefetch_copy 取得的 AI 文案"""
+        with METRICS.timer("generate"):
+            return self.generator.generate(product_info, copy)
+
+    def upload_to_shopee(self, listing_data, request_id=None):
+        """上傳到蝦皮；request_id 為任務識別，同一任務重跑時不會重複建立商品"""
+        with METRICS.timer("upload"):
+            return self.uploader.upload(listing_data, request_id)
 
-    def run_flow(self, source, auto_upload=False):
+    def update_on_shopee(self, item_id, listing_data, fields, request_id=None):
+        """只更新蝦皮商品中有變更的欄位"""
+        with METRICS.timer("update"):
+            return self.uploader.update(item_id, listing_data, fields, request_id)
+
+    def warm_up(self):
+        """預先建立提取、下載與生成元件（常駐服務啟動時使用，第一個指令就不用等待載入）"""
+        self.extractor
+        self.downloader
+        self.generator
+
+    def close(self):
+        """釋放共用資源"""
+        downloader = self._components.pop("downloader", None)
+        if downloader is not None:
+            downloader.close()
+        uploader = self._components.pop("uploader", None)
+        if uploader is not None:
+            uploader.close()
+        copywriter = self._components.pop("copywriter", None)
+        if copywriter is not None:
+            copywriter.close()
+            # 生成器持有已關閉的 copywriter，下次使用時重新建立
+            self._components.pop("generator", None)
+        http_cache = self._components.get("http_cache")
+        if http_cache is not None:
+            http_cache.flush()
+
+    def run_flow(self, source, auto_upload=False, request_id=None):
         """執行完整流程"""
         try:
             print(f"開始處理來源：{source}")
@@ -143,13 +367,14 @@ class CompanyShrimp:
             # 3. 生成上架資料
             print("步驟 3: 生成上架資料...")
             listing_data = self.generate_listing(product_info)
+            listing_data["local_images"] = downloaded_images
             print(f"生成上架資料：{listing_data.get('title', '未知')}")
             print(f"建議售價：{listing_data.get('price', '未知')}")
             
             # 4. 上傳到蝦皮
             if auto_upload:
                 print("步驟 4: 上傳到蝦皮...")
-                result = self.upload_to_shopee(listing_data)
+                result = self.upload_to_shopee(listing_data, request_id)
                 print(f"上傳結果：{result}")
             else:
                 print("步驟 4: 跳過自動上傳（設定 auto_upload=True 以啟用）")
@@ -163,20 +388,127 @@ class CompanyShrimp:
             traceback.print_exc()
             return None
 
-def main():
-    """主程式入口"""
+    async def run_flow_async(self, source, auto_upload=False, request_id=None):
+        """run_flow 的 asyncio 版本：各步驟在執行緒中執行，不會阻塞事件迴圈"""
+        import asyncio
+        
+        product_info = await asyncio.to_thread(self.extract_product_info, source)
+        downloaded_images = await asyncio.to_thread(self.download_images, product_info.get("images", []))
+        listing_data = await asyncio.to_thread(self.generate_listing, product_info)
+        listing_data["local_images"] = downloaded_images
+        if auto_upload:
+            listing_data["upload"] = await asyncio.to_thread(self.upload_to_shopee, listing_data, request_id)
+        return listing_data
+
+    def run_batch(self, catalog_file, output_file, auto_upload=False, engine=None):
+        """批次處理目錄檔中的所有來源，結果逐筆寫入 JSONL"""
+        from utils.catalog_reader import iter_catalog
+        
+        batch_config = self.config.get("batch", {})
+        workers = dict(
+            auto_upload=auto_upload,
+            extract_workers=batch_config.get("extract_workers", 4),
+            download_workers=batch_config.get("download_workers", 2),
+            generate_workers=batch_config.get("generate_workers", 1),
+            queue_size=batch_config.get("queue_size", 32)
+        )
+        
+        if (engine or batch_config.get("engine", "threads")) == "asyncio":
+            from utils.async_pipeline import AsyncPipeline
+            runner = AsyncPipeline(self, upload_workers=batch_config.get("upload_workers", 2), **workers)
+        else:
+            from utils.batch_runner import BatchRunner
+            runner = BatchRunner(self, **workers)
+        
+        with open(output_file, "w", encoding="utf-8") as output:
+            return runner.run(iter_catalog(catalog_file), output)
+
+    def run_sync(self, catalog_file, output_file, auto_upload=False):
+        """增量同步目錄檔：只處理與上次同步相比有變更的商品"""
+        from utils.catalog_reader import iter_catalog
+        from utils.product_store import ProductStore
+        from utils.sync_runner import SyncRunner
+        
+        batch_config = self.config.get("batch", {})
+        cache_folder = Path(self.config.get("cache", {}).get("folder", "./cache"))
+        runner = SyncRunner(
+            self,
+            ProductStore(cache_folder / "products.db"),
+            auto_upload=auto_upload,
+            extract_workers=batch_config.get("extract_workers", 4),
+            download_workers=batch_config.get("download_workers", 2),
+            generate_workers=batch_config.get("generate_workers", 1),
+            queue_size=batch_config.get("queue_size", 32)
+        )
+        
+        with open(output_file, "w", encoding="utf-8") as output:
+            return runner.run(iter_catalog(catalog_file), output)
+
+def batch_main(argv, app=None):
+    """批次模式入口；app 為常駐服務共用的實例"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog="main.py batch", description="公司蝦 - 批次處理商品目錄")
+    parser.add_argument("file", help="目錄檔（網址清單 .txt、.jsonl 或表格 .csv / .tsv / .xlsx）")
+    parser.add_argument("--output", help="結果 JSONL 檔（預設為 <目錄檔名>.results.jsonl）")
+    parser.add_argument("--upload", action="store_true", help="自動上傳到蝦皮")
+    parser.add_argument("--engine", choices=["threads", "asyncio"],
+                        help="處理方式（預設依 config.json 的 batch.engine）")
+    parser.add_argument("--metrics", action="store_true", help="結束時輸出各階段耗時與快取命中率（JSON）")
+    
+    args = parser.parse_args(argv)
+    output_file = args.output or f"{Path(args.file).stem}.results.jsonl"
+    
+    with _app_scope(app) as app:
+        summary = app.run_batch(args.file, output_file, auto_upload=args.upload, engine=args.engine)
+    
+    print(f"\n結果已寫入：{output_file}")
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    if args.metrics:
+        print_metrics()
+    return summary
+
+def sync_main(argv, app=None):
+    """增量同步模式入口；app 為常駐服務共用的實例"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog="main.py sync", description="公司蝦 - 增量同步商品目錄")
+    parser.add_argument("file", help="目錄檔（網址清單 .txt、.jsonl 或表格 .csv / .tsv / .xlsx）")
+    parser.add_argument("--output", help="結果 JSONL 檔（預設為 <目錄檔名>.sync.jsonl）")
+    parser.add_argument("--upload", action="store_true", help="上傳新商品並更新有變更的商品")
+    parser.add_argument("--metrics", action="store_true", help="結束時輸出各階段耗時與快取命中率（JSON）")
+    
+    args = parser.parse_args(argv)
+    output_file = args.output or f"{Path(args.file).stem}.sync.jsonl"
+    
+    with _app_scope(app) as app:
+        summary = app.run_sync(args.file, output_file, auto_upload=args.upload)
+    
+    print(f"\n結果與欄位差異已寫入：{output_file}")
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    if args.metrics:
+        print_metrics()
+    return summary
+
+def flow_main(argv, app=None):
+    """單筆模式入口，返回上架資料（失敗時為 None）"""
     import argparse
     
-    parser = argparse.ArgumentParser(description="公司蝦 - 蝦皮自動上架工具")
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="公司蝦 - 蝦皮自動上架工具",
+        epilog="批次處理：python main.py batch <目錄檔>；增量同步：python main.py sync <目錄檔>；"
+               "常駐服務：python main.py daemon，之後以 python main.py --remote <參數> 執行"
+    )
     parser.add_argument("source", help="來源（網址或檔案路徑）")
     parser.add_argument("--upload", action="store_true", help="自動上傳到蝦皮")
     parser.add_argument("--config", help="指定配置檔路徑")
+    parser.add_argument("--metrics", action="store_true", help="結束時輸出各階段耗時與快取命中率（JSON）")
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
-    app = CompanyShrimp()
-    
-    result = app.run_flow(args.source, auto_upload=args.upload)
+    with _app_scope(app) as app:
+        result = app.run_flow(args.source, auto_upload=args.upload)
     
     if result:
         print("\n✅ 完成！")
@@ -185,6 +517,104 @@ def main():
         print(f"分類：{result.get('category', '未知')}")
     else:
         print("\n❌ 失敗")
+    if args.metrics:
+        print_metrics()
+    return result
+
+def print_metrics():
+    """輸出本次執行的效能指標摘要"""
+    print("\n效能指標：")
+    print(json.dumps(METRICS.summary(), ensure_ascii=False, indent=2))
+
+@contextmanager
+def _app_scope(app=None):
+    """沿用常駐服務的實例，或建立一個只用於這次指令的實例"""
+    if app is not None:
+        yield app
+        return
+    app = CompanyShrimp()
+    try:
+        yield app
+    finally:
+        app.close()
+
+def run_cli(argv, app=None):
+    """執行一個命令列指令並返回結束代碼"""
+    if argv[:1] == ["batch"]:
+        batch_main(argv[1:], app)
+        return 0
+    if argv[:1] == ["sync"]:
+        sync_main(argv[1:], app)
+        return 0
+    return 0 if flow_main(argv, app) else 1
+
+def daemon_settings():
+    """常駐服務的位址與金鑰檔；只讀 config.json，不建立 CompanyShrimp"""
+    config = {}
+    config_path = ROOT_DIR / "config.json"
+    if config_path.exists():
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    daemon_config = config.get("daemon", {})
+    address = (daemon_config.get("host", "127.0.0.1"), daemon_config.get("port", 18765))
+    cache_folder = Path(config.get("cache", {}).get("folder", "./cache"))
+    if not cache_folder.is_absolute():
+        cache_folder = ROOT_DIR / cache_folder
+    return address, cache_folder / "daemon.key"
+
+def daemon_main(argv):
+    """常駐服務：載入一次後重複執行 --remote 送來的指令"""
+    import argparse
+    from utils.daemon import control, serve
+    
+    parser = argparse.ArgumentParser(prog="main.py daemon", description="公司蝦 - 常駐服務")
+    parser.add_argument("--stop", action="store_true", help="停止執行中的常駐服務")
+    parser.add_argument("--status", action="store_true", help="檢查常駐服務是否在執行")
+    args = parser.parse_args(argv)
+    
+    address, key_file = daemon_settings()
+    if args.stop or args.status:
+        running = control("stop" if args.stop else "ping", key_file, address)
+        if args.stop:
+            print("已停止常駐服務" if running else "常駐服務未在執行")
+        else:
+            print(f"常駐服務執行中：{address[0]}:{address[1]}" if running else "常駐服務未在執行")
+        return 0 if running else 1
+    
+    app = CompanyShrimp()
+    # 執行指令時會切換到用戶端的工作目錄，資料夾先固定為啟動服務時的絕對路徑
+    app.download_folder = app.download_folder.resolve()
+    cache_config = app.config.setdefault("cache", {})
+    cache_config["folder"] = str(Path(cache_config.get("folder", "./cache")).resolve())
+    app.warm_up()
+    
+    def handle(command_argv):
+        # 每個指令的 --metrics 只統計該指令
+        METRICS.reset()
+        return run_cli(command_argv, app)
+    
+    serve(handle, key_file, address, on_stop=app.close)
+    return 0
+
+def remote_main(argv):
+    """請常駐服務執行指令；服務未啟動時直接在本行程執行"""
+    from utils.daemon import DaemonUnavailable, call
+    
+    address, key_file = daemon_settings()
+    try:
+        return call(argv, key_file, address)
+    except DaemonUnavailable as e:
+        print(f"{e}，改為直接執行", file=sys.stderr)
+        return run_cli(argv)
+
+def main():
+    """主程式入口"""
+    argv = sys.argv[1:]
+    if argv[:1] == ["daemon"]:
+        sys.exit(daemon_main(argv[1:]))
+    if argv[:1] == ["--remote"]:
+        sys.exit(remote_main(argv[1:]))
+    sys.exit(run_cli(argv))
 
 if __name__ == "__main__":
     main()
@@ -1,5 +1,24 @@
 # Plugins 模組
-from .shopee_generator import ShopeeListingGenerator
-from .shopee_uploader import ShopeeUploader
+# 子模組在第一次存取屬性時才載入，避免 import plugins 就載入 requests 與 Selenium 相關模組
+from importlib import import_module
 
-__all__ = ["ShopeeListingGenerator", "ShopeeUploader"]
+_LAZY = {
+    "AiCopywriter": ".ai_copywriter",
+    "ShopeeListingGenerator": ".shopee_generator",
+    "ShopeeUploader": ".shopee_uploader",
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI 商品文案
+
+以 OpenAI 相容的 /chat/completions 介面為商品撰寫標題與描述：
+- 一次請求包含多個商品（batch_size），減少往返次數與重複送出的系統提示
+- 多個請求同時進行（workers），送出前先經過令牌桶限速（rate_limit 次/秒）
+- 回應依 (提示、模型、商品指紋) 存在磁碟快取，同一商品不會重複計費
+- 遇到 429、5xx 與連線錯誤時以指數退避重試，並遵守 Retry-After
+
+批次處理時以 submit() 逐筆送入，湊滿 batch_size 或等待 max_wait 秒後一起送出。
+請求失敗或回應缺少某個商品時返回空字典，由生成器改用原本的規則產生文案。
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.metrics import METRICS
+from utils.rate_limiter import TokenBucket, backoff_delay, parse_retry_after
+
+
+DEFAULT_PROMPT = Path(__file__).resolve().parent.parent / "prompts" / "shopee_copywriting.md"
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# 影響文案內容的商品欄位；價格不在其中，改價不需要重寫文案
+FINGERPRINT_FIELDS = ("name", "description", "category")
+# 單一商品描述送出的最大字數，避免一個商品佔掉整批的上下文
+MAX_INPUT_CHARS = 2000
+
+_CODE_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def fingerprint(product: Dict) -> str:
+    """商品中影響文案的欄位雜湊"""
+    fields = {field: str(product.get(field) or "").strip() for field in FINGERPRINT_FIELDS}
+    canonical = json.dumps(fields, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CopyCache:
+    """每個快取鍵一個 JSON 檔，多個執行緒與行程可同時讀寫"""
+
+    def __init__(self, folder):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.folder / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key: str, value: Dict):
+        path = self._path(key)
+        tmp_path = path.with_name(f"{key}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+class AiCopywriter:
+    def __init__(self, api_base: str, model: str, api_key: str = "", temperature: float = 0.7,
+                 batch_size: int = 8, workers: int = 4, rate_limit: float = 1.0, max_retries: int = 3,
+                 retry_backoff: float = 1.0, max_backoff: float = 60, timeout: float = 60,
+                 max_wait: float = 0.5, cache_dir=None, prompt_path=DEFAULT_PROMPT):
+        self.endpoint = f"{api_base.rstrip('/')}/chat/completions"
+        self.model = model
+        self.api_key = api_key
+        self.temperature = temperature
+        self.batch_size = max(1, batch_size)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.max_wait = max_wait
+        self.limiter = TokenBucket(rate_limit) if rate_limit else None
+        self.cache = CopyCache(cache_dir) if cache_dir else None
+
+        with open(prompt_path, "r", encoding="utf-8") as f:
+            self.prompt = f.read()
+        # 提示或模型改變時快取自動失效
+        self._cache_prefix = hashlib.sha256(f"{self.prompt}\0{model}".encode("utf-8")).hexdigest()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, workers))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="ai-copy")
+
+        self._lock = threading.Lock()
+        self._pending: List = []
+        self._inflight: Dict[str, Future] = {}
+        self._timer: Optional[threading.Timer] = None
+
+    @classmethod
+    def from_config(cls, ai_config: Dict, cache_dir=None) -> Optional["AiCopywriter"]:
+        """依 config.json 的 ai 區段建立，金鑰取自 .env 的 OPENAI_API_KEY；未設定 api_endpoint 或 model 時返回 None"""
+        api_base = ai_config.get("api_endpoint")
+        model = ai_config.get("model") or os.getenv("OPENAI_MODEL", "")
+        if not api_base or not model:
+            return None
+        return cls(
+            api_base=api_base,
+            model=model,
+            api_key=os.getenv("OPENAI_API_KEY", ""),
+            temperature=ai_config.get("temperature", 0.7),
+            batch_size=ai_config.get("batch_size", 8),
+            workers=ai_config.get("workers", 4),
+            rate_limit=ai_config.get("rate_limit", 1.0),
+            max_retries=ai_config.get("max_retries", 3),
+            timeout=ai_config.get("timeout", 60),
+            cache_dir=cache_dir,
+        )
+
+    def cache_key(self, product: Dict) -> str:
+        return hashlib.sha256(f"{self._cache_prefix}\0{fingerprint(product)}".encode("utf-8")).hexdigest()
+
+    def write(self, product: Dict) -> Dict:
+        """為單一商品撰寫文案；直接送出，不等待 max_wait 湊批（也不影響批次處理中等待的商品）"""
+        future, job = self._lookup(product)
+        if job is not None:
+            self._executor.submit(self._run_batch, [job])
+        return future.result()
+
+    def write_many(self, products: List[Dict]) -> List[Dict]:
+        """為多個商品撰寫文案，順序與輸入相同；未命中快取的商品分批同時送出"""
+        lookups = [self._lookup(product) for product in products]
+        jobs = [job for _, job in lookups if job is not None]
+        for i in range(0, len(jobs), self.batch_size):
+            self._executor.submit(self._run_batch, jobs[i:i + self.batch_size])
+        return [future.result() for future, _ in lookups]
+
+    def submit(self, product: Dict) -> Future:
+        """送入一個商品，返回文案的 Future；湊滿一批或等待 max_wait 秒後送出"""
+        future, job = self._lookup(product)
+        if job is None:
+            return future
+        with self._lock:
+            self._pending.append(job)
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.max_wait, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        return future
+
+    def flush(self):
+        """立即送出等待中的商品"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._pending:
+            batch, self._pending = self._pending, []
+            self._executor.submit(self._run_batch, batch)
+
+    def _lookup(self, product: Dict):
+        """查快取，返回 (Future, 待送出的工作)；命中快取或同一商品已在處理中時不需要送出"""
+        key = self.cache_key(product)
+        cached = self.cache.get(key) if self.cache else None
+        METRICS.cache("ai_copy", cached is not None)
+        future = Future()
+        if cached is not None:
+            future.set_result(cached)
+            return future, None
+        with self._lock:
+            inflight = self._inflight.get(key)
+            if inflight is not None:
+                return inflight, None
+            self._inflight[key] = future
+        return future, (key, product, future)
+
+    def _run_batch(self, batch: List):
+        """送出一批商品，結果寫入快取並完成各自的 Future"""
+        results = {}
+        try:
+            results = self._request_batch([(str(i), product) for i, (_, product, _) in enumerate(batch)])
+        except Exception as e:
+            print(f"AI 文案生成失敗（{len(batch)} 個商品，改用預設文案）：{e}")
+
+        for i, (key, _, future) in enumerate(batch):
+            copy = results.get(str(i)) or {}
+            if copy and self.cache is not None:
+                with contextlib.suppress(OSError):
+                    self.cache.set(key, copy)
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_result(copy)
+
+    def _request_batch(self, items: List) -> Dict[str, Dict]:
+        """呼叫模型並返回 {id: {"title", "description"}}"""
+        payload = {
+            "model": self.model,
+            "temperature": self.temperature,
+            "messages": [
+                {"role": "system", "content": self.prompt},
+                {"role": "user", "content": json.dumps({"items": [
+                    {
+                        "id": item_id,
+                        "name": str(product.get("name") or ""),
+                        "description": str(product.get("description") or "")[:MAX_INPUT_CHARS],
+                        "category": str(product.get("category") or ""),
+                    }
+                    for item_id, product in items
+                ]}, ensure_ascii=False)},
+            ],
+        }
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+
+        with METRICS.timer("ai_request"):
+            response = self._post(payload, headers)
+        result = response.json()
+        usage = result.get("usage") or {}
+        for kind in ("prompt_tokens", "completion_tokens"):
+            if usage.get(kind):
+                METRICS.inc("shrimp_ai_tokens_total", usage[kind], kind=kind.split("_")[0])
+        METRICS.inc("shrimp_ai_items_total", len(items))
+
+        content = result["choices"][0]["message"]["content"]
+        return _parse_items(content)
+
+    def _post(self, payload: Dict, headers: Dict) -> requests.Response:
+        """限速並重試的請求；重試用盡時拋出最後一次的錯誤"""
+        for attempt in range(self.max_retries + 1):
+            if self.limiter is not None:
+                self.limiter.acquire()
+            retry_after = None
+            try:
+                response = self.session.post(self.endpoint, json=payload, headers=headers, timeout=self.timeout)
+                if response.status_code not in RETRYABLE_STATUS:
+                    response.raise_for_status()
+                    return response
+                error = requests.HTTPError(f"HTTP {response.status_code}", response=response)
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            METRICS.inc("shrimp_ai_retries_total")
+            if attempt < self.max_retries:
+                time.sleep(backoff_delay(attempt, self.retry_backoff, self.max_backoff, retry_after))
+        raise error
+
+    def close(self):
+        self.flush()
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+
+def _parse_items(content: str) -> Dict[str, Dict]:
+    """解析模型輸出的 {"items": [...]}；容許外層包著 ```json 區塊"""
+    data = json.loads(_CODE_FENCE.sub("", content.strip()))
+    items = data.get("items", []) if isinstance(data, dict) else data
+    results = {}
+    for item in items:
+        if not isinstance(item, dict) or "id" not in item:
+            continue
+        copy = {field: str(item[field]).strip() for field in ("title", "description") if item.get(field)}
+        if copy:
+            results[str(item["id"])] = copy
+    return results
+
+
+def main():
+    """測試用（需先啟動 benchmarks/mock_openai_server.py）"""
+    writer = AiCopywriter(api_base="http://127.0.0.1:8767/v1", model="mock-model", batch_size=4)
+    try:
+        products = [{"name": f"測試商品 {i}", "description": "這是一個測試商品", "category": "電子產品"}
+                    for i in range(6)]
+        for copy in writer.write_many(products):
+            print(json.dumps(copy, ensure_ascii=False))
+    finally:
+        writer.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+瀏覽器連線池
+
+預先啟動並保留 N 個 Chrome，上傳工作借用後歸還，不必每次重新啟動瀏覽器與登入。
+每個瀏覽器使用自己的使用者設定檔資料夾，登入狀態在程式重啟後仍然保留；
+登入後的 cookies 另外存檔，新的設定檔也能直接載入。
+ChromeDriver 的路徑在整個程式中只解析一次。
+"""
+
+import json
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+
+SHOPEE_HOME = "https://shopee.tw"
+_driver_path_lock = threading.Lock()
+_driver_path: Optional[str] = None
+_driver_path_resolved = False
+
+
+def resolve_driver_path() -> Optional[str]:
+    """以 webdriver-manager 取得 ChromeDriver 路徑（只檢查一次）；未安裝時交給 Selenium 自行尋找"""
+    global _driver_path, _driver_path_resolved
+    with _driver_path_lock:
+        if not _driver_path_resolved:
+            try:
+                from webdriver_manager.chrome import ChromeDriverManager
+                _driver_path = ChromeDriverManager().install()
+            except ImportError:
+                _driver_path = None
+            _driver_path_resolved = True
+        return _driver_path
+
+
+def wait_for(driver, locator, timeout: float = 15, clickable: bool = False):
+    """等待元素出現（或可點擊）後返回，取代固定秒數的 sleep"""
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    condition = EC.element_to_be_clickable if clickable else EC.presence_of_element_located
+    return WebDriverWait(driver, timeout).until(condition(locator))
+
+
+def wait_for_page(driver, timeout: float = 15):
+    """等待頁面載入完成"""
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    WebDriverWait(driver, timeout).until(
+        lambda d: d.execute_script("return document.readyState") == "complete"
+    )
+
+
+class BrowserPool:
+    def __init__(self, size: int = 2, headless: bool = True, profile_dir: str = "./cache/browser_profiles",
+                 login: Optional[Callable] = None, home_url: str = SHOPEE_HOME, wait_timeout: float = 15):
+        self.size = max(1, size)
+        self.headless = headless
+        self.profile_dir = Path(profile_dir)
+        self.cookie_file = self.profile_dir / "cookies.json"
+        self.login = login
+        self.home_url = home_url
+        self.wait_timeout = wait_timeout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._drivers: List = []
+        self._free_slots = list(range(self.size))
+        self._slots: Dict[int, int] = {}
+        self._closed = False
+
+    def warm_up(self, count: Optional[int] = None):
+        """預先啟動瀏覽器，之後借用時不需等待啟動"""
+        count = self.size if count is None else min(count, self.size)
+        while len(self._drivers) < count:
+            driver = self._create()
+            if driver is None:
+                break
+            self._idle.put(driver)
+
+    @contextmanager
+    def session(self, timeout: Optional[float] = None):
+        """借用一個瀏覽器；發生例外時視為狀態不明，關閉後下次重新建立"""
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        except Exception:
+            self.discard(driver)
+            raise
+        else:
+            self.release(driver)
+
+    def acquire(self, timeout: Optional[float] = None):
+        """取得閒置的瀏覽器；都在使用中且未達上限時啟動新的，否則等待歸還"""
+        if self._closed:
+            raise RuntimeError("瀏覽器連線池已關閉")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            driver = self._create()
+            if driver is not None:
+                return driver
+            # 等待歸還；期間若有瀏覽器被關閉釋出名額，下一輪會啟動新的
+            wait = 1.0 if deadline is None else min(1.0, deadline - time.monotonic())
+            if wait <= 0:
+                raise TimeoutError("等待可用瀏覽器逾時")
+            try:
+                return self._idle.get(timeout=wait)
+            except queue.Empty:
+                pass
+
+    def release(self, driver):
+        if self._closed:
+            self._quit(driver)
+        else:
+            self._idle.put(driver)
+
+    def discard(self, driver):
+        """關閉並移除瀏覽器，釋出名額"""
+        self._quit(driver)
+
+    def save_cookies(self, driver):
+        """儲存目前的登入 cookies，供新的瀏覽器載入"""
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cookie_file.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(driver.get_cookies(), f, ensure_ascii=False)
+        tmp_path.replace(self.cookie_file)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._quit(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _create(self):
+        """未達上限時啟動新的瀏覽器並完成登入；已達上限返回 None"""
+        with self._lock:
+            if not self._free_slots:
+                return None
+            slot = self._free_slots.pop(0)
+
+        try:
+            driver = self._start_driver(slot)
+        except Exception:
+            with self._lock:
+                self._free_slots.append(slot)
+            raise
+
+        with self._lock:
+            self._drivers.append(driver)
+            self._slots[id(driver)] = slot
+
+        try:
+            self._prepare(driver)
+        except Exception:
+            self._quit(driver)
+            raise
+        return driver
+
+    def _start_driver(self, slot: int):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+
+        options = webdriver.ChromeOptions()
+        if self.headless:
+            options.add_argument("--headless=new")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--window-size=1280,900")
+        # 每個瀏覽器各自一個設定檔資料夾，Chrome 不允許多個實例共用
+        profile = (self.profile_dir / f"profile_{slot}").resolve()
+        profile.mkdir(parents=True, exist_ok=True)
+        options.add_argument(f"--user-data-dir={profile}")
+
+        driver_path = resolve_driver_path()
+        service = Service(driver_path) if driver_path else Service()
+        print(f"啟動瀏覽器 #{slot}...")
+        return webdriver.Chrome(service=service, options=options)
+
+    def _prepare(self, driver):
+        """載入已存的 cookies；需要時執行登入並保存 cookies"""
+        driver.get(self.home_url)
+        wait_for_page(driver, self.wait_timeout)
+        if self.cookie_file.exists():
+            try:
+                with open(self.cookie_file, "r", encoding="utf-8") as f:
+                    for cookie in json.load(f):
+                        cookie.pop("sameSite", None)
+                        driver.add_cookie(cookie)
+                driver.refresh()
+                wait_for_page(driver, self.wait_timeout)
+            except Exception as e:
+                print(f"載入 cookies 失敗：{e}")
+        if self.login is not None and self.login(driver):
+            self.save_cookies(driver)
+
+    def _quit(self, driver):
+        with self._lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+            slot = self._slots.pop(id(driver), None)
+            if slot is not None:
+                self._free_slots.append(slot)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+
+def main():
+    """手動登入一次並保存登入狀態：python plugins/browser_pool.py [設定檔資料夾]"""
+    import sys
+
+    profile_dir = sys.argv[1] if len(sys.argv) > 1 else "./cache/browser_profiles"
+    try:
+        with BrowserPool(size=1, headless=False, profile_dir=profile_dir) as pool:
+            with pool.session() as driver:
+                driver.get(f"{SHOPEE_HOME}/web/login")
+                input("請在瀏覽器中登入蝦皮賣家中心，完成後按 Enter...")
+                pool.save_cookies(driver)
+                print(f"登入狀態已保存到 {pool.profile_dir}")
+    except ImportError:
+        print("請先安裝 Selenium: pip install selenium")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+蝦皮 Open API 用戶端
+
+所有請求共用一個連線池，送出前先經過令牌桶限速；遇到連線錯誤、
+逾時、429 或 5xx 時以加上隨機抖動的指數退避重試，並遵守伺服器回傳的
+Retry-After。建立與更新商品的請求帶有由請求識別與內容雜湊產生的 Idempotency-Key，
+重試時不會重複建立同一個商品；識別不同（例如重新上架）的相同內容則視為新的請求。
+"""
+
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Callable, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.metrics import METRICS
+from utils.rate_limiter import TokenBucket, backoff_delay, parse_retry_after
+
+
+DEFAULT_API_BASE = "https://partner.shopee.tw"
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+LATENCY_SAMPLES = 1000
+
+
+class ApiMetrics:
+    """記錄請求數、重試、狀態碼與延遲"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._endpoints: Dict[str, Dict] = {}
+
+    def record(self, endpoint: str, status, latency: float, retried: bool, throttled: float):
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, {
+                "requests": 0, "retries": 0, "throttled_seconds": 0.0,
+                "status": {}, "latencies": deque(maxlen=LATENCY_SAMPLES),
+            })
+            stats["requests"] += 1
+            stats["retries"] += int(retried)
+            stats["throttled_seconds"] += throttled
+            stats["status"][str(status)] = stats["status"].get(str(status), 0) + 1
+            stats["latencies"].append(latency)
+        # 同時寫入全程式共用的效能指標
+        METRICS.stage("shopee_api", latency, endpoint=endpoint)
+        METRICS.inc("shrimp_shopee_requests_total", endpoint=endpoint, status=status)
+        if throttled:
+            METRICS.stage("shopee_throttle", throttled)
+
+    def summary(self) -> Dict:
+        """返回各端點的統計；延遲單位為毫秒，取最近的樣本計算"""
+        with self._lock:
+            elapsed = time.perf_counter() - self._started
+            result = {}
+            for endpoint, stats in self._endpoints.items():
+                latencies = sorted(stats["latencies"])
+                result[endpoint] = {
+                    "requests": stats["requests"],
+                    "retries": stats["retries"],
+                    "status": dict(stats["status"]),
+                    "throttled_seconds": round(stats["throttled_seconds"], 3),
+                    "requests_per_second": round(stats["requests"] / elapsed, 2) if elapsed else 0,
+                    "latency_ms": {
+                        "avg": round(sum(latencies) / len(latencies) * 1000, 1),
+                        "p50": round(_percentile(latencies, 50) * 1000, 1),
+                        "p95": round(_percentile(latencies, 95) * 1000, 1),
+                        "max": round(latencies[-1] * 1000, 1),
+                    } if latencies else {},
+                }
+            return result
+
+
+def _percentile(sorted_values, percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(percent / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def idempotency_key(payload: Dict, request_id: str) -> str:
+    """以請求識別加上內容雜湊產生冪等鍵：只有同一個請求（同一識別、同一內容）的重送會得到相同的鍵"""
+    canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{request_id}\n{canonical}".encode("utf-8")).hexdigest()
+
+
+class ShopeeApiClient:
+    def __init__(self, api_key: str, shop_id: str, api_base: str = DEFAULT_API_BASE,
+                 rate_limit: float = 10, burst: Optional[float] = None, pool_size: int = 16,
+                 max_retries: int = 3, retry_backoff: float = 0.5, max_backoff: float = 30,
+                 timeout: float = 30):
+        self.api_key = api_key
+        self.shop_id = shop_id
+        self.api_base = (api_base or DEFAULT_API_BASE).rstrip("/")
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.limiter = TokenBucket(rate_limit, burst) if rate_limit else None
+        self.metrics = ApiMetrics()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def create_item(self, payload: Dict, request_id: Optional[str] = None) -> Dict:
+        """建立商品；重試時沿用同一個冪等鍵。request_id 為上層任務的識別（例如任務佇列的 ID），
+        任務重跑時沿用；未指定時每次呼叫都是新的請求"""
+        key = idempotency_key(payload, request_id or uuid.uuid4().hex)
+        return self.post_json("/api/v2/product/create_item", payload, key)
+
+    def update_item(self, payload: Dict, request_id: Optional[str] = None) -> Dict:
+        """更新已上架商品的部分欄位；request_id 同 create_item"""
+        key = idempotency_key(payload, request_id or uuid.uuid4().hex)
+        return self.post_json("/api/v2/product/update_item", payload, key)
+
+    def upload_image(self, filename: str, image_data: bytes) -> str:
+        """上傳圖片並返回蝦皮圖片 ID"""
+        files = {"image": (filename, image_data, "image/jpeg")}
+        result = self._check(self.request("POST", "/api/v2/media_space/upload_image", files=files).json())
+        return result["response"]["image_info"]["image_id"]
+
+    def post_json(self, path: str, payload: Dict, key: Optional[str] = None) -> Dict:
+        """送出 JSON 請求並返回回應內容；API 回報錯誤時拋出 RuntimeError"""
+        headers = {"Idempotency-Key": key} if key else {}
+        return self._check(self.request("POST", path, json=payload, headers=headers).json())
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """限速並重試的請求；重試用盡時拋出最後一次的錯誤"""
+        url = f"{self.api_base}{path}"
+        kwargs["headers"] = {"Authorization": f"Bearer {self.api_key}", **(kwargs.get("headers") or {})}
+        kwargs.setdefault("timeout", self.timeout)
+        return self.with_retry(path, lambda: self.session.request(method, url, **kwargs))
+
+    def with_retry(self, endpoint: str, send: Callable[[], requests.Response],
+                   throttle: bool = True) -> requests.Response:
+        """以限速與重試執行 send()，並記錄到 endpoint 的統計；不是送往蝦皮的請求設 throttle=False"""
+        for attempt in range(self.max_retries + 1):
+            throttled = self._throttle() if throttle else 0.0
+            start = time.perf_counter()
+            retry_after = None
+            try:
+                response = send()
+                status = response.status_code
+                if status not in RETRYABLE_STATUS:
+                    self.metrics.record(endpoint, status, time.perf_counter() - start, attempt > 0, throttled)
+                    response.raise_for_status()
+                    return response
+                error = requests.HTTPError(f"HTTP {status}", response=response)
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            except (requests.ConnectionError, requests.Timeout) as e:
+                status = type(e).__name__
+                error = e
+            self.metrics.record(endpoint, status, time.perf_counter() - start, attempt > 0, throttled)
+
+            if attempt < self.max_retries:
+                time.sleep(self._backoff(attempt, retry_after))
+
+        raise error
+
+    def _throttle(self) -> float:
+        if self.limiter is None:
+            return 0.0
+        start = time.perf_counter()
+        self.limiter.acquire()
+        return time.perf_counter() - start
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        return backoff_delay(attempt, self.retry_backoff, self.max_backoff, retry_after)
+
+    def _check(self, result: Dict) -> Dict:
+        if result.get("error"):
+            raise RuntimeError(result.get("message") or result["error"])
+        return result
+
+    def close(self):
+        self.session.close()
+
+
+def main():
+    """測試用"""
+    client = ShopeeApiClient(api_key="test_api_key", shop_id="test_shop_id", api_base="http://127.0.0.1:8766")
+    try:
+        print(client.create_item({"shop_id": "test_shop_id", "item_name": "測試商品", "price": "100"}))
+    except Exception as e:
+        print(f"請求失敗：{e}")
+    print(json.dumps(client.metrics.summary(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,29 +2,51 @@
 # -*- coding: utf-8 -*-
 """
 蝦皮上架資料生成器
+
+設定 copywriter（plugins/ai_copywriter.py）時，標題與描述由 AI 撰寫，
+AI 未返回內容時仍以商品名稱與描述產生。
+設定 category_index（utils/category_index.py）時，分類對應到蝦皮的末層分類。
+設定 tagger（utils/keyword_tagger.py）時，依關鍵字字典產生標籤與品牌、顏色、尺寸屬性。
 """
 
-from typing import Dict, List
+from typing import Dict, List, Optional
 import json
 
+from core.pricing import PricingEngine
+from utils.metrics import METRICS
+
 
 class ShopeeListingGenerator:
-    def __init__(self, pricing_rules: List[str] = None, ai_config: Dict = None):
+    def __init__(self, pricing_rules: List[str] = None, ai_config: Dict = None, pricing_config: Dict = None,
+                 copywriter=None, category_index=None, tagger=None):
         self.pricing_rules = pricing_rules or []
         self.ai_config = ai_config or {}
-
-    def generate(self, product_info: Dict) -> Dict:
-        """生成蝦皮上架資料"""
+        self.copywriter = copywriter
+        self.category_index = category_index
+        self.tagger = tagger
+        # 定價規則只在這裡解析一次
+        if pricing_config is not None:
+            self.pricing = PricingEngine.from_config(pricing_config)
+        else:
+            self.pricing = PricingEngine(self.pricing_rules)
+        for rule in self.pricing.ignored:
+            print(f"警告：定價規則無法辨識，已略過：{rule}")
+
+    def generate(self, product_info: Dict, copy: Optional[Dict] = None) -> Dict:
+        """生成蝦皮上架資料；copy 為預先取得的 AI 文案（空字典表示不使用 AI）"""
+        if copy is None:
+            copy = self.copywriter.write(product_info) if self.copywriter else {}
+        keywords = self._tag_keywords(product_info)
         listing = {
-            "title": self._generate_title(product_info),
-            "description": self._generate_description(product_info),
+            "title": self._generate_title(product_info, copy.get("title")),
+            "description": copy.get("description") or self._generate_description(product_info),
             "price": self._calculate_price(product_info),
             "category": self._determine_category(product_info),
             "images": product_info.get("images", []),
             "stock": self._estimate_stock(product_info),
-            "attributes": self._extract_attributes(product_info),
+            "attributes": self._extract_attributes(product_info, keywords),
             "shipping": self._get_shipping_settings(),
-            "tags": self._generate_tags(product_info)
+            "tags": self._generate_tags(product_info, keywords)
         }
         
         # 驗證資料完整性
@@ -32,9 +54,14 @@ class ShopeeListingGenerator:
         
         return listing
 
-    def _generate_title(self, product_info: Dict) -> str:
+    def generate_many(self, products: List[Dict]) -> List[Dict]:
+        """生成多個商品的上架資料，AI 文案分批同時請求"""
+        copies = self.copywriter.write_many(products) if self.copywriter else [{}] * len(products)
+        return [self.generate(product, copy) for product, copy in zip(products, copies)]
+
+    def _generate_title(self, product_info: Dict, ai_title: Optional[str] = None) -> str:
         """生成商品標題"""
-        name = product_info.get("name", "").strip()
+        name = (ai_title or product_info.get("name", "")).strip()
         
         if not name:
             return "待填寫商品名稱"
@@ -73,66 +100,58 @@ class ShopeeListingGenerator:
         
         if original_price:
             try:
-                # 移除非數字字元
-                price_num = float("".join(filter(str.isdigit, original_price)))
-                
-                # 套用定價規則
-                if self.pricing_rules:
-                    price_num = self._apply_pricing_rules(price_num)
-                
-                return str(int(price_num))
-            except:
+                return self.pricing.format(self.pricing.price(original_price))
+            except ValueError:
                 pass
         
         return "0"
 
-    def _apply_pricing_rules(self, base_price: float) -> float:
-        """套用定價規則"""
-        # 這裡可以根據具體規則來計算
-        # 例如：加成、折扣等
-        
-        price = base_price
-        
-        for rule in self.pricing_rules:
-            if isinstance(rule, str):
-                if "加成" in rule or "markup" in rule.lower():
-                    try:
-                        percentage = float("".join(filter(str.isdigit, rule)))
-                        price *= (1 + percentage / 100)
-                    except:
-                        pass
-                elif "折扣" in rule or "discount" in rule.lower():
-                    try
-                        percentage = float("".join(filter(str.isdigit, rule)))
-                        price *= (1 - percentage / 100)
-                    except:
-                        pass
-        
-        return max(1, price)  # 確保價格至少為 1
+    def price_many(self, prices: List) -> List[str]:
+        """一次計算整份目錄的售價"""
+        return [self.pricing.format(price) for price in self.pricing.price_many(prices)]
 
     def _determine_category(self, product_info: Dict) -> str:
         """決定商品分類"""
         category = product_info.get("category", "").strip()
         
+        # 有分類索引時依分類文字與商品名稱找出蝦皮的末層分類，返回完整路徑
+        if self.category_index is not None:
+            match = self.category_index.resolve(category, product_info.get("name", ""))
+            METRICS.inc("shrimp_category_resolved_total", method=match["method"] if match else "none")
+            if match:
+                return match["path"]
+        
         if not category:
             category = "未分類"
         
-        # 可以根據商品名稱或描述推測分類
-        # 這裡可以加入 AI 分類邏輯
-        
         return category
 
     def _estimate_stock(self, product_info: Dict) -> str:
         """估計庫存數量"""
         return "99"  # 預設值
 
-    def _extract_attributes(self, product_info: Dict) -> Dict:
+    def _tag_keywords(self, product_info: Dict) -> Optional[Dict[str, List[str]]]:
+        """以關鍵字字典一次掃描名稱與描述；促銷字詞只看名稱"""
+        if self.tagger is None:
+            return None
+        return self.tagger.tag(product_info.get("name", ""), product_info.get("description", ""),
+                               name_only=("promo",))
+
+    def _extract_attributes(self, product_info: Dict, keywords: Optional[Dict] = None) -> Dict:
         """提取商品屬性"""
-        # 根據商品類型提取不同屬性
+        if keywords is None:
+            return {
+                "品牌": "未設定",
+                "顏色": "多色",
+                "尺寸": "未設定"
+            }
+        
+        # 品牌取第一個出現的，顏色與尺寸列出全部
+        brands = keywords.get("brand", [])
         return {
-            "品牌": "未設定",
-            "顏色": "多色",
-            "尺寸": "未設定"
+            "品牌": brands[0] if brands else "未設定",
+            "顏色": "、".join(keywords.get("color", [])) or "多色",
+            "尺寸": "、".join(keywords.get("size", [])) or "未設定"
         }
 
     def _get_shipping_settings(self) -> Dict:
@@ -142,7 +161,7 @@ class ShopeeListingGenerator:
             "logistics": "宅配"  # 宅配
         }
 
-    def _generate_tags(self, product_info: Dict) -> List[str]:
+    def _generate_tags(self, product_info: Dict, keywords: Optional[Dict] = None) -> List[str]:
         """生成標籤"""
         name = product_info.get("name", "").lower()
         category = product_info.get("category", "").lower()
@@ -150,12 +169,16 @@ class ShopeeListingGenerator:
         tags = []
         
         # 從商品名稱提取關鍵字
-        if "優惠" in name:
-            tags.append("優惠")
-        if "限量" in name:
-            tags.append("限量")
-        if "新品" in name:
-            tags.append("新品")
+        if keywords is not None:
+            tags.extend(keywords.get("promo", []))
+            tags.extend(keywords.get("brand", [])[:1])
+        else:
+            if "優惠" in name:
+                tags.append("優惠")
+            if "限量" in name:
+                tags.append("限量")
+            if "新品" in name:
+                tags.append("新品")
         
         # 分類標籤
         if category and category != "未分類":
@@ -4,20 +4,94 @@
 蝦皮上架工具
 """
 
-from typing import Dict
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
 import requests
-import time
+
+from utils.metrics import METRICS
+
+from .browser_pool import BrowserPool, wait_for
+from .shopee_api import DEFAULT_API_BASE, ShopeeApiClient
+
+
+# 未設定分類索引（config 的 category.tree_file）時使用
+DEFAULT_CATEGORY_IDS = {
+    "未分類": "0",
+    "電子產品": "100",
+    "服飾": "200",
+    "居家用品": "300"
+}
+
+
+class ImageIdStore:
+    """以圖片內容雜湊記錄已上傳的蝦皮圖片 ID，跨商品重複使用"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._ids = {}
+        if self.path and self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._ids = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"圖片 ID 記錄損毀，將重新建立：{e}")
+
+    def get(self, content_hash: str) -> Optional[str]:
+        with self._lock:
+            return self._ids.get(content_hash)
+
+    def set(self, content_hash: str, image_id: str):
+        with self._lock:
+            self._ids[content_hash] = image_id
+
+    def flush(self):
+        """將記錄寫回磁碟"""
+        if not self.path:
+            return
+        with self._lock:
+            data = json.dumps(self._ids)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
 
 
 class ShopeeUploader:
-    def __init__(self, shop_url: str, api_key: str, shop_id: str):
+    def __init__(self, shop_url: str, api_key: str, shop_id: str, api_base: str = DEFAULT_API_BASE,
+                 upload_workers: int = 4, max_retries: int = 3, retry_backoff: float = 0.5,
+                 rate_limit: float = 10, image_id_store: Optional[ImageIdStore] = None,
+                 browser_pool: Optional[BrowserPool] = None, browser_wait: float = 15,
+                 category_index=None):
         self.shop_url = shop_url
         self.api_key = api_key
         self.shop_id = shop_id
-        self.session = requests.Session()
+        self.upload_workers = max(1, upload_workers)
+        self.image_ids = image_id_store or ImageIdStore()
+        self.api = ShopeeApiClient(
+            api_key=api_key,
+            shop_id=shop_id,
+            api_base=api_base,
+            rate_limit=rate_limit,
+            pool_size=self.upload_workers * 2,
+            max_retries=max_retries,
+            retry_backoff=retry_backoff
+        )
+        self.session = self.api.session
+        self.browser_pool = browser_pool
+        self.browser_wait = browser_wait
+        self.category_index = category_index
+        self._browser_lock = threading.Lock()
+        self._browsers_warming = False
 
-    def upload(self, listing_data: Dict) -> Dict:
-        """上傳商品到蝦皮"""
+    def upload(self, listing_data: Dict, request_id: Optional[str] = None) -> Dict:
+        """上傳商品到蝦皮；request_id 相同的重送不會重複建立商品"""
         try:
             print("正在上傳到蝦皮...")
             
@@ -26,7 +100,7 @@ class ShopeeUploader:
             # 2. 使用 Selenium 自動化（模擬人工操作）
             
             # 使用 API 方式（推薦）
-            result = self._upload_via_api(listing_data)
+            result = self._upload_via_api(listing_data, request_id)
             
             # 或使用自動化方式（備用）
             # result = self._upload_via_selenium(listing_data)
@@ -37,17 +111,10 @@ class ShopeeUploader:
             print(f"上傳失敗：{e}")
             return {"success": False, "error": str(e)}
 
-    def _upload_via_api(self, listing_data: Dict) -> Dict:
+    def _upload_via_api(self, listing_data: Dict, request_id: Optional[str] = None) -> Dict:
         """透過 Shopee API 上傳"""
         # 注意：這是框架，實際使用需要申請 Shopee Open API 權限
         
-        endpoint = f"https://partner.shopee.tw/api/v2/product/create_item"
-        
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
-        
         # 準備資料
         payload = {
             "shop_id": self.shop_id,
@@ -56,108 +123,146 @@ class ShopeeUploader:
             "original_price": listing_data["price"],
             "price": listing_data["price"],
             "stock": listing_data["stock"],
-            "images": self._upload_images(listing_data["images"]),
+            "images": self._upload_images(listing_data.get("local_images") or listing_data["images"]),
             "category_id": self._get_category_id(listing_data["category"]),
             "logistics": [1],  # 宅配
             "weight": 0.5  # 預設重量
         }
         
         try:
-            response = self.session.post(endpoint, json=payload, headers=headers)
-            response.raise_for_status()
-            
-            result = response.json()
-            
-            if result.get("error") == "":
-                return {
-                    "success": True,
-                    "item_id": result.get("item_id"),
-                    "message": "上傳成功"
-                }
-            else:
-                return {
-                    "success": False,
-                    "error": result.get("message", "未知錯誤")
-                }
-                
+            # 限速、重試與冪等鍵由 ShopeeApiClient 處理
+            result = self.api.create_item(payload, request_id)
+            return {
+                "success": True,
+                "item_id": result.get("item_id"),
+                "message": "上傳成功"
+            }
+        except RuntimeError as e:
+            return {
+                "success": False,
+                "error": str(e) or "未知錯誤"
+            }
         except requests.exceptions.RequestException as e:
             return {
                 "success": False,
                 "error": f"API 請求失敗：{e}"
             }
 
+    def update(self, item_id: str, listing_data: Dict, fields: List[str], request_id: Optional[str] = None) -> Dict:
+        """只更新有變更的欄位；圖片有變更時才重新上傳圖片"""
+        try:
+            print(f"正在更新蝦皮商品 {item_id}：{', '.join(fields)}")
+            payload = {"shop_id": self.shop_id, "item_id": item_id}
+            for field in fields:
+                if field == "title":
+                    payload["item_name"] = listing_data["title"]
+                elif field == "price":
+                    payload["original_price"] = listing_data["price"]
+                    payload["price"] = listing_data["price"]
+                elif field == "images":
+                    payload["images"] = self._upload_images(listing_data.get("local_images") or listing_data["images"])
+                elif field == "category":
+                    payload["category_id"] = self._get_category_id(listing_data["category"])
+                elif field in ("description", "stock"):
+                    payload[field] = listing_data[field]
+            
+            if len(payload) == 2:
+                return {"success": True, "item_id": item_id, "message": "沒有需要更新的欄位"}
+            
+            self.api.update_item(payload, request_id)
+            return {
+                "success": True,
+                "item_id": item_id,
+                "updated": [key for key in payload if key not in ("shop_id", "item_id")],
+                "message": "更新成功"
+            }
+        except (RuntimeError, requests.exceptions.RequestException) as e:
+            return {"success": False, "error": f"更新失敗：{e}"}
+
     def _upload_images(self, image_paths: list) -> list:
-        """上傳圖片到蝦皮圖床"""
+        """並行上傳圖片到蝦皮圖床，依原順序返回圖片 ID"""
         # 先上傳圖片取得蝦皮圖片 ID
-        image_ids = []
+        if not image_paths:
+            return []
         
-        for image_path in image_paths:
+        workers = min(self.upload_workers, len(image_paths))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self._upload_single_image, path) for path in image_paths]
+        
+        image_ids = []
+        for image_path, future in zip(image_paths, futures):
             try:
-                image_id = self._upload_single_image(image_path)
+                image_id = future.result()
                 if image_id:
                     image_ids.append(image_id)
             except Exception as e:
                 print(f"圖片上傳失敗：{image_path} - {e}")
         
+        self.image_ids.flush()
         return image_ids
 
     def _upload_single_image(self, image_path: str) -> str:
-        """上傳單張圖片"""
-        # 這需要實際的 API 實現
-        # 目前返回模擬 ID
-        return f"img_{hash(image_path) % 100000}"
+        """上傳單張圖片；相同內容的圖片已上傳過就直接沿用 ID"""
+        image_data = self._read_image(image_path)
+        content_hash = hashlib.sha256(image_data).hexdigest()
+        
+        image_id = self.image_ids.get(content_hash)
+        METRICS.cache("shopee_image_id", bool(image_id))
+        if image_id:
+            return image_id
+        
+        with METRICS.timer("upload_image"):
+            image_id = self.api.upload_image(Path(str(image_path)).name or "image.jpg", image_data)
+        METRICS.add_bytes("out", "upload", len(image_data))
+        self.image_ids.set(content_hash, image_id)
+        return image_id
+
+    def _read_image(self, image_path: str) -> bytes:
+        """讀取本地圖片，或下載尚未存到本地的圖片網址（暫時性錯誤會退避重試，不佔用蝦皮 API 的限速）"""
+        image_path = str(image_path)
+        if image_path.startswith(("http://", "https://")):
+            response = self.api.with_retry("fetch_image", lambda: self.session.get(image_path, timeout=30),
+                                           throttle=False)
+            return response.content
+        with open(image_path, "rb") as f:
+            return f.read()
 
     def _get_category_id(self, category_name: str) -> str:
-        """取得分類 ID"""
-        # 這需要實際的分類映射
-        # 目前返回預設值
-        category_map = {
-            "未分類": "0",
-            "電子產品": "100",
-            "服飾": "200",
-            "居家用品": "300"
-        }
+        """取得分類 ID；有分類索引時以分類路徑或名稱查詢，找不到時返回 "0"（未分類）"""
+        if self.category_index is not None:
+            match = self.category_index.resolve(category_name)
+            return match["category_id"] if match else "0"
         
-        return category_map.get(category_name, "0")
+        return DEFAULT_CATEGORY_IDS.get(category_name, "0")
 
     def _upload_via_selenium(self, listing_data: Dict) -> Dict:
-        """透過 Selenium 自動化上傳（備用方案）"""
+        """透過 Selenium 自動化上傳（備用方案），瀏覽器由連線池借用"""
         try:
-            from selenium import webdriver
             from selenium.webdriver.common.by import By
             from selenium.webdriver.support.ui import WebDriverWait
-            from selenium.webdriver.support import expected_conditions as EC
             
-            # 設定 Chrome 驅動
-            options = webdriver.ChromeOptions()
-            # options.add_argument("--headless")  # 無頭模式
+            pool = self._get_browser_pool()
             
-            driver = webdriver.Chrome(options=options)
-            
-            try:
-                # 1. 登入蝦皮賣家中心
-                print("正在登入蝦皮賣家中心...")
-                driver.get("https://shopee.tw/web/login")
-                
-                # 這裡需要實際的登入邏輯
-                # 可能需要手動登入或使用帳號密碼
-                
-                time.sleep(5)
-                
-                # 2. 進入上架頁面
+            with pool.session() as driver:
+                # 1. 進入上架頁面（連線池中的瀏覽器已載入登入狀態）
                 print("進入上架頁面...")
                 driver.get("https://shopee.tw/web/seller/products/add")
                 
+                # 未登入時會被導向登入頁
+                if "login" in driver.current_url:
+                    return {
+                        "success": False,
+                        "error": "瀏覽器尚未登入蝦皮賣家中心"
+                    }
+                
                 # 等待頁面載入
-                WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.CLASS_NAME, "shopee-input__input"))
-                )
+                wait_for(driver, (By.CLASS_NAME, "shopee-input__input"), self.browser_wait)
                 
-                # 3. 填寫商品資訊
+                # 2. 填寫商品資訊
                 print("填寫商品資訊...")
                 
                 # 填寫標題
-                title_input = driver.find_element(By.XPATH, "//input[@placeholder='請輸入商品名稱']")
+                title_input = wait_for(driver, (By.XPATH, "//input[@placeholder='請輸入商品名稱']"), self.browser_wait)
                 title_input.clear()
                 title_input.send_keys(listing_data["title"])
                 
@@ -173,25 +278,25 @@ class ShopeeUploader:
                 
                 # 上傳圖片
                 print("上傳圖片...")
-                # 需要實際的圖片上傳邏輯
-                
-                time.sleep(2)
+                local_images = [str(Path(p).resolve()) for p in listing_data.get("local_images") or []]
+                if local_images:
+                    file_input = wait_for(driver, (By.XPATH, "//input[@type='file']"), self.browser_wait)
+                    file_input.send_keys("\n".join(local_images))
                 
-                # 4. 提交
+                # 3. 提交
                 print("提交上架...")
-                submit_button = driver.find_element(By.XPATH, "//button[contains(text(), '發布')]")
+                submit_button = wait_for(driver, (By.XPATH, "//button[contains(text(), '發布')]"),
+                                         self.browser_wait, clickable=True)
                 submit_button.click()
                 
-                time.sleep(3)
+                # 等待離開上架頁面
+                WebDriverWait(driver, self.browser_wait).until(lambda d: "/products/add" not in d.current_url)
                 
                 return {
                     "success": True,
                     "message": "透過自動化上傳成功（需驗證）"
                 }
                 
-            finally:
-                driver.quit()
-                
         except ImportError:
             print("請先安裝 Selenium: pip install selenium")
             return {
@@ -204,6 +309,29 @@ class ShopeeUploader:
                 "error": f"自動化上傳失敗：{e}"
             }
 
+    def _get_browser_pool(self) -> BrowserPool:
+        """第一次使用自動化上傳時才建立連線池，並在背景預先啟動其餘的瀏覽器（只用 API 上傳時不會啟動瀏覽器）"""
+        with self._browser_lock:
+            if self.browser_pool is None:
+                self.browser_pool = BrowserPool(size=self.upload_workers, headless=True)
+            if not self._browsers_warming:
+                self._browsers_warming = True
+                threading.Thread(target=self._warm_browsers, args=(self.browser_pool,),
+                                 name="browser-warm-up", daemon=True).start()
+            return self.browser_pool
+
+    def _warm_browsers(self, pool: BrowserPool):
+        try:
+            pool.warm_up()
+        except Exception as e:
+            print(f"預先啟動瀏覽器失敗：{e}")
+
+    def close(self):
+        """關閉瀏覽器與連線"""
+        if self.browser_pool is not None:
+            self.browser_pool.close()
+        self.api.close()
+
     def test_connection(self) -> bool:
         """測試連線"""
         try:
@@ -1,5 +1,23 @@
 # Utils 模組
-from .image_downloader import ImageDownloader
-from .product_extractor import ProductExtractor
+# 子模組在第一次存取屬性時才載入，import utils.metrics 等輕量模組不會連帶載入 Pillow 與 requests
+from importlib import import_module
 
-__all__ = ["ImageDownloader", "ProductExtractor"]
+_LAZY = {
+    "ImageDownloader": ".image_downloader",
+    "ProductExtractor": ".product_extractor",
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+asyncio 版批次處理
+
+提取、下載、生成、上傳四個階段各有固定數量的 worker 協程，
+階段之間以有界的 asyncio.Queue 串接：下游滿了上游就會等待（back-pressure），
+同時處理中的商品數量有上限。既有的提取、下載等函式是阻塞式的，
+由專用的執行緒池執行，事件迴圈只負責排程，整體吞吐量取決於最慢的階段。
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, TextIO
+
+from .batch_runner import BatchItem, BatchRunner
+
+
+_STOP = object()
+
+
+class AsyncPipeline(BatchRunner):
+    def __init__(self, app, auto_upload: bool = False, extract_workers: int = 4, download_workers: int = 2,
+                 generate_workers: int = 1, upload_workers: int = 2, queue_size: int = 32):
+        super().__init__(app, auto_upload=auto_upload, extract_workers=extract_workers,
+                         download_workers=download_workers, generate_workers=generate_workers,
+                         queue_size=queue_size)
+        self.upload_workers = upload_workers
+
+    def run(self, records: Iterable[Dict], output: TextIO) -> Dict:
+        """在新的事件迴圈中處理所有資料"""
+        return asyncio.run(self.run_async(records, output))
+
+    async def run_async(self, records: Iterable[Dict], output: TextIO) -> Dict:
+        """處理所有資料並將結果寫入 output，返回統計摘要"""
+        stages = [
+            ("extract", self._extract, self.extract_workers),
+            ("download", self._download, self.download_workers),
+            ("generate", self._build_listing, self.generate_workers),
+        ]
+        if self.auto_upload:
+            stages.append(("upload", self._upload_listing, self.upload_workers))
+
+        queues = [asyncio.Queue(self.queue_size) for _ in range(len(stages) + 1)]
+        executor = ThreadPoolExecutor(max_workers=sum(max(1, n) for _, _, n in stages),
+                                      thread_name_prefix="pipeline")
+        start = time.perf_counter()
+        summary = self._new_summary()
+        try:
+            tasks = [asyncio.create_task(self._feed_async(records, queues[0]))]
+            for i, (name, func, workers) in enumerate(stages):
+                tasks.extend(self._start_stage(name, func, workers, queues[i], queues[i + 1], executor))
+
+            results = queues[-1]
+            while True:
+                item = await results.get()
+                if item is _STOP:
+                    break
+                self._report(summary, item, output)
+            await asyncio.gather(*tasks)
+        finally:
+            executor.shutdown(wait=True)
+        return self._finish_summary(summary, start)
+
+    def _start_stage(self, name: str, func: Callable[[BatchItem], None], workers: int,
+                     inbox: asyncio.Queue, outbox: asyncio.Queue, executor: ThreadPoolExecutor):
+        workers = max(1, workers)
+        alive = [workers]
+
+        async def worker():
+            loop = asyncio.get_running_loop()
+            while True:
+                item = await inbox.get()
+                if item is _STOP:
+                    # 放回去讓同階段的其他 worker 也能收到
+                    inbox.put_nowait(_STOP)
+                    break
+                if item.error is None:
+                    begin = time.perf_counter()
+                    try:
+                        await loop.run_in_executor(executor, func, item)
+                    except Exception as e:
+                        item.error = f"{name}: {e}"
+                    item.timings[name] = time.perf_counter() - begin
+                await outbox.put(item)
+
+            alive[0] -= 1
+            if alive[0] == 0:
+                await outbox.put(_STOP)
+
+        return [asyncio.create_task(worker()) for _ in range(workers)]
+
+    async def _feed_async(self, records: Iterable[Dict], queue: asyncio.Queue):
+        """逐筆送入第一個階段；佇列滿時等待"""
+        index = 0
+        try:
+            for index, record in enumerate(records, 1):
+                await queue.put(BatchItem(index, record["source"], record.get("product"), record.get("error"),
+                                          record.get("key", record["source"])))
+        except Exception as e:
+            await queue.put(BatchItem(index + 1, "(輸入檔)", error=f"讀取失敗：{e}"))
+        finally:
+            await queue.put(_STOP)
+
+    def _build_listing(self, item: BatchItem):
+        item.listing = self._generate_listing(item)
+        item.listing["local_images"] = item.images
+
+    def _upload_listing(self, item: BatchItem):
+        item.upload = self.app.upload_to_shopee(item.listing)
+        if not item.upload.get("success"):
+            raise RuntimeError(item.upload.get("error") or "上傳失敗")
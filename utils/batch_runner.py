@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批次處理工具
+
+提取、下載、生成（含上傳）分為三個階段，各有自己的執行緒數，
+階段之間以有界佇列串接：前一階段處理完一筆就交給下一階段，
+下游來不及處理時上游會被擋住，記憶體用量不隨目錄大小增加。
+啟用 AI 文案時，下載前就先送出請求，多個商品併成一批與下載同時進行。
+結果依完成順序逐筆寫入 JSONL。
+"""
+
+import json
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, TextIO
+
+from .metrics import ITEMS_TOTAL, METRICS
+
+
+_STOP = object()
+
+
+class BatchItem:
+    """一筆批次資料在各階段之間傳遞的狀態"""
+
+    __slots__ = ("index", "source", "product", "copy", "images", "listing", "upload", "error", "timings",
+                 "status", "changes", "previous", "key")
+
+    def __init__(self, index: int, source: str, product: Optional[Dict] = None, error: Optional[str] = None,
+                 key: Optional[str] = None):
+        self.index = index
+        self.source = source
+        self.key = key          # 增量同步用：商品識別（網址或 SKU），見 catalog_reader
+        self.product = product
+        self.copy = None        # AI 文案的 Future（未啟用 AI 時為 None）
+        self.images = []
+        self.listing = None
+        self.upload = None
+        self.error = error
+        self.timings = {}
+        self.status = None      # 增量同步用：new / changed / unchanged
+        self.changes = None     # 增量同步用：與上次相比變更的欄位
+        self.previous = None    # 增量同步用：上次的記錄
+
+    def to_dict(self) -> Dict:
+        return {
+            "index": self.index,
+            "source": self.source,
+            "status": "error" if self.error else (self.status or "ok"),
+            "error": self.error,
+            "title": (self.listing or {}).get("title"),
+            "price": (self.listing or {}).get("price"),
+            "images": self.images,
+            "listing": self.listing,
+            "upload": self.upload,
+            "changes": self.changes,
+            "timings": {stage: round(seconds, 3) for stage, seconds in self.timings.items()},
+        }
+
+
+class _Stage:
+    """以固定數量的執行緒處理佇列中的資料"""
+
+    def __init__(self, name: str, func: Callable[[BatchItem], None], workers: int,
+                 inbox: queue.Queue, outbox: queue.Queue):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.inbox = inbox
+        self.outbox = outbox
+        self._alive = self.workers
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"batch-{self.name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _run(self):
+        while True:
+            item = self.inbox.get()
+            if item is _STOP:
+                # 放回去讓同階段的其他執行緒也能收到
+                self.inbox.put(_STOP)
+                break
+            if item.error is None:
+                start = time.perf_counter()
+                try:
+                    self.func(item)
+                except Exception as e:
+                    item.error = f"{self.name}: {e}"
+                item.timings[self.name] = time.perf_counter() - start
+            self.outbox.put(item)
+
+        with self._lock:
+            self._alive -= 1
+            last = self._alive == 0
+        if last:
+            self.outbox.put(_STOP)
+
+
+class BatchRunner:
+    def __init__(self, app, auto_upload: bool = False, extract_workers: int = 4,
+                 download_workers: int = 2, generate_workers: int = 1, queue_size: int = 32):
+        self.app = app
+        self.auto_upload = auto_upload
+        self.extract_workers = extract_workers
+        self.download_workers = download_workers
+        self.generate_workers = generate_workers
+        self.queue_size = queue_size
+
+    def run(self, records: Iterable[Dict], output: TextIO) -> Dict:
+        """處理所有資料並將結果寫入 output，返回統計摘要"""
+        extract_queue = queue.Queue(self.queue_size)
+        download_queue = queue.Queue(self.queue_size)
+        generate_queue = queue.Queue(self.queue_size)
+        result_queue = queue.Queue(self.queue_size)
+
+        stages = [
+            _Stage("extract", self._extract, self.extract_workers, extract_queue, download_queue),
+            _Stage("download", self._download, self.download_workers, download_queue, generate_queue),
+            _Stage("generate", self._generate, self.generate_workers, generate_queue, result_queue),
+        ]
+        for stage in stages:
+            stage.start()
+
+        start = time.perf_counter()
+        feeder = threading.Thread(target=self._feed, args=(records, extract_queue), name="batch-feed", daemon=True)
+        feeder.start()
+
+        summary = self._new_summary()
+        while True:
+            item = result_queue.get()
+            if item is _STOP:
+                break
+            self._report(summary, item, output)
+
+        feeder.join()
+        return self._finish_summary(summary, start)
+
+    def _new_summary(self) -> Dict:
+        return {"total": 0, "succeeded": 0, "failed": 0, "statuses": {}, "failures": [], "stage_seconds": {}}
+
+    def _report(self, summary: Dict, item: BatchItem, output: TextIO):
+        """寫入一筆結果並累計統計"""
+        result = item.to_dict()
+        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+        output.flush()
+
+        METRICS.inc(ITEMS_TOTAL, status=result["status"])
+        summary["total"] += 1
+        summary["statuses"][result["status"]] = summary["statuses"].get(result["status"], 0) + 1
+        if item.error:
+            summary["failed"] += 1
+            summary["failures"].append({"index": item.index, "source": item.source, "error": item.error})
+            print(f"❌ [{item.index}] {item.source} - {item.error}")
+        else:
+            summary["succeeded"] += 1
+            label = f"（{item.status}）" if item.status else ""
+            print(f"✅ [{item.index}]{label} {result['title']}")
+        for stage, seconds in item.timings.items():
+            summary["stage_seconds"][stage] = summary["stage_seconds"].get(stage, 0) + seconds
+
+    def _finish_summary(self, summary: Dict, start: float) -> Dict:
+        elapsed = time.perf_counter() - start
+        summary["elapsed_seconds"] = round(elapsed, 3)
+        summary["items_per_second"] = round(summary["total"] / elapsed, 2) if elapsed else 0
+        summary["stage_seconds"] = {k: round(v, 3) for k, v in summary["stage_seconds"].items()}
+        return summary
+
+    def _feed(self, records: Iterable[Dict], extract_queue: queue.Queue):
+        """逐筆讀取輸入；佇列滿時會等待，避免一次讀入整個目錄"""
+        index = 0
+        try:
+            for index, record in enumerate(records, 1):
+                extract_queue.put(BatchItem(index, record["source"], record.get("product"), record.get("error"),
+                                            record.get("key", record["source"])))
+        except Exception as e:
+            extract_queue.put(BatchItem(index + 1, "(輸入檔)", error=f"讀取失敗：{e}"))
+        finally:
+            extract_queue.put(_STOP)
+
+    def _extract(self, item: BatchItem):
+        if item.product is not None:
+            item.product = self.app.normalize_product_info(item.product)
+        else:
+            item.product = self.app.extract_product_info(item.source)
+        if not item.product.get("name") and not item.product.get("images"):
+            raise ValueError("無法提取商品資訊")
+
+    def _prefetch_copy(self, item: BatchItem):
+        """下載圖片前先送出 AI 文案請求，與其他商品併成同一批，生成階段再取結果"""
+        if item.copy is None:
+            item.copy = self.app.prefetch_copy(item.product)
+
+    def _download(self, item: BatchItem):
+        self._prefetch_copy(item)
+        item.images = self.app.download_images(item.product.get("images", []))
+
+    def _generate_listing(self, item: BatchItem) -> Dict:
+        copy = item.copy.result() if item.copy is not None else None
+        return self.app.generate_listing(item.product, copy)
+
+    def _generate(self, item: BatchItem):
+        item.listing = self._generate_listing(item)
+        item.listing["local_images"] = item.images
+        if self.auto_upload:
+            item.upload = self.app.upload_to_shopee(item.listing)
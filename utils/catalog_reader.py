@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批次來源讀取工具
+
+逐行讀取批次輸入檔，不會一次載入整個檔案（CSV、TSV、XLSX 由 table_reader 逐列讀取）。每筆資料為：
+- {"source": 網址或檔案路徑}：交給 ProductExtractor 提取
+- {"source": 識別, "product": 商品欄位, "key": 商品識別}：檔案本身已含商品資料，直接使用
+
+key 供增量同步比對上次的記錄：有網址時為網址，否則為 SKU 等編號欄位（"sku:值"）；
+兩者都沒有時為 None。檔名與列號會隨檔案改名或插入列而改變，不能當作商品識別。
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from .table_reader import TABLE_SUFFIXES, iter_rows, to_product
+
+
+SOURCE_KEYS = ("source", "url", "source_url", "網址", "來源")
+
+# 可穩定識別商品的編號欄位（不分大小寫），依序取第一個有值的
+ID_KEYS = ("sku", "product_id", "item_id", "id", "商品編號", "商品貨號", "貨號", "料號", "編號")
+
+
+def iter_catalog(file_path: str) -> Iterator[Dict]:
+    """依副檔名讀取網址清單、JSONL 或表格（CSV、TSV、XLSX）"""
+    file_path = Path(file_path)
+    suffix = file_path.suffix.lower()
+
+    if suffix == ".jsonl":
+        yield from _iter_jsonl(file_path)
+    elif suffix in TABLE_SUFFIXES:
+        yield from _iter_table(file_path)
+    else:
+        yield from _iter_lines(file_path)
+
+
+def _iter_lines(file_path: Path) -> Iterator[Dict]:
+    """每行一個網址或檔案路徑，# 開頭為註解"""
+    with open(file_path, "r", encoding="utf-8-sig") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield {"source": line}
+
+
+def _iter_jsonl(file_path: Path) -> Iterator[Dict]:
+    """每行一個 JSON：字串或只有來源欄位的物件為來源，否則為商品資料"""
+    with open(file_path, "r", encoding="utf-8-sig") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError as e:
+                yield {"source": f"{file_path.name}:{line_no}", "error": f"JSON 格式錯誤：{e}"}
+                continue
+            yield _to_record(data, f"{file_path.name}:{line_no}")
+
+
+def _iter_table(file_path: Path) -> Iterator[Dict]:
+    """第一列為標題；只有來源欄位時為網址清單，否則每列為一筆商品資料，標題依 FIELD_MAPPING 對應"""
+    for row_no, row in iter_rows(file_path):
+        record = _to_record(row, f"{file_path.name}:{row_no}")
+        if "product" in record:
+            record["product"] = to_product({k: v for k, v in row.items() if k not in SOURCE_KEYS})
+        yield record
+
+
+def _to_record(data, location: str) -> Dict:
+    """將一筆輸入轉為來源或商品資料"""
+    if isinstance(data, str):
+        return {"source": data}
+    if not isinstance(data, dict):
+        return {"source": location, "error": "不支援的資料格式"}
+    source = next((data[key] for key in SOURCE_KEYS if data.get(key)), None)
+    has_fields = any(value for key, value in data.items() if key not in SOURCE_KEYS)
+    if source and not has_fields:
+        return {"source": source}
+    return {"source": source or location, "product": data, "key": source or _product_id(data)}
+
+
+def _product_id(data: Dict) -> Optional[str]:
+    """SKU 等編號欄位的值，沒有時返回 None"""
+    values = {str(key).strip().lower(): value for key, value in data.items() if value not in (None, "")}
+    value = next((values[key] for key in ID_KEYS if key in values), None)
+    return None if value is None else f"sku:{str(value).strip()}"
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+蝦皮分類索引
+
+從本機的分類樹檔案（蝦皮 v2.product.get_category 的回應格式）建立索引，
+依分類文字與商品名稱找出最符合的末層分類：
+1. 精確比對：分類 ID、完整路徑或路徑結尾（「上衣 > T恤」）、末層分類名稱
+2. 同義詞：data/category_synonyms.json 中的別名（「充電寶」→ 行動電源）
+3. 包含比對：文字中包含的最長末層名稱或同義詞（每個長度一次字典查詢）
+4. 詞元比對：中文以相鄰兩字、英數以整個單字為詞元，依 IDF 加權計算
+   末層名稱（含同義詞）被涵蓋的比例，上層分類名稱作為輔助
+
+分類文字是非末層分類時（「居家生活」），只在它底下的末層分類中比對。
+索引以 pickle 存在快取資料夾，分類樹檔案未變更時直接載入；
+相同的 (分類文字, 商品名稱) 只計算一次，大量商品的目錄大多只需查字典。
+"""
+
+import json
+import math
+import os
+import pickle
+import re
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+INDEX_VERSION = 2
+PATH_SEPARATOR = " > "
+# 上層分類名稱在分數中的比重
+CONTEXT_WEIGHT = 0.25
+# 分類文字的詞元比商品名稱重要
+CATEGORY_TEXT_WEIGHT = 1.0
+NAME_TEXT_WEIGHT = 0.7
+
+_SEPARATORS = re.compile(r"\s*(?:>|/|»|›|\\)\s*")
+_TOKEN_RUN = re.compile(r"[a-z0-9]+|[^\W\da-z_]+")
+_STRIP = re.compile(r"[\s\W_]+")
+
+
+def normalize(text: str) -> str:
+    """全形轉半形、小寫、去除空白與標點"""
+    return _STRIP.sub("", unicodedata.normalize("NFKC", str(text)).lower())
+
+
+def path_key(text: str) -> str:
+    """路徑的比對鍵：各層標準化後以 > 連接"""
+    return ">".join(normalize(part) for part in _SEPARATORS.split(str(text)) if normalize(part))
+
+
+def tokenize(text: str) -> List[str]:
+    """英數字取整個單字，其他文字（中文）取相鄰兩字；只有一個字時取單字"""
+    tokens = []
+    for run in _TOKEN_RUN.findall(unicodedata.normalize("NFKC", str(text)).lower()):
+        if run[0].isascii():
+            tokens.append(run)
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def load_tree(tree_file) -> List[Dict]:
+    """讀取分類樹；接受 get_category 的完整回應、其中的 category_list 或分類清單"""
+    with open(tree_file, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = (data.get("response") or data).get("category_list", [])
+    return data
+
+
+class CategoryIndex:
+    def __init__(self, data: Dict, cache_size: int = 65536):
+        self._ids: List[str] = data["ids"]
+        self._paths: List[str] = data["paths"]
+        self._exact: Dict[str, Tuple[int, ...]] = data["exact"]
+        self._subtrees: Dict[str, Tuple[Tuple[int, int], ...]] = data["subtrees"]
+        self._synonyms: Dict[str, int] = data["synonyms"]
+        self._terms: Dict[str, Tuple[int, ...]] = data["terms"]
+        self._term_lengths: Tuple[int, ...] = data["term_lengths"]
+        self._doc_leaf: List[int] = data["doc_leaf"]
+        self._doc_weight: List[float] = data["doc_weight"]
+        self._doc_postings: Dict[str, Tuple[int, ...]] = data["doc_postings"]
+        self._context_weight: List[float] = data["context_weight"]
+        self._context_postings: Dict[str, Tuple[int, ...]] = data["context_postings"]
+        self._idf: Dict[str, float] = data["idf"]
+        self.min_score = data.get("min_score", 0.5)
+        self._resolve = lru_cache(maxsize=cache_size)(self._resolve_uncached)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @classmethod
+    def build(cls, categories: List[Dict], synonyms: Optional[Dict[str, str]] = None,
+              min_score: float = 0.5) -> "CategoryIndex":
+        """由分類清單建立索引；末層分類依樹狀順序編號，同一個上層分類的末層分類編號連續"""
+        children = defaultdict(list)
+        nodes = {}
+        for category in categories:
+            category_id = str(category["category_id"])
+            nodes[category_id] = category
+            children[str(category.get("parent_category_id") or 0)].append(category_id)
+
+        ids, paths, leaf_parts = [], [], []
+        subtrees = defaultdict(list)
+
+        def walk(category_id: str, parents: List[str]):
+            name = nodes[category_id].get("display_category_name") or nodes[category_id].get("original_category_name", "")
+            parts = parents + [name]
+            start = len(ids)
+            if children.get(category_id):
+                for child in children[category_id]:
+                    walk(child, parts)
+                # 同名的上層分類（女生／男生衣著的「上衣」）合併為多個範圍
+                for key in {path_key(PATH_SEPARATOR.join(parts)), normalize(name)}:
+                    subtrees[key].append((start, len(ids)))
+            else:
+                ids.append(category_id)
+                paths.append(PATH_SEPARATOR.join(parts))
+                leaf_parts.append(parts)
+
+        for root in children.get("0", []):
+            walk(root, [])
+
+        exact = defaultdict(list)
+        for leaf, parts in enumerate(leaf_parts):
+            exact[ids[leaf]].append(leaf)
+            # 完整路徑與各長度的路徑結尾
+            for start in range(len(parts) - 1):
+                exact[path_key(PATH_SEPARATOR.join(parts[start:]))].append(leaf)
+            exact[normalize(parts[-1])].append(leaf)
+
+        synonym_leaf = {}
+        for alias, target in (synonyms or {}).items():
+            leaves = exact.get(path_key(target)) or exact.get(str(target))
+            if not leaves:
+                print(f"警告：同義詞 {alias} 的分類不存在：{target}")
+                continue
+            synonym_leaf[normalize(alias)] = leaves[0]
+
+        # 比對文件：每個末層分類的名稱與它的同義詞
+        docs = [(leaf, parts[-1]) for leaf, parts in enumerate(leaf_parts)]
+        docs.extend((leaf, alias) for alias, leaf in synonym_leaf.items())
+        terms = defaultdict(list)
+        for leaf, text in docs:
+            if normalize(text):
+                terms[normalize(text)].append(leaf)
+        doc_tokens = [set(tokenize(text)) for _, text in docs]
+        context_tokens = [set(t for part in parts[:-1] for t in tokenize(part)) for parts in leaf_parts]
+
+        document_count = defaultdict(int)
+        for tokens in doc_tokens + context_tokens:
+            for token in tokens:
+                document_count[token] += 1
+        total = len(doc_tokens) + len(context_tokens)
+        idf = {token: math.log(1 + total / count) for token, count in document_count.items()}
+
+        doc_postings, context_postings = defaultdict(list), defaultdict(list)
+        for doc, tokens in enumerate(doc_tokens):
+            for token in tokens:
+                doc_postings[token].append(doc)
+        for leaf, tokens in enumerate(context_tokens):
+            for token in tokens:
+                context_postings[token].append(leaf)
+
+        return cls({
+            "ids": ids,
+            "paths": paths,
+            "exact": {key: tuple(dict.fromkeys(leaves)) for key, leaves in exact.items() if key},
+            "subtrees": {key: tuple(ranges) for key, ranges in subtrees.items()},
+            "synonyms": synonym_leaf,
+            "terms": {term: tuple(dict.fromkeys(leaves)) for term, leaves in terms.items()},
+            "term_lengths": tuple(sorted({len(term) for term in terms}, reverse=True)),
+            "doc_leaf": [leaf for leaf, _ in docs],
+            "doc_weight": [sum(idf[t] for t in tokens) for tokens in doc_tokens],
+            "doc_postings": {token: tuple(docs) for token, docs in doc_postings.items()},
+            "context_weight": [sum(idf[t] for t in tokens) for tokens in context_tokens],
+            "context_postings": {token: tuple(leaves) for token, leaves in context_postings.items()},
+            "idf": idf,
+            "min_score": min_score,
+        })
+
+    @classmethod
+    def load(cls, tree_file, synonyms_file=None, cache_dir=None, min_score: float = 0.5) -> "CategoryIndex":
+        """載入索引；快取中的索引與分類樹、同義詞檔案相符時直接載入，否則重新建立並存入快取"""
+        sources = [Path(tree_file)] + ([Path(synonyms_file)] if synonyms_file else [])
+        signature = (INDEX_VERSION, min_score, tuple(
+            (str(path.resolve()), path.stat().st_mtime_ns, path.stat().st_size) for path in sources))
+
+        cache_path = Path(cache_dir) / "category_index.pkl" if cache_dir else None
+        if cache_path is not None and cache_path.exists():
+            try:
+                with open(cache_path, "rb") as f:
+                    cached = pickle.load(f)
+                if cached.get("signature") == signature:
+                    return cls(cached["data"])
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError, TypeError):
+                pass
+
+        synonyms = None
+        if synonyms_file:
+            with open(synonyms_file, "r", encoding="utf-8") as f:
+                synonyms = json.load(f)
+        index = cls.build(load_tree(tree_file), synonyms, min_score)
+
+        if cache_path is not None:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as f:
+                pickle.dump({"signature": signature, "data": index._data()}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        return index
+
+    def _data(self) -> Dict:
+        return {
+            "ids": self._ids, "paths": self._paths, "exact": self._exact, "subtrees": self._subtrees,
+            "synonyms": self._synonyms, "terms": self._terms, "term_lengths": self._term_lengths,
+            "doc_leaf": self._doc_leaf, "doc_weight": self._doc_weight,
+            "doc_postings": self._doc_postings, "context_weight": self._context_weight,
+            "context_postings": self._context_postings, "idf": self._idf, "min_score": self.min_score,
+        }
+
+    def resolve(self, category: str = "", name: str = "") -> Optional[Dict]:
+        """返回 {"category_id", "path", "method", "score"}；找不到夠相符的分類時返回 None"""
+        return self._resolve(str(category or "").strip(), str(name or "").strip())
+
+    def cache_info(self):
+        return self._resolve.cache_info()
+
+    def _resolve_uncached(self, category: str, name: str) -> Optional[Dict]:
+        candidates = None
+        leaves = ()
+        if category:
+            key = path_key(category)
+            leaves = self._exact.get(key, ())
+            subtree = [leaf for start, end in self._subtrees.get(key, ()) for leaf in range(start, end)]
+            if len(leaves) == 1 and not subtree:
+                return self._match(leaves[0], "exact", 1.0)
+            if leaves or subtree:
+                # 同名的末層分類（女生／男生衣著的 T恤）或同名的上層分類：以商品名稱與上層分類決定
+                candidates = list(leaves) + subtree
+            elif key in self._synonyms:
+                return self._match(self._synonyms[key], "synonym", 1.0)
+
+        if name and candidates is None:
+            leaf = self._synonyms.get(normalize(name))
+            if leaf is not None:
+                return self._match(leaf, "synonym", 1.0)
+
+        # 文字中包含的最長末層名稱或同義詞（「衣物收納盒」→ 收納盒）
+        found = self._contained(f"{category} {name}", candidates)
+        if len(found) == 1:
+            return self._match(found[0], "contains", 1.0)
+        if found:
+            candidates = found
+
+        leaf, score = self._score(category, name, candidates)
+        if leaf is None and leaves and not found:
+            # 分類文字就是末層名稱，只是有多個同名分類而名稱無法區分：取樹狀順序在前的一個
+            return self._match(leaves[0], "exact", 1.0)
+        # 候選只來自上層分類（或完全沒有限定）時，分數太低就不猜，交給人工確認；
+        # 同名末層分類或名稱中包含的分類本身已相符，取分數最高的即可
+        if leaf is None or (score < self.min_score and (not found and not leaves)):
+            return None
+        return self._match(leaf, "token", round(score, 3))
+
+    def _contained(self, text: str, candidates=None) -> List[int]:
+        """由長到短查詢文字中的每一段，返回最長相符的名稱對應的末層分類"""
+        text = normalize(text)
+        allowed = set(candidates) if candidates is not None else None
+        for length in self._term_lengths:
+            found = []
+            for start in range(len(text) - length + 1):
+                leaves = self._terms.get(text[start:start + length])
+                if leaves:
+                    found.extend(leaf for leaf in leaves if allowed is None or leaf in allowed)
+            if found:
+                return list(dict.fromkeys(found))
+        return []
+
+    def _score(self, category: str, name: str, candidates) -> Tuple[Optional[int], float]:
+        """依詞元計算每個末層分類的分數，返回最高分的分類"""
+        weights = {}
+        for text, weight in ((name, NAME_TEXT_WEIGHT), (category, CATEGORY_TEXT_WEIGHT)):
+            for token in tokenize(text):
+                if token in self._idf:
+                    weights[token] = max(weights.get(token, 0), weight)
+
+        allowed = set(candidates) if candidates is not None else None
+        doc_hits = defaultdict(float)
+        context_hits = defaultdict(float)
+        for token, weight in weights.items():
+            idf = self._idf[token] * weight
+            for doc in self._doc_postings.get(token, ()):
+                doc_hits[doc] += idf
+            for leaf in self._context_postings.get(token, ()):
+                context_hits[leaf] += idf
+
+        # 分數：末層名稱（或同義詞）被涵蓋的比例，加上上層分類名稱的比例；同分時相符的詞較多者優先
+        scores, matched = {}, {}
+        for doc, hit in doc_hits.items():
+            leaf = self._doc_leaf[doc]
+            if allowed is not None and leaf not in allowed:
+                continue
+            coverage = hit / self._doc_weight[doc]
+            if (coverage, hit) > (scores.get(leaf, 0), matched.get(leaf, 0)):
+                scores[leaf], matched[leaf] = coverage, hit
+        for leaf, hit in context_hits.items():
+            if leaf in scores and self._context_weight[leaf]:
+                scores[leaf] += CONTEXT_WEIGHT * hit / self._context_weight[leaf]
+
+        if not scores:
+            return None, 0.0
+        # 仍同分時取編號較小（樹狀順序在前）的分類
+        leaf = min(scores, key=lambda leaf: (-round(scores[leaf], 6), -matched[leaf], leaf))
+        return leaf, scores[leaf]
+
+    def _match(self, leaf: int, method: str, score: float) -> Dict:
+        return {"category_id": self._ids[leaf], "path": self._paths[leaf], "method": method, "score": score}
+
+
+def main():
+    """測試用"""
+    root = Path(__file__).resolve().parent.parent / "data"
+    index = CategoryIndex.load(root / "shopee_categories.json", root / "category_synonyms.json")
+    print(f"共 {len(index)} 個末層分類")
+    for category, name in [
+        ("螢幕保護貼", ""),
+        ("上衣 > T恤", ""),
+        ("充電寶", ""),
+        ("", "iPhone 15 透明防摔手機殼"),
+        ("居家生活", "北歐風 大容量 衣物收納盒"),
+        ("電子產品", "無線藍牙耳機 降噪"),
+        ("", "男生 純棉 圓領 T恤"),
+        ("未分類", "測試商品"),
+        ("居家生活", ""),
+    ]:
+        print(f"{category or '-':<12} {name or '-':<24} → {index.resolve(category, name)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+常駐服務與命令列用戶端
+
+常駐行程只載入一次 Pillow、requests 等模組並保留連線、快取等共用元件，
+命令列用戶端把參數送過去執行，輸出即時傳回，省下每次啟動重新載入的時間。
+以 multiprocessing.connection 在本機連線，並以存在快取資料夾中的金鑰驗證。
+
+同一時間只執行一個指令（輸出重新導向與工作目錄是整個行程共用的），
+其他用戶端會排隊等待。
+"""
+
+import contextlib
+import os
+import secrets
+import sys
+import threading
+import traceback
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+DEFAULT_ADDRESS = ("127.0.0.1", 18765)
+
+
+class DaemonUnavailable(Exception):
+    """找不到常駐服務或驗證失敗"""
+
+
+class _StreamWriter:
+    """將寫入的文字即時送回用戶端（指令中的多個執行緒可能同時輸出）"""
+
+    def __init__(self, conn, kind: str, lock: threading.Lock):
+        self.conn = conn
+        self.kind = kind
+        self.lock = lock
+
+    def write(self, text: str) -> int:
+        if text:
+            with self.lock:
+                with contextlib.suppress(OSError, ValueError):
+                    self.conn.send((self.kind, text))
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self) -> bool:
+        return False
+
+
+def load_authkey(key_file: Path, create: bool = False) -> bytes:
+    """讀取驗證金鑰；create 時產生新的金鑰（僅擁有者可讀）"""
+    key_file = Path(key_file)
+    if create:
+        key_file.parent.mkdir(parents=True, exist_ok=True)
+        key = secrets.token_hex(32)
+        fd = os.open(str(key_file), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(key)
+        return key.encode()
+    try:
+        return key_file.read_text().strip().encode()
+    except OSError:
+        raise DaemonUnavailable(f"找不到常駐服務的金鑰：{key_file}")
+
+
+def serve(handler: Callable[[List[str]], int], key_file: Path,
+          address: Tuple[str, int] = DEFAULT_ADDRESS, on_stop: Optional[Callable[[], None]] = None):
+    """啟動常駐服務，handler(argv) 執行指令並返回結束代碼；收到停止要求後返回"""
+    authkey = load_authkey(key_file, create=True)
+    run_lock = threading.Lock()
+
+    with Listener(address, authkey=authkey) as listener:
+        print(f"公司蝦常駐服務已啟動：{address[0]}:{address[1]}（python main.py daemon --stop 停止）")
+
+        def handle(conn, request):
+            with conn:
+                with contextlib.suppress(EOFError, OSError):
+                    conn.send(("exit", _run(handler, request, conn, run_lock)))
+
+        try:
+            while True:
+                try:
+                    conn = listener.accept()
+                    # 用戶端連上後立即送出要求，逾時的連線直接放棄
+                    request = conn.recv() if conn.poll(5) else None
+                except (OSError, EOFError, AuthenticationError):
+                    # 驗證失敗等連線錯誤只影響該連線
+                    continue
+                if not isinstance(request, dict):
+                    conn.close()
+                    continue
+                if request.get("op") in ("ping", "stop"):
+                    with conn, contextlib.suppress(OSError):
+                        conn.send(("exit", 0))
+                    if request["op"] == "stop":
+                        break
+                    continue
+                threading.Thread(target=handle, args=(conn, request), daemon=True).start()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            with run_lock:
+                if on_stop is not None:
+                    on_stop()
+            with contextlib.suppress(OSError):
+                Path(key_file).unlink()
+    print("常駐服務已停止")
+
+
+def _run(handler: Callable[[List[str]], int], request: dict, conn, run_lock: threading.Lock) -> int:
+    """在用戶端的工作目錄執行指令，輸出送回用戶端"""
+    with run_lock:
+        cwd = os.getcwd()
+        send_lock = threading.Lock()
+        out, err = _StreamWriter(conn, "out", send_lock), _StreamWriter(conn, "err", send_lock)
+        try:
+            os.chdir(request.get("cwd") or cwd)
+            with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+                try:
+                    return handler(list(request.get("argv") or [])) or 0
+                except SystemExit as e:
+                    # argparse 的 --help 與參數錯誤
+                    return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+                except Exception:
+                    traceback.print_exc()
+                    return 1
+        finally:
+            os.chdir(cwd)
+
+
+def _connect(key_file: Path, address: Tuple[str, int]):
+    authkey = load_authkey(key_file)
+    try:
+        return Client(address, authkey=authkey)
+    except (OSError, EOFError) as e:
+        raise DaemonUnavailable(f"無法連線到常駐服務 {address[0]}:{address[1]}：{e}")
+    except AuthenticationError as e:
+        raise DaemonUnavailable(f"常駐服務驗證失敗：{e}")
+
+
+def call(argv: List[str], key_file: Path, address: Tuple[str, int] = DEFAULT_ADDRESS) -> int:
+    """請常駐服務執行指令，輸出即時寫到本行程的 stdout / stderr，返回結束代碼"""
+    conn = _connect(key_file, address)
+    with conn:
+        conn.send({"op": "run", "argv": argv, "cwd": os.getcwd()})
+        while True:
+            try:
+                kind, payload = conn.recv()
+            except EOFError:
+                # 指令可能已執行一部分，不能改為在本機重跑
+                print("常駐服務中斷連線", file=sys.stderr)
+                return 1
+            if kind == "exit":
+                return payload
+            stream = sys.stderr if kind == "err" else sys.stdout
+            stream.write(payload)
+            stream.flush()
+
+
+def control(op: str, key_file: Path, address: Tuple[str, int] = DEFAULT_ADDRESS) -> bool:
+    """送出 ping 或 stop；服務不在時返回 False"""
+    try:
+        conn = _connect(key_file, address)
+    except DaemonUnavailable:
+        return False
+    with conn:
+        conn.send({"op": op})
+        try:
+            conn.recv()
+        except EOFError:
+            return False
+    return True
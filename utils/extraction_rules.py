@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+商品欄位提取規則
+
+meta 標籤先查精確鍵值表，查不到才比對一個預先編譯的正規表示式，
+每個 meta 只需一次字典查詢。同一欄位有多個來源時依優先順序取值
+（數字越小越優先）：JSON-LD > og > twitter > product。
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+PRIORITY_JSONLD = 0
+PRIORITY_OG = 10
+PRIORITY_TWITTER = 20
+PRIORITY_PRODUCT = 30
+
+
+class ExtractionRules:
+    def __init__(self):
+        self._exact: Dict[str, Tuple[str, int]] = {}
+        self._patterns: List[Tuple[str, str, int]] = []
+        self._regex = None
+
+    def add_exact(self, key: str, field: str, priority: int) -> "ExtractionRules":
+        """新增精確比對的 meta 鍵"""
+        self._exact[key.lower()] = (field, priority)
+        return self
+
+    def add_pattern(self, pattern: str, field: str, priority: int) -> "ExtractionRules":
+        """新增以正規表示式比對（完整比對、不分大小寫）的 meta 鍵"""
+        self._patterns.append((pattern, field, priority))
+        self._compile()
+        return self
+
+    def extended(self) -> "ExtractionRules":
+        """複製一份規則供網站專用規則擴充，不影響原本的規則"""
+        rules = ExtractionRules()
+        rules._exact = dict(self._exact)
+        rules._patterns = list(self._patterns)
+        rules._compile()
+        return rules
+
+    def match(self, key: str) -> Optional[Tuple[str, int]]:
+        """返回 meta 鍵對應的 (欄位, 優先順序)，不符合任何規則時返回 None"""
+        key = key.lower()
+        hit = self._exact.get(key)
+        if hit is not None or self._regex is None:
+            return hit
+        m = self._regex.fullmatch(key)
+        if m is None:
+            return None
+        _, field, priority = self._patterns[int(m.lastgroup[1:])]
+        return field, priority
+
+    def _compile(self):
+        """將所有規則合併為單一正規表示式，依加入順序比對"""
+        if not self._patterns:
+            self._regex = None
+            return
+        alternatives = "|".join(f"(?P<p{i}>{pattern})" for i, (pattern, _, _) in enumerate(self._patterns))
+        self._regex = re.compile(alternatives, re.IGNORECASE)
+
+
+class FieldCollector:
+    """依優先順序收集欄位值"""
+
+    def __init__(self):
+        self._values: Dict[str, Tuple[int, object]] = {}
+        self._images: Dict[int, List[str]] = {}
+
+    def offer(self, field: str, value, priority: int):
+        """提供一個候選值；同優先順序時保留先出現的值"""
+        if not value:
+            return
+        if field == "images":
+            images = value if isinstance(value, list) else [value]
+            self._images.setdefault(priority, []).extend(images)
+            return
+        current = self._values.get(field)
+        if current is None or priority < current[0]:
+            self._values[field] = (priority, value)
+
+    def apply(self, info: Dict) -> Dict:
+        """將收集到的值寫入商品資訊；圖片只取最優先來源的那一組"""
+        for field, (_, value) in self._values.items():
+            info[field] = value
+        if self._images:
+            info["images"] = list(self._images[min(self._images)])
+        return info
+
+
+def build_default_rules() -> ExtractionRules:
+    """建立通用的 meta 提取規則"""
+    rules = ExtractionRules()
+    for prefix, priority in (("og", PRIORITY_OG), ("twitter", PRIORITY_TWITTER)):
+        rules.add_exact(f"{prefix}:title", "name", priority)
+        rules.add_exact(f"{prefix}:description", "description", priority)
+        rules.add_exact(f"{prefix}:image", "images", priority)
+    rules.add_exact("product:name", "name", PRIORITY_PRODUCT)
+    rules.add_exact("product:description", "description", PRIORITY_PRODUCT)
+    rules.add_exact("product:price:amount", "price", PRIORITY_PRODUCT)
+
+    # 常見變體；og:image:width 等尺寸描述不是圖片網址，不可比對
+    rules.add_pattern(r"og:image:(?:url|secure_url)", "images", PRIORITY_OG)
+    rules.add_pattern(r"twitter:image(?::src)?(?:\d+)?", "images", PRIORITY_TWITTER)
+    rules.add_pattern(r"(?:og:)?(?:product:)?price:amount", "price", PRIORITY_PRODUCT)
+    return rules
+
+
+DEFAULT_RULES = build_default_rules()
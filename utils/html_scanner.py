@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTML 單次掃描工具
+
+商品頁只需要 meta 標籤、JSON-LD、h1/h2 標題與圖片網址，不需要完整的
+DOM 樹。這裡以事件式解析在一次走訪中收集這些資料，並依安裝的套件
+選擇最快的解析器：selectolax > lxml > 標準函式庫 html.parser；
+也可指定 "bs4" 使用 BeautifulSoup。
+"""
+
+from functools import lru_cache
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+
+
+BACKENDS = ("selectolax", "lxml", "stdlib", "bs4")
+
+
+class PageScan:
+    """一次掃描收集到的頁面資料"""
+
+    __slots__ = ("meta", "jsonld", "headings", "images")
+
+    def __init__(self):
+        self.meta: List[Tuple[str, str]] = []    # (property 或 name, content)
+        self.jsonld: List[str] = []              # application/ld+json 內容
+        self.headings: List[str] = []            # 依文件順序的 h1/h2 文字
+        self.images: List[str] = []              # img 的 src 或 data-src
+
+
+class _ScanBuilder:
+    """接收起始標籤、結束標籤與文字事件並收集資料（亦作為 lxml 的 parser target）"""
+
+    def __init__(self):
+        self.page = PageScan()
+        self._heading_depth = 0
+        self._heading_text = []
+        self._jsonld_text = None
+
+    def start(self, tag: str, attrs: Dict[str, Optional[str]]):
+        if tag == "meta":
+            prop = attrs.get("property") or attrs.get("name")
+            content = attrs.get("content")
+            if prop and content:
+                self.page.meta.append((prop, content))
+        elif tag == "img":
+            src = attrs.get("src") or attrs.get("data-src")
+            if src:
+                self.page.images.append(src)
+        elif tag in ("h1", "h2"):
+            if self._heading_depth == 0:
+                self._heading_text = []
+            self._heading_depth += 1
+        elif tag == "script" and attrs.get("type") == "application/ld+json":
+            self._jsonld_text = []
+
+    def end(self, tag: str):
+        if tag in ("h1", "h2") and self._heading_depth:
+            self._heading_depth -= 1
+            if self._heading_depth == 0:
+                self.page.headings.append("".join(self._heading_text).strip())
+        elif tag == "script" and self._jsonld_text is not None:
+            self.page.jsonld.append("".join(self._jsonld_text))
+            self._jsonld_text = None
+
+    def data(self, text: str):
+        if self._heading_depth:
+            self._heading_text.append(text)
+        elif self._jsonld_text is not None:
+            self._jsonld_text.append(text)
+
+    def close(self) -> PageScan:
+        return self.page
+
+
+class _StdlibParser(HTMLParser):
+    def __init__(self, builder: _ScanBuilder):
+        super().__init__(convert_charrefs=True)
+        self.builder = builder
+
+    def handle_starttag(self, tag, attrs):
+        self.builder.start(tag, dict(attrs))
+
+    def handle_endtag(self, tag):
+        self.builder.end(tag)
+
+    def handle_data(self, data):
+        self.builder.data(data)
+
+
+@lru_cache(maxsize=None)
+def _detect_backends() -> Tuple[str, ...]:
+    """偵測已安裝的解析器"""
+    backends = []
+    for backend in BACKENDS:
+        try:
+            if backend == "selectolax":
+                import selectolax.lexbor  # noqa: F401
+            elif backend == "lxml":
+                import lxml.etree  # noqa: F401
+            elif backend == "bs4":
+                import bs4  # noqa: F401
+            backends.append(backend)
+        except ImportError:
+            pass
+    return tuple(backends)
+
+
+def available_backends() -> List[str]:
+    """列出目前環境可用的解析器"""
+    return list(_detect_backends())
+
+
+def resolve_backend(backend: str = "auto") -> str:
+    """將 auto 解析為可用的最快解析器"""
+    available = _detect_backends()
+    if backend == "auto":
+        return available[0]
+    if backend not in available:
+        raise ValueError(f"解析器不可用：{backend}（可用：{', '.join(available)}）")
+    return backend
+
+
+def scan_html(html: str, backend: str = "auto") -> PageScan:
+    """掃描 HTML 並收集商品相關資料"""
+    backend = resolve_backend(backend)
+
+    if backend == "selectolax":
+        return _scan_selectolax(html)
+    if backend == "bs4":
+        return _scan_bs4(html)
+
+    builder = _ScanBuilder()
+    if backend == "lxml":
+        from lxml import etree
+
+        parser = etree.HTMLParser(target=builder)
+        parser.feed(html)
+        return parser.close()
+
+    parser = _StdlibParser(builder)
+    parser.feed(html)
+    parser.close()
+    return builder.close()
+
+
+def _scan_selectolax(html: str) -> PageScan:
+    """以 selectolax (lexbor) 掃描，CSS 查詢在 C 語言層完成"""
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(html)
+    page = PageScan()
+
+    for node in tree.css("meta"):
+        attrs = node.attributes
+        prop = attrs.get("property") or attrs.get("name")
+        content = attrs.get("content")
+        if prop and content:
+            page.meta.append((prop, content))
+
+    for node in tree.css('script[type="application/ld+json"]'):
+        page.jsonld.append(node.text(deep=True))
+
+    for node in tree.css("h1, h2"):
+        page.headings.append(node.text().strip())
+
+    for node in tree.css("img"):
+        attrs = node.attributes
+        src = attrs.get("src") or attrs.get("data-src")
+        if src:
+            page.images.append(src)
+
+    return page
+
+
+def _scan_bs4(html: str) -> PageScan:
+    """以 BeautifulSoup 掃描（有安裝 lxml 時使用 lxml 建樹）"""
+    from bs4 import BeautifulSoup
+
+    try:
+        import lxml  # noqa: F401
+        features = "lxml"
+    except ImportError:
+        features = "html.parser"
+
+    soup = BeautifulSoup(html, features)
+    page = PageScan()
+
+    for meta in soup.find_all("meta"):
+        prop = meta.get("property") or meta.get("name")
+        content = meta.get("content")
+        if prop and content:
+            page.meta.append((prop, content))
+
+    for script in soup.find_all("script", {"type": "application/ld+json"}):
+        page.jsonld.append(script.string or "")
+
+    for tag in soup.find_all(["h1", "h2"]):
+        page.headings.append(tag.get_text().strip())
+
+    for img in soup.find_all("img"):
+        src = img.get("src") or img.get("data-src")
+        if src:
+            page.images.append(src)
+
+    return page
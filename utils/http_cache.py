@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP 連線與條件式請求快取
+
+記錄每個網址的 ETag / Last-Modified，下次請求時帶上
+If-None-Match / If-Modified-Since；伺服器回應 304 時沿用上次的處理結果
+（解析後的商品資訊、優化後的圖片），不必重新下載完整內容。
+"""
+
+import copy
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+
+def create_session(pool_size: int = 10) -> requests.Session:
+    """建立共用的 HTTP 連線"""
+    session = requests.Session()
+    session.headers.update({"User-Agent": DEFAULT_USER_AGENT})
+    # 連線池需容納所有並行請求，否則多出的連線會被丟棄重建
+    adapter = HTTPAdapter(pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class HttpCache:
+    def __init__(self, cache_file: str = "./cache/http_cache.json"):
+        self.cache_file = Path(cache_file)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._entries = {}
+        self._dirty = False
+        self._load()
+
+    def get(self, session: requests.Session, url: str, use_cache: bool = True,
+            **kwargs) -> Tuple[Optional[requests.Response], Any]:
+        """發出條件式 GET
+
+        內容未變更時返回 (None, 快取結果)，否則返回 (回應, None)，
+        由呼叫端處理完內容後以 store() 存入結果。
+        """
+        request_headers = dict(kwargs.pop("headers", None) or {})
+        headers = dict(request_headers)
+        if use_cache:
+            headers.update(self.conditional_headers(url))
+
+        response = session.get(url, headers=headers, **kwargs)
+
+        if response.status_code == 304:
+            response.close()
+            with self._lock:
+                entry = self._entries.get(url)
+                if entry is not None:
+                    entry["checked_at"] = time.time()
+                    self._dirty = True
+                    return None, copy.deepcopy(entry.get("payload"))
+            # 快取在請求期間被移除，改為完整下載
+            return self.get(session, url, use_cache=False, headers=request_headers, **kwargs)
+
+        response.raise_for_status()
+        return response, None
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """依上次的驗證資訊產生條件式請求標頭"""
+        with self._lock:
+            entry = self._entries.get(url)
+        if not entry:
+            return {}
+
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url: str, response: requests.Response, payload: Any = None):
+        """記錄回應的驗證資訊與處理結果；沒有驗證資訊的回應不快取"""
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+
+        with self._lock:
+            if not etag and not last_modified:
+                if self._entries.pop(url, None) is not None:
+                    self._dirty = True
+                return
+            self._entries[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "payload": copy.deepcopy(payload),
+                "checked_at": time.time(),
+            }
+            self._dirty = True
+
+    def forget(self, url: str):
+        """移除網址的快取"""
+        with self._lock:
+            if self._entries.pop(url, None) is not None:
+                self._dirty = True
+
+    def flush(self):
+        """將快取寫回磁碟"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                data = json.dumps(self._entries, ensure_ascii=False)
+                self._dirty = False
+
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_file.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, self.cache_file)
+
+    def _load(self):
+        """載入快取檔"""
+        if not self.cache_file.exists():
+            return
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"HTTP 快取檔損毀，將重新建立：{e}")
+            self._entries = {}
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+內容定址的圖片快取
+
+優化後的圖片以內容雜湊命名，相同圖片只存一份；索引檔另外記錄
+網址與原始檔雜湊對應到哪一份內容，命中時可同時省去下載與重新壓縮。
+超過容量上限時依最近使用時間淘汰。
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+
+class ImageCache:
+    INDEX_FILE = ".image_index.json"
+
+    def __init__(self, folder: str, max_size_mb: int = 1024, extension: str = ".jpg"):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.folder / self.INDEX_FILE
+        self.max_bytes = max_size_mb * 1024 * 1024
+        self.extension = extension
+        self._lock = threading.RLock()
+        self._urls = {}                 # 網址 -> 內容雜湊
+        self._sources = {}              # 原始檔雜湊 -> 內容雜湊
+        self._entries = OrderedDict()   # 內容雜湊 -> {"file", "size"}，依使用先後排序
+        self._refs = {}                 # 內容雜湊 -> 指向它的 (表名, 鍵)，淘汰時用
+        self._total_bytes = 0
+        self._dirty = False
+        self._load()
+
+    @staticmethod
+    def hash_bytes(data: bytes) -> str:
+        """計算內容雜湊"""
+        return hashlib.sha256(data).hexdigest()
+
+    def lookup_url(self, url: str) -> Optional[Path]:
+        """以網址查詢快取"""
+        with self._lock:
+            return self._touch(self._urls.get(url))
+
+    def lookup_source(self, url: str, source_hash: str) -> Optional[Path]:
+        """以原始檔雜湊查詢快取，命中時一併記錄網址"""
+        with self._lock:
+            path = self._touch(self._sources.get(source_hash))
+            if path:
+                self._link("urls", url, self._sources[source_hash])
+            return path
+
+    def path_for(self, content_hash: str) -> Optional[Path]:
+        """以內容雜湊取得快取檔案"""
+        with self._lock:
+            return self._touch(content_hash)
+
+    def store(self, url: str, source_hash: str, data: bytes) -> Path:
+        """儲存優化後的圖片並返回本地路徑"""
+        content_hash = self.hash_bytes(data)
+        filename = content_hash + self.extension
+        path = self.folder / filename
+
+        with self._lock:
+            exists = content_hash in self._entries and path.exists()
+
+        if not exists:
+            tmp_path = path.with_name(f"{filename}.{threading.get_ident()}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        with self._lock:
+            if content_hash not in self._entries:
+                self._entries[content_hash] = {"file": filename, "size": len(data)}
+                self._total_bytes += len(data)
+            self._entries.move_to_end(content_hash)
+            self._link("urls", url, content_hash)
+            if source_hash:
+                self._link("sources", source_hash, content_hash)
+            self._evict()
+
+        return path
+
+    def flush(self):
+        """將索引寫回磁碟"""
+        with self._lock:
+            if not self._dirty:
+                return
+            index = {
+                "entries": [dict(entry, hash=key) for key, entry in self._entries.items()],
+                "urls": self._urls,
+                "sources": self._sources,
+            }
+            self._dirty = False
+
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    def clear(self):
+        """清空快取"""
+        with self._lock:
+            for entry in self._entries.values():
+                (self.folder / entry["file"]).unlink(missing_ok=True)
+            self._entries.clear()
+            self._urls.clear()
+            self._sources.clear()
+            self._refs.clear()
+            self._total_bytes = 0
+            self._dirty = True
+        self.flush()
+
+    def stats(self) -> dict:
+        """快取使用狀況"""
+        with self._lock:
+            return {
+                "files": len(self._entries),
+                "bytes": self._total_bytes,
+                "urls": len(self._urls),
+            }
+
+    def _touch(self, content_hash: Optional[str]) -> Optional[Path]:
+        """標記為最近使用並返回路徑；檔案已被外部刪除時視為未命中"""
+        if not content_hash or content_hash not in self._entries:
+            return None
+        path = self.folder / self._entries[content_hash]["file"]
+        if not path.exists():
+            self._drop(content_hash)
+            return None
+        self._entries.move_to_end(content_hash)
+        self._dirty = True
+        return path
+
+    def _table(self, name: str) -> dict:
+        return self._urls if name == "urls" else self._sources
+
+    def _link(self, name: str, key: str, content_hash: str):
+        """記錄網址或原始檔雜湊與內容的對應"""
+        table = self._table(name)
+        previous = table.get(key)
+        if previous and previous != content_hash and previous in self._refs:
+            self._refs[previous].discard((name, key))
+        table[key] = content_hash
+        self._refs.setdefault(content_hash, set()).add((name, key))
+        self._dirty = True
+
+    def _evict(self):
+        """超過容量上限時淘汰最久未使用的圖片（保留剛寫入的一張）"""
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            content_hash = next(iter(self._entries))
+            (self.folder / self._entries[content_hash]["file"]).unlink(missing_ok=True)
+            self._drop(content_hash)
+
+    def _drop(self, content_hash: str):
+        """自索引移除一份內容及指向它的網址"""
+        entry = self._entries.pop(content_hash)
+        self._total_bytes -= entry["size"]
+        for name, key in self._refs.pop(content_hash, ()):
+            self._table(name).pop(key, None)
+        self._dirty = True
+
+    def _load(self):
+        """載入索引檔"""
+        if not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"圖片快取索引損毀，將重新建立：{e}")
+            return
+
+        for entry in index.get("entries", []):
+            content_hash = entry.pop("hash")
+            self._entries[content_hash] = entry
+            self._total_bytes += entry["size"]
+        for name in ("urls", "sources"):
+            for key, content_hash in index.get(name, {}).items():
+                if content_hash in self._entries:
+                    self._link(name, key, content_hash)
+        self._dirty = False
+
+
+def main():
+    """測試用"""
+    cache = ImageCache("./downloads")
+    print(cache.stats())
+
+
+if __name__ == "__main__":
+    main()
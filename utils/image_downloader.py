@@ -4,120 +4,240 @@
 圖片下載工具
 """
 
-import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional
 from urllib.parse import urlparse
-import requests
-from PIL import Image
-import io
+from PIL import ImageFile
+
+from .http_cache import HttpCache, create_session
+from .image_cache import ImageCache
+from .image_optimizer import optimize_image_data
+from .image_urls import dedupe_images
+from .metrics import IMAGES_DEDUPED, METRICS
+
+
+CHUNK_SIZE = 64 * 1024
+# 超過這個長度仍無法辨識圖片標頭就不再預讀，交給後續解碼判斷
+HEADER_PEEK_LIMIT = 256 * 1024
+IMAGE_CONTENT_TYPES = ("image/", "application/octet-stream", "binary/octet-stream")
 
 
 class ImageDownloader:
-    def __init__(self, download_folder: str = "./downloads", max_size_kb: int = 1024):
+    def __init__(self, download_folder: str = "./downloads", max_size_kb: int = 1024,
+                 max_workers: int = 4, per_host_limit: int = 2, optimize_workers: int = 0,
+                 cache_max_mb: int = 1024, http_cache: Optional[HttpCache] = None,
+                 max_download_mb: int = 20, max_pixels: int = 40_000_000):
         self.download_folder = Path(download_folder)
-        self.download_folder.mkdir(parents=True, exist_ok=True)
+        self.cache = ImageCache(self.download_folder, max_size_mb=cache_max_mb)
         self.max_size_kb = max_size_kb
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        })
+        self.max_download_bytes = max_download_mb * 1024 * 1024
+        self.max_pixels = max_pixels
+        self.max_workers = max(1, max_workers)
+        self.per_host_limit = max(1, per_host_limit)
+        self.optimize_workers = max(0, optimize_workers)
+        self._fetch_slots = threading.BoundedSemaphore(self.max_workers)
+        self._host_slots = {}
+        self._host_lock = threading.Lock()
+        self._optimize_pool = None
+        self._pool_lock = threading.Lock()
+        self.http_cache = http_cache
+        self.session = create_session(pool_size=self.max_workers)
 
     def download_urls(self, urls: List[str]) -> List[str]:
-        """下載多張圖片並返回本地路徑"""
-        downloaded = []
-        
-        for i, url in enumerate(urls, 1):
-            try:
-                local_path = self.download_image(url, index=i)
-                if local_path:
-                    downloaded.append(str(local_path))
-                    print(f"✅ 已下載：{url[:50]}... -> {local_path}")
-            except Exception as e:
-                print(f"❌ 下載失敗：{url[:50]}... - {e}")
-        
-        return downloaded
+        """下載多張圖片並返回本地路徑；重複的網址與同一張圖的其他尺寸只下載一次"""
+        urls, stats = dedupe_images(urls)
+        if stats["saved"]:
+            METRICS.inc(IMAGES_DEDUPED, stats["saved"], stage="download")
+            print(f"略過 {stats['saved']} 張重複的圖片")
+        results = self.download_many(urls)
+        return [result["path"] for result in results if result["path"]]
+
+    def download_many(self, urls: List[str]) -> List[Dict]:
+        """並行下載多張圖片，依輸入順序返回每個網址的結果"""
+        results = [{"url": url, "path": None, "error": None} for url in urls]
+        if not urls:
+            return results
+
+        # 下載與壓縮分屬兩個階段：等待壓縮結果的執行緒不佔用下載名額，
+        # 因此執行緒數需同時容納兩個階段的並行數
+        workers = min(self.max_workers + self.optimize_workers, len(urls))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(self._download_image, url): i - 1
+                for i, url in enumerate(urls, 1)
+            }
+            for future in as_completed(futures):
+                result = results[futures[future]]
+                url = result["url"]
+                try:
+                    local_path = future.result()
+                    if local_path:
+                        result["path"] = str(local_path)
+                        print(f"✅ 已下載：{url[:50]}... -> {local_path}")
+                except Exception as e:
+                    result["error"] = str(e)
+                    print(f"❌ 下載失敗：{url[:50]}... - {e}")
+
+        self._flush_caches()
+        return results
+
+    def _fetch(self, url: str, revalidate: bool = False):
+        """在並行上限內下載圖片，返回 (回應, 內容)；revalidate 時內容未變更返回 None"""
+        with self._fetch_slots, self._host_slot(url):
+            if self.http_cache is None:
+                response = self.session.get(url, timeout=30, stream=True)
+                response.raise_for_status()
+            else:
+                response, _ = self.http_cache.get(self.session, url, use_cache=revalidate,
+                                                  timeout=30, stream=True)
+            if response is None:
+                return None
+            # 在名額內讀完內容，避免其他執行緒等待時連線仍被佔用
+            return response, self._read_image(response)
+
+    def _read_image(self, response) -> bytes:
+        """分段讀取圖片，類型不符、檔案過大或尺寸過大時提早中止"""
+        try:
+            content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if content_type and not content_type.startswith(IMAGE_CONTENT_TYPES):
+                raise ValueError(f"不是圖片：{content_type}")
+            
+            content_length = response.headers.get("Content-Length", "")
+            if content_length.isdigit() and int(content_length) > self.max_download_bytes:
+                raise ValueError(f"檔案過大：{int(content_length) / 1024 / 1024:.1f} MB")
+            
+            chunks = []
+            total = 0
+            parser = ImageFile.Parser()
+            for chunk in response.iter_content(CHUNK_SIZE):
+                total += len(chunk)
+                if total > self.max_download_bytes:
+                    raise ValueError(f"檔案超過 {self.max_download_bytes // 1024 // 1024} MB")
+                chunks.append(chunk)
+                
+                # 讀到圖片標頭即可得知尺寸，過大的圖片不必下載完
+                if parser is not None:
+                    parser.feed(chunk)
+                    if parser.image is not None:
+                        self._check_dimensions(parser.image.size)
+                        parser = None
+                    elif total > HEADER_PEEK_LIMIT:
+                        parser = None
+            
+            return b"".join(chunks)
+        finally:
+            response.close()
+
+    def _check_dimensions(self, size):
+        """檢查圖片像素數"""
+        width, height = size
+        if width * height > self.max_pixels:
+            raise ValueError(f"圖片尺寸過大：{width}x{height}")
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        """取得主機對應的連線名額"""
+        host = urlparse(url).netloc.lower()
+        with self._host_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_slots[host] = slot
+        return slot
 
     def download_image(self, url: str, index: int = None) -> Path:
         """下載單張圖片"""
-        # 從 URL 推斷檔名
-        parsed = urlparse(url)
-        filename = os.path.basename(parsed.path)
-        
-        if not filename or "." not in filename:
-            filename = f"image_{index or 1}.jpg"
-        
-        # 確保副檔名正確
-        if not filename.lower().endswith((".jpg", ".jpeg", ".png")):
-            filename = filename.rsplit(".", 1)[0] + ".jpg"
+        local_path = self._download_image(url)
+        self._flush_caches()
+        return local_path
+
+    def _download_image(self, url: str) -> Path:
+        """下載單張圖片，快取命中時略過下載或壓縮"""
+        cached = self.cache.lookup_url(url)
+        METRICS.cache("image_url", cached is not None)
         
-        local_path = self.download_folder / filename
+        # 有 HTTP 快取時向伺服器確認圖片是否變更，否則直接沿用
+        revalidate = bool(cached and self.http_cache and self.http_cache.conditional_headers(url))
+        if cached and not revalidate:
+            return cached
         
         # 下載
-        response = self.session.get(url, timeout=30, stream=True)
-        response.raise_for_status()
-        
-        # 優化圖片大小
-        image_data = response.content
-        optimized_image = self.optimize_image(image_data)
+        with METRICS.timer("fetch_image"):
+            fetched = self._fetch(url, revalidate=revalidate)
+        if revalidate:
+            METRICS.cache("image_revalidate", fetched is None)
+        if fetched is None:
+            return cached
+        response, image_data = fetched
+        METRICS.add_bytes("in", "image", len(image_data))
         
-        # 儲存
-        with open(local_path, "wb") as f:
-            f.write(optimized_image)
+        # 相同原始檔（例如不同商品共用的圖片）已壓縮過就直接沿用
+        source_hash = ImageCache.hash_bytes(image_data)
+        local_path = self.cache.lookup_source(url, source_hash)
+        METRICS.cache("image_source", local_path is not None)
+        if not local_path:
+            # 優化圖片大小並存入快取
+            optimized_image = self.optimize_image(image_data)
+            METRICS.add_bytes("out", "image", len(optimized_image))
+            local_path = self.cache.store(url, source_hash, optimized_image)
         
+        if self.http_cache is not None:
+            self.http_cache.store(url, response)
         return local_path
 
+    def _flush_caches(self):
+        """將快取索引寫回磁碟"""
+        self.cache.flush()
+        if self.http_cache is not None:
+            self.http_cache.flush()
+
     def optimize_image(self, image_data: bytes) -> bytes:
-        """優化圖片大小"""
-        try:
-            img = Image.open(io.BytesIO(image_data))
-            
-            # 轉換為 RGB
-            if img.mode in ("RGBA", "P"):
-                img = img.convert("RGB")
-            
-            # 維持比例，限制最大尺寸
-            max_dimension = 1920
-            if max(img.size) > max_dimension:
-                ratio = max_dimension / max(img.size)
-                new_size = (int(img.size[0] * ratio), int(img.size[1] * ratio))
-                img = img.resize(new_size, Image.LANCZOS)
-            
-            # 壓縮
-            output = io.BytesIO()
-            img.save(output, format="JPEG", quality=85, optimize=True)
-            optimized_data = output.getvalue()
-            
-            # 檢查大小
-            size_kb = len(optimized_data) / 1024
-            if size_kb > self.max_size_kb:
-                # 進一步壓縮
-                for quality in [75, 65, 55, 45]:
-                    output = io.BytesIO()
-                    img.save(output, format="JPEG", quality=quality, optimize=True)
-                    optimized_data = output.getvalue()
-                    if len(optimized_data) / 1024 <= self.max_size_kb:
-                        break
-            
-            print(f"圖片優化：{len(image_data) / 1024:.1f} KB -> {len(optimized_data) / 1024:.1f} KB")
-            
-            return optimized_data
-            
-        except Exception as e:
-            print(f"圖片優化失敗：{e}")
-            return image_data
+        """優化圖片大小（設定 optimize_workers 時交由子行程處理）"""
+        pool = self._get_optimize_pool()
+        with METRICS.timer("optimize"):
+            if pool is None:
+                optimized_data, stats = optimize_image_data(image_data, self.max_size_kb)
+            else:
+                optimized_data, stats = pool.submit(optimize_image_data, image_data, self.max_size_kb).result()
+        
+        if "decode_seconds" in stats:
+            METRICS.stage("image_decode", stats["decode_seconds"])
+            METRICS.stage("image_encode", stats["encode_seconds"])
+        METRICS.inc("shrimp_image_encodes_total", stats.get("encodes", 0))
+        return optimized_data
+
+    def _get_optimize_pool(self):
+        """延遲建立圖片優化用的行程池"""
+        if self.optimize_workers <= 0:
+            return None
+        with self._pool_lock:
+            if self._optimize_pool is None:
+                self._optimize_pool = ProcessPoolExecutor(max_workers=self.optimize_workers)
+            return self._optimize_pool
+
+    def close(self):
+        """關閉圖片優化行程池"""
+        with self._pool_lock:
+            if self._optimize_pool is not None:
+                self._optimize_pool.shutdown()
+                self._optimize_pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def clear_downloads(self):
         """清空下載目錄"""
-        for file in self.download_folder.iterdir():
-            if file.is_file():
-                file.unlink()
+        self.cache.clear()
         print(f"已清空下載目錄：{self.download_folder}")
 
 
 def main():
     """測試用"""
-    downloader = ImageDownloader()
+    downloader = ImageDownloader(optimize_workers=2)
     
     test_urls = [
         "https://via.placeholder.com/800x600.png?text=Test+Image+1",
@@ -125,7 +245,8 @@ def main():
     ]
     
     print("開始下載測試圖片...")
-    downloaded = downloader.download_urls(test_urls)
+    with downloader:
+        downloaded = downloader.download_urls(test_urls)
     print(f"\n下載完成：{len(downloaded)} 張圖片")
 
 
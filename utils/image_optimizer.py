@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+圖片優化工具
+
+解碼、縮圖與 JPEG 壓縮都是純 CPU 運算，放在模組層級的函式中，
+讓 ProcessPoolExecutor 可以將其分派到子行程執行。
+"""
+
+import io
+import time
+from typing import Dict, Tuple
+from PIL import Image
+
+
+MAX_DIMENSION = 1920
+MAX_QUALITY = 85
+MIN_QUALITY = 40
+MIN_DIMENSION = 320
+DOWNSCALE_STEP = 0.75
+
+
+def optimize_image_data(image_data: bytes, max_size_kb: int,
+                        max_dimension: int = MAX_DIMENSION) -> Tuple[bytes, Dict]:
+    """優化圖片大小，返回壓縮後的資料與壓縮統計"""
+    try:
+        start = time.perf_counter()
+        img = Image.open(io.BytesIO(image_data))
+
+        # JPEG 可在解碼時直接以 1/2、1/4、1/8 縮小，大圖省下大部分解碼時間與記憶體
+        draft = False
+        if img.format == "JPEG" and max(img.size) > max_dimension:
+            ratio = max_dimension / max(img.size)
+            img.draft("RGB", (int(img.size[0] * ratio), int(img.size[1] * ratio)))
+            draft = True
+
+        # 轉換為 RGB
+        if img.mode in ("RGBA", "P"):
+            img = img.convert("RGB")
+
+        # 維持比例，限制最大尺寸
+        if max(img.size) > max_dimension:
+            img = _scale(img, max_dimension / max(img.size))
+        img.load()
+        decoded = time.perf_counter()
+
+        # 壓縮到大小上限以內
+        optimized_data, stats = encode_to_size(img, int(max_size_kb * 1024))
+        stats["draft"] = draft
+        # 耗時隨結果傳回，在子行程中執行時也能由主行程記錄
+        stats["decode_seconds"] = decoded - start
+        stats["encode_seconds"] = time.perf_counter() - decoded
+
+        print(
+            f"圖片優化：{len(image_data) / 1024:.1f} KB -> {len(optimized_data) / 1024:.1f} KB"
+            f"（品質 {stats['quality']}，尺寸 {stats['width']}x{stats['height']}，"
+            f"壓縮 {stats['encodes']} 次）"
+        )
+        if not stats["fits"]:
+            print(f"警告：圖片縮至最小尺寸仍超過 {max_size_kb} KB")
+
+        return optimized_data, stats
+
+    except Exception as e:
+        print(f"圖片優化失敗：{e}")
+        return image_data, {"error": str(e), "encodes": 0}
+
+
+def encode_to_size(img: Image.Image, max_bytes: int, max_quality: int = MAX_QUALITY,
+                   min_quality: int = MIN_QUALITY, min_dimension: int = MIN_DIMENSION) -> Tuple[bytes, Dict]:
+    """以二分搜尋找出不超過大小上限的最高 JPEG 品質
+
+    JPEG 檔案大小隨品質單調遞增，因此每個尺寸只需 O(log n) 次壓縮。
+    最低品質仍超過上限時，將圖片縮小後重新搜尋。
+    """
+    encodes = 0
+
+    def encode(quality: int) -> bytes:
+        nonlocal encodes
+        encodes += 1
+        output = io.BytesIO()
+        img.save(output, format="JPEG", quality=quality, optimize=True)
+        return output.getvalue()
+
+    while True:
+        data = encode(max_quality)
+        quality = max_quality
+        fits = len(data) <= max_bytes
+
+        if not fits:
+            # 先試最低品質：放不下就直接縮圖，省去整輪二分搜尋
+            data, quality = encode(min_quality), min_quality
+            fits = len(data) <= max_bytes
+
+        if fits and quality == min_quality:
+            low, high = min_quality + 1, max_quality - 1
+            while low <= high:
+                mid = (low + high) // 2
+                candidate = encode(mid)
+                if len(candidate) <= max_bytes:
+                    data, quality = candidate, mid
+                    low = mid + 1
+                else:
+                    high = mid - 1
+
+        if fits or max(img.size) * DOWNSCALE_STEP < min_dimension:
+            return data, {
+                "quality": quality,
+                "encodes": encodes,
+                "width": img.size[0],
+                "height": img.size[1],
+                "bytes": len(data),
+                "fits": fits,
+            }
+
+        # 檔案大小約與像素數成正比，依超出比例估算縮放幅度
+        ratio = min(DOWNSCALE_STEP, (max_bytes / len(data)) ** 0.5)
+        img = _scale(img, max(ratio, min_dimension / max(img.size)))
+
+
+def _scale(img: Image.Image, ratio: float) -> Image.Image:
+    """依比例縮放圖片"""
+    new_size = (max(1, int(img.size[0] * ratio)), max(1, int(img.size[1] * ratio)))
+    return img.resize(new_size, Image.LANCZOS)
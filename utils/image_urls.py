@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+圖片網址標準化與去重
+
+同一張商品圖常以多個網址出現：og:image、twitter:image 與頁面 <img> 各一份，
+協定相對網址（//cdn...）、追蹤參數，以及縮圖尺寸參數（?w=300、_400x400.jpg、-150x150.jpg）。
+這裡將網址標準化後以「去掉尺寸標記的網址」分組，每組只保留尺寸最大的版本，
+避免同一張圖重複下載與壓縮。
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote_plus, urljoin, urlsplit, urlunsplit
+
+
+# 不影響圖片內容的追蹤參數
+TRACKING_PARAMS = re.compile(r"utm_\w+|spm|scm|fbclid|gclid|_ga", re.IGNORECASE)
+
+# 代表輸出尺寸的參數（取最大值作為該版本的尺寸）；值不是數字時（?s=abc）視為一般參數
+SIZE_PARAMS = {"w", "width", "h", "height", "imwidth", "wid", "hei", "size", "s", "maxwidth", "max_width"}
+_SIZE_VALUE = re.compile(r"(\d+)(?:[x×*](\d+))?", re.IGNORECASE)
+
+# 只影響品質或裁切方式、不代表不同圖片的參數
+VARIANT_PARAMS = {"q", "quality", "fit", "crop", "dpr", "resize", "auto", "fm", "format", "mode", "rw", "rh"}
+
+# 檔名中的尺寸標記
+_ALIBABA_SUFFIX = re.compile(r"(\.(?:jpe?g|png|webp|gif))_[^/]*$", re.IGNORECASE)
+_NUMERIC_SUFFIX = re.compile(r"[_-](\d{2,4})?x(\d{2,4})?(?:@(\d)x)?(?=\.\w+$)", re.IGNORECASE)
+_NAMED_SUFFIX = re.compile(
+    r"[_-](pico|icon|thumb|thumbnail|tn|compact|small|sm|medium|md|grande|large|lg|big|xl|master|original)(?=\.\w+$)",
+    re.IGNORECASE,
+)
+_NUMBERS = re.compile(r"\d+")
+
+NAMED_SIZES = {
+    "pico": 16, "icon": 32, "thumb": 100, "thumbnail": 100, "tn": 100, "compact": 160,
+    "small": 240, "sm": 240, "medium": 480, "md": 480, "grande": 600, "large": 800, "lg": 800,
+    "big": 1200, "xl": 1200, "master": float("inf"), "original": float("inf"),
+}
+
+# 沒有尺寸標記的網址視為原圖
+ORIGINAL = float("inf")
+# 有標記但看不出尺寸（例如轉成 webp 的版本）排在原圖之後
+UNKNOWN_VARIANT = 1.0
+
+
+def canonicalize(url: str, base: Optional[str] = None) -> Optional[str]:
+    """標準化網址：補上協定、解析相對路徑、主機名稱小寫、移除預設埠號、片段與追蹤參數；
+    data: 網址返回 None，沒有協定也沒有 base 的本機路徑原樣返回"""
+    url = (url or "").strip()
+    if not url or url.startswith("data:"):
+        return None
+    if url.startswith("//"):
+        scheme = urlsplit(base).scheme if base else ""
+        url = f"{scheme or 'https'}:{url}"
+    elif base and not url.startswith(("http://", "https://")) and not urlsplit(url).scheme:
+        url = urljoin(base, url)
+
+    try:
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ("http", "https"):
+            return url if not scheme or len(scheme) == 1 else None  # 本機路徑（含 Windows 磁碟代號）
+        if not parts.hostname:
+            return None
+        port = parts.port
+    except ValueError:
+        return None
+
+    netloc = parts.hostname.lower()
+    if port and port != {"http": 80, "https": 443}[scheme]:
+        netloc += f":{port}"
+    return urlunsplit((scheme, netloc, parts.path or "/", _strip_tracking(parts.query), ""))
+
+
+def _strip_tracking(query: str) -> str:
+    """移除追蹤參數；其他參數保留原本的寫法（簽章網址與 x-oss-process 等參數需逐字保留）"""
+    if not query:
+        return query
+    segments = query.split("&")
+    kept = [s for s in segments if not TRACKING_PARAMS.fullmatch(unquote_plus(s.split("=", 1)[0]))]
+    return query if len(kept) == len(segments) else "&".join(kept)
+
+
+def image_variant(url: str) -> Tuple[Tuple, float]:
+    """返回 (去掉尺寸標記後的分組鍵, 估計尺寸)；url 需先經過 canonicalize"""
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https"):
+        return (None, url, ()), ORIGINAL
+
+    path, size = _strip_path_size(parts.path)
+    query = []
+    for key, value in parse_qsl(parts.query, keep_blank_values=True) if parts.query else ():
+        name = key.lower()
+        m = _SIZE_VALUE.fullmatch(value.strip()) if name in SIZE_PARAMS else None
+        if m:
+            numbers = [int(n) for n in m.groups() if n]
+            size = max(numbers) if size == ORIGINAL else max(size, max(numbers))
+        elif name not in VARIANT_PARAMS:
+            query.append((key, value))
+    return (parts.netloc, path, tuple(sorted(query))), size
+
+
+def dedupe_images(urls: List[str], base: Optional[str] = None) -> Tuple[List[str], Dict[str, int]]:
+    """標準化並去除重複的圖片網址，同一張圖的不同尺寸只保留最大的版本（維持第一次出現的順序）
+
+    返回 (網址清單, 統計)；統計的 saved 為省下的下載次數（duplicates + variants）
+    """
+    best: Dict[Tuple, List] = {}
+    stats = {"input": len(urls), "invalid": 0, "duplicates": 0, "variants": 0}
+    for raw in urls:
+        url = canonicalize(raw, base) if isinstance(raw, str) else None
+        if url is None:
+            stats["invalid"] += 1
+            continue
+        key, size = image_variant(url)
+        current = best.get(key)
+        if current is None:
+            best[key] = [url, size]
+            continue
+        if current[0] == url:
+            stats["duplicates"] += 1
+            continue
+        if current[0].split(":", 1)[1] == url.split(":", 1)[1]:
+            # 只差在 http / https
+            stats["duplicates"] += 1
+            if url.startswith("https:"):
+                current[0] = url
+            continue
+        stats["variants"] += 1
+        if size > current[1]:
+            best[key] = [url, size]
+
+    result = [url for url, _ in best.values()]
+    stats["output"] = len(result)
+    stats["saved"] = stats["duplicates"] + stats["variants"]
+    return result, stats
+
+
+def _strip_path_size(path: str) -> Tuple[str, float]:
+    """去掉檔名中的尺寸標記，返回 (路徑, 尺寸)"""
+    directory, _, name = path.rpartition("/")
+
+    m = _ALIBABA_SUFFIX.search(name)
+    if m:
+        # O1CN01xx.jpg_400x400.jpg、xx.jpg_.webp → xx.jpg
+        numbers = [int(n) for n in _NUMBERS.findall(name[m.end(1):])]
+        return f"{directory}/{name[:m.end(1)]}", max(numbers) if numbers else UNKNOWN_VARIANT
+
+    m = _NUMERIC_SUFFIX.search(name)
+    if m and (m.group(1) or m.group(2)):
+        # photo-300x200.jpg、photo_640x.jpg、photo_x640@2x.jpg
+        size = max(int(n) for n in (m.group(1), m.group(2)) if n) * int(m.group(3) or 1)
+        return f"{directory}/{name[:m.start()]}{name[m.end():]}", size
+
+    m = _NAMED_SUFFIX.search(name)
+    if m:
+        return f"{directory}/{name[:m.start()]}{name[m.end():]}", NAMED_SIZES[m.group(1).lower()]
+
+    return path, ORIGINAL
+
+
+def main():
+    """測試用"""
+    urls = [
+        "//cdn.example.com/p/shoe_300x300.jpg?utm_source=fb",
+        "https://cdn.example.com/p/shoe.jpg",
+        "https://cdn.example.com/p/shoe_800x800.jpg",
+        "http://CDN.example.com:80/p/shoe.jpg#zoom",
+        "https://img.example.com/O1CN01abc.jpg_400x400.jpg",
+        "https://img.example.com/O1CN01abc.jpg_800x800.jpg",
+        "https://img.example.com/item.png?w=200&q=80",
+        "https://img.example.com/item.png?w=1200",
+        "https://img.example.com/photo.jpg?s=abc",
+        "https://img.example.com/photo.jpg?s=def",
+        "https://oss.example.com/a.jpg?x-oss-process=image/resize,w_800&spm=a2.1",
+        "data:image/gif;base64,R0lGOD",
+    ]
+    images, stats = dedupe_images(urls)
+    for url in images:
+        print(url)
+    print(stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+關鍵字標記
+
+以 Aho-Corasick 自動機一次掃描商品名稱與描述，同時找出字典中所有的品牌、顏色、尺寸與促銷關鍵字，
+掃描時間只與文字長度成正比，不隨字典大小增加。
+- 文字與關鍵字都先轉成半形小寫（NFKC），「ＸＬ」「Apple」也能比對
+- 英數字關鍵字需在單字邊界（「lg」不會比對到「algorithm」，「m」不會比對到「mm」），中文不需要
+- 重疊的比對取最左、最長的一個（「深藍色」優先於「藍色」）
+
+字典檔（data/keywords.json）：{"分組": {"標準名稱": ["別名", ...]}}，例如
+    {"brand": {"Apple": ["apple", "蘋果"]}, "color": {"黑色": ["黑色", "black"]}}
+"""
+
+import json
+import unicodedata
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+
+class KeywordAutomaton:
+    """多模式字串比對；每個關鍵字附帶一個任意值"""
+
+    def __init__(self, patterns: Iterable[Tuple[str, object]] = ()):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[Tuple[int, ...]] = [()]
+        # 沿失敗鏈最近一個有輸出的狀態，找輸出時跳過沒有輸出的狀態
+        self._output_link: List[int] = [0]
+        self._lengths: List[int] = []
+        self._values: List[object] = []
+        self._boundaries: List[Tuple[bool, bool]] = []
+        self._built = False
+        for pattern, value in patterns:
+            self.add(pattern, value)
+
+    def add(self, pattern: str, value: object) -> "KeywordAutomaton":
+        pattern = normalize(pattern)
+        if not pattern:
+            return self
+        state = 0
+        for ch in pattern:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append(())
+                self._output_link.append(0)
+            state = next_state
+        self._outputs[state] += (len(self._values),)
+        self._lengths.append(len(pattern))
+        self._values.append(value)
+        self._boundaries.append((_is_word_char(pattern[0]), _is_word_char(pattern[-1])))
+        self._built = False
+        return self
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def build(self) -> "KeywordAutomaton":
+        """以廣度優先建立失敗連結"""
+        queue = deque(self._goto[0].values())
+        for state in queue:
+            self._fail[state] = 0
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                fallback = self._fail[next_state]
+                self._output_link[next_state] = fallback if self._outputs[fallback] else self._output_link[fallback]
+        self._built = True
+        return self
+
+    def finditer(self, text: str, normalized: bool = False):
+        """依結束位置產生 (起點, 終點, 值)；text 已經過 normalize 時設 normalized=True"""
+        if not self._built:
+            self.build()
+        if not normalized:
+            text = normalize(text)
+        goto, fail, outputs, output_link = self._goto, self._fail, self._outputs, self._output_link
+        lengths, values, boundaries = self._lengths, self._values, self._boundaries
+        state = 0
+        end = len(text)
+        for i, ch in enumerate(text):
+            next_state = goto[state].get(ch)
+            while next_state is None:
+                if not state:
+                    next_state = 0
+                    break
+                state = fail[state]
+                next_state = goto[state].get(ch)
+            state = next_state
+            if not state:
+                continue
+            match = state if outputs[state] else output_link[state]
+            while match:
+                for pattern in outputs[match]:
+                    start = i + 1 - lengths[pattern]
+                    word_start, word_end = boundaries[pattern]
+                    if word_start and start > 0 and _is_word_char(text[start - 1]):
+                        continue
+                    if word_end and i + 1 < end and _is_word_char(text[i + 1]):
+                        continue
+                    yield start, i + 1, values[pattern]
+                match = output_link[match]
+
+    def findall(self, text: str, normalized: bool = False) -> List[Tuple[int, int, object]]:
+        """不重疊的比對結果，重疊時取最左、最長的一個"""
+        matches = sorted(self.finditer(text, normalized), key=lambda m: (m[0], -m[1]))
+        result = []
+        last_end = 0
+        for match in matches:
+            if match[0] >= last_end:
+                result.append(match)
+                last_end = match[1]
+        return result
+
+
+class KeywordTagger:
+    """依字典標記商品的品牌、顏色、尺寸與促銷字詞"""
+
+    def __init__(self, dictionary: Dict[str, Dict[str, List[str]]]):
+        self.groups = tuple(dictionary)
+        self.automaton = KeywordAutomaton()
+        for group, entries in dictionary.items():
+            for name, aliases in entries.items():
+                for alias in dict.fromkeys(normalize(alias) for alias in [name, *aliases]):
+                    self.automaton.add(alias, (group, name))
+        self.automaton.build()
+
+    @classmethod
+    def load(cls, dictionary_file) -> "KeywordTagger":
+        with open(dictionary_file, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def tag(self, name: str = "", description: str = "", name_only: Iterable[str] = ()) -> Dict[str, List[str]]:
+        """一次掃描名稱與描述，返回 {分組: [標準名稱, ...]}，依出現順序排列（名稱中的在前）；
+        name_only 中的分組只採用名稱中的關鍵字"""
+        name = normalize(name or "")
+        text = f"{name}\n{normalize(description)}" if description else name
+        name_only = set(name_only)
+        result = {group: [] for group in self.groups}
+        for start, _, (group, keyword) in self.automaton.findall(text, normalized=True):
+            if start >= len(name) and group in name_only:
+                continue
+            if keyword not in result[group]:
+                result[group].append(keyword)
+        return result
+
+
+def normalize(text: str) -> str:
+    """全形轉半形並轉小寫"""
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isascii() and ch.isalnum()
+
+
+def main():
+    """測試用"""
+    tagger = KeywordTagger.load(Path(__file__).resolve().parent.parent / "data" / "keywords.json")
+    print(f"共 {len(tagger.automaton)} 個關鍵字")
+    for name, description in [
+        ("【現貨】Apple iPhone 15 128GB 深藍色 公司貨", "限量優惠，送玻璃貼"),
+        ("韓版寬鬆 純棉 T恤 黑色/白色 ＸＬ", "尺寸：M、L、XL，均碼也有"),
+        ("LG 樂金 algorithm 測試 mm", ""),
+    ]:
+        print(name)
+        print(f"  {tagger.tag(name, description)}")
+
+
+if __name__ == "__main__":
+    main()
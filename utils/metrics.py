@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+效能指標
+
+記錄各階段耗時（直方圖）、傳輸位元組數與快取命中率，
+可輸出為 Prometheus 文字格式（Flask 的 /metrics）或 JSON 摘要（命令列 --metrics）。
+全程式共用 METRICS 這一份記錄。
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+
+# 秒；涵蓋 HTML 解析（毫秒級）到慢速下載與上傳（數十秒）
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+STAGE_SECONDS = "shrimp_stage_seconds"
+BYTES_TOTAL = "shrimp_bytes_total"
+CACHE_REQUESTS = "shrimp_cache_requests_total"
+ITEMS_TOTAL = "shrimp_items_total"
+IMAGES_DEDUPED = "shrimp_images_deduped_total"
+
+HELP = {
+    STAGE_SECONDS: "各處理階段的耗時",
+    BYTES_TOTAL: "傳輸與寫入的位元組數",
+    CACHE_REQUESTS: "快取查詢次數（result=hit/miss）",
+    ITEMS_TOTAL: "處理的項目數",
+    IMAGES_DEDUPED: "去除重複或其他尺寸版本而省下的圖片下載數",
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """固定分桶的直方圖"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """以所在分桶的上限估計分位數"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._started = time.time()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """累加計數器"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """記錄一筆直方圖數值"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, stage: str, **labels):
+        """計時一個處理階段：with METRICS.timer("fetch"): ..."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(STAGE_SECONDS, time.perf_counter() - start, stage=stage, **labels)
+
+    def stage(self, stage: str, seconds: float, **labels):
+        """記錄已知耗時的階段（例如子行程回報的時間）"""
+        self.observe(STAGE_SECONDS, seconds, stage=stage, **labels)
+
+    def add_bytes(self, direction: str, kind: str, count: int):
+        """記錄傳輸量；direction 為 in / out"""
+        if count:
+            self.inc(BYTES_TOTAL, count, direction=direction, kind=kind)
+
+    def cache(self, cache: str, hit: bool):
+        """記錄一次快取查詢"""
+        self.inc(CACHE_REQUESTS, cache=cache, result="hit" if hit else "miss")
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._started = time.time()
+
+    def summary(self) -> Dict:
+        """JSON 摘要：各階段耗時、傳輸量與快取命中率"""
+        with self._lock:
+            stages = {}
+            for key, histogram in self._histograms.get(STAGE_SECONDS, {}).items():
+                stages[_label_text(key, skip="stage")] = {
+                    "count": histogram.count,
+                    "total_seconds": round(histogram.sum, 3),
+                    "avg_ms": round(histogram.sum / histogram.count * 1000, 1) if histogram.count else 0,
+                    "p50_ms": round(histogram.quantile(0.5) * 1000, 1),
+                    "p95_ms": round(histogram.quantile(0.95) * 1000, 1),
+                    "max_ms": round(histogram.max * 1000, 1),
+                }
+
+            transferred = {}
+            for key, value in self._counters.get(BYTES_TOTAL, {}).items():
+                labels = dict(key)
+                transferred[f"{labels.get('kind')}_{labels.get('direction')}"] = int(value)
+
+            caches = {}
+            for key, value in self._counters.get(CACHE_REQUESTS, {}).items():
+                labels = dict(key)
+                entry = caches.setdefault(labels.get("cache"), {"hit": 0, "miss": 0})
+                entry[labels.get("result")] = int(value)
+            for entry in caches.values():
+                total = entry["hit"] + entry["miss"]
+                entry["hit_ratio"] = round(entry["hit"] / total, 3) if total else 0
+
+            counters = {}
+            for name, series in self._counters.items():
+                if name in (BYTES_TOTAL, CACHE_REQUESTS):
+                    continue
+                for key, value in series.items():
+                    counters[name + (f"{{{_label_text(key)}}}" if key else "")] = value
+
+            # 依總耗時排序，最花時間的階段排最前面
+            stages = dict(sorted(stages.items(), key=lambda kv: kv[1]["total_seconds"], reverse=True))
+            return {
+                "uptime_seconds": round(time.time() - self._started, 1),
+                "stages": stages,
+                "bytes": transferred,
+                "caches": caches,
+                "counters": counters,
+            }
+
+    def to_prometheus(self) -> str:
+        """Prometheus 文字格式（text/plain; version=0.0.4）"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, n in zip(histogram.buckets, histogram.counts):
+                        cumulative += n
+                        lines.append(f"{name}_bucket{_format_labels(key, le=_format_value(bound))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(key, le='+Inf')} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(histogram.sum)}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _label_key(labels: Dict) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _label_text(key: LabelKey, skip: Optional[str] = None) -> str:
+    """摘要用的標籤文字：stage 標籤只顯示值，其他為 k=v"""
+    labels = dict(key)
+    parts = [labels.pop(skip)] if skip in labels else []
+    parts.extend(f"{k}={v}" for k, v in labels.items())
+    return ",".join(parts)
+
+
+def _format_labels(key: LabelKey, **extra) -> str:
+    items = list(key) + list(extra.items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+METRICS = MetricsRegistry()
+
+
+def main():
+    """測試用"""
+    for i in range(20):
+        with METRICS.timer("parse"):
+            time.sleep(0.001 * i)
+    METRICS.add_bytes("in", "page", 12345)
+    METRICS.cache("image", True)
+    METRICS.cache("image", False)
+    print(METRICS.to_prometheus())
+    print(METRICS.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -5,35 +5,55 @@
 """
 
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Iterator, List, Optional
 from urllib.parse import urlparse
-import requests
-from bs4 import BeautifulSoup
 import json
 
+from .extraction_rules import DEFAULT_RULES, PRIORITY_JSONLD, ExtractionRules, FieldCollector
+from .html_scanner import PageScan, resolve_backend, scan_html
+from .image_urls import dedupe_images
+from .http_cache import HttpCache, create_session
+from .metrics import IMAGES_DEDUPED, METRICS
+from .site_extractors import SiteExtractor, SiteRegistry
+from .table_reader import FIELD_MAPPING, TABLE_SUFFIXES, iter_chunks, iter_products
+
 
 class ProductExtractor:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        })
+    def __init__(self, http_cache: Optional[HttpCache] = None, parser: str = "auto",
+                 rules: Optional[ExtractionRules] = None, sites: Optional[SiteRegistry] = None):
+        self.session = create_session()
+        self.http_cache = http_cache
+        self.parser = resolve_backend(parser)
+        self.rules = rules or DEFAULT_RULES
+        self.sites = sites or SiteRegistry()
 
     def from_url(self, url: str) -> Dict:
         """從網址提取商品資訊"""
         print(f"從網址提取：{url}")
         
         try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, "html.parser")
+            with METRICS.timer("fetch_page"):
+                if self.http_cache is None:
+                    response = self.session.get(url, timeout=30)
+                    response.raise_for_status()
+                else:
+                    response, cached = self.http_cache.get(self.session, url, timeout=30)
+            if self.http_cache is not None:
+                METRICS.cache("page_revalidate", response is None)
+                if response is None:
+                    print("頁面未變更，沿用上次提取的商品資訊")
+                    self.http_cache.flush()
+                    return cached
+            METRICS.add_bytes("in", "page", len(response.content))
             
-            # 嘗試從常見的結構提取
-            product_info = self._extract_from_html(soup, url)
+            with METRICS.timer("parse"):
+                product_info = self._extract_page(response.text, url)
             
             if not product_info.get("name"):
                 print("警告：無法提取商品名稱，請手動填寫")
+            elif self.http_cache is not None:
+                self.http_cache.store(url, response, product_info)
+                self.http_cache.flush()
             
             return product_info
             
@@ -54,7 +74,9 @@ class ProductExtractor:
         # 根據副檔名決定處理方式
         if file_path.suffix.lower() in (".json",):
             return self._from_json(file_path)
-        elif file_path.suffix.lower() in (".txt", ".csv"):
+        elif file_path.suffix.lower() in TABLE_SUFFIXES:
+            return self._from_table(file_path)
+        elif file_path.suffix.lower() in (".txt",):
             return self._from_text(file_path)
         elif file_path.suffix.lower() in (".html", ".htm"):
             return self._from_html(file_path)
@@ -62,6 +84,23 @@ class ProductExtractor:
             print(f"不支援的檔案格式：{file_path.suffix}")
             return self._empty_product()
 
+    def iter_file(self, file_path: str, chunk_size: int = 500) -> Iterator[List[Dict]]:
+        """逐批讀取 CSV、TSV 或 XLSX 中的商品，每批 chunk_size 個；取用下一批時才繼續讀檔"""
+        for chunk in iter_chunks(iter_products(file_path), chunk_size):
+            yield [self._normalize_product_info(product) for product in chunk]
+
+    def _from_table(self, file_path: Path) -> Dict:
+        """從表格檔案提取第一個商品；多個商品請用 iter_file 或批次模式"""
+        products = iter_products(file_path)
+        product = next(products, None)
+        if product is None:
+            print("表格中沒有商品資料")
+            return self._empty_product()
+        if next(products, None) is not None:
+            print(f"表格中有多個商品，只使用第一個；全部處理請執行 python main.py batch {file_path}")
+        products.close()
+        return self._normalize_product_info(product)
+
     def _from_json(self, file_path: Path) -> Dict:
         """從 JSON 檔案提取"""
         with open(file_path, "r", encoding="utf-8") as f:
@@ -106,72 +145,82 @@ class ProductExtractor:
         with open(file_path, "r", encoding="utf-8") as f:
             html = f.read()
         
-        soup = BeautifulSoup(html, "html.parser")
-        return self._extract_from_html(soup, str(file_path))
+        page = scan_html(html, self.parser)
+        return self._extract_from_html(page, str(file_path))
+
+    def _extract_page(self, html: str, url: str) -> Dict:
+        """有網站專用提取器時先直接從原始 HTML 提取，取不到才掃描整頁"""
+        site = self.sites.for_url(url)
+        if site is not None:
+            site_info = site.extract(html, url)
+            METRICS.inc("shrimp_site_extract_total", site=site.name, result="hit" if site_info else "fallback")
+            if site_info:
+                info = self._empty_product()
+                info.update(site_info)
+                info["images"] = self._dedupe_images(info["images"], url)
+                return info
+        
+        # 嘗試從常見的結構提取
+        return self._extract_from_html(scan_html(html, self.parser), url, site)
 
-    def _extract_from_html(self, soup, source: str) -> Dict:
+    def _extract_from_html(self, page: PageScan, source: str, site: Optional[SiteExtractor] = None) -> Dict:
         """從 HTML 提取商品資訊"""
         info = self._empty_product()
+        rules = site.rules if site is not None and site.rules is not None else self.rules
         
-        # 嘗試從 meta 標籤提取
-        meta_mapping = {
-            "og:title": "name",
-            "og:description": "description",
-            "og:image": "images",
-            "product:name": "name",
-            "product:description": "description",
-            "product:price:amount": "price",
-            "twitter:title": "name",
-            "twitter:description": "description",
-            "twitter:image": "images"
-        }
+        collector = FieldCollector()
         
-        for meta in soup.find_all("meta"):
-            prop = meta.get("property") or meta.get("name")
-            content = meta.get("content")
-            
-            if prop and content:
-                for pattern, key in meta_mapping.items():
-                    if pattern in prop.lower():
-                        if key == "images":
-                            info[key].append(content)
-                        else:
-                            info[key] = content
+        # 嘗試從 meta 標籤提取
+        for prop, content in page.meta:
+            rule = rules.match(prop)
+            if rule:
+                collector.offer(rule[0], content, rule[1])
         
         # 嘗試從 JSON-LD 提取
-        json_ld_scripts = soup.find_all("script", {"type": "application/ld+json"})
-        for script in json_ld_scripts:
+        for script in page.jsonld:
             try:
-                data = json.loads(script.string)
-                if isinstance(data, dict):
-                    info.update(self._extract_from_jsonld(data))
-                elif isinstance(data, list):
-                    for item in data:
-                        info.update(self._extract_from_jsonld(item))
-            except:
+                data = json.loads(script)
+                items = data if isinstance(data, list) else [data]
+                for item in items:
+                    if isinstance(item, dict):
+                        for field, value in self._extract_from_jsonld(item).items():
+                            collector.offer(field, value, PRIORITY_JSONLD)
+            except ValueError:
                 pass
         
+        collector.apply(info)
+        
         # 嘗試從 h1, h2 提取
         if not info.get("name"):
-            for tag in soup.find_all(["h1", "h2"]):
-                text = tag.get_text().strip()
+            for text in page.headings:
                 if text and len(text) < 200:
                     info["name"] = text
                     break
         
-        # 提取所有圖片
+        # 提取所有圖片；logo、圖示等版面元素由網站設定過濾（filter_images），這裡不依檔名猜測
+        limit = None
         if not info["images"]:
-            img_tags = soup.find_all("img")
-            for img in img_tags:
-                src = img.get("src") or img.get("data-src")
-                if src and not src.startswith("data:"):
-                    if len(info["images"]) < 10:  # 限制最多 10 張
-                        if not src.startswith("http"):
-                            src = self._resolve_url(src, source)
-                        info["images"].append(src)
+            limit = 10  # 限制最多 10 張
+            for src in page.images:
+                if not src.startswith("data:"):
+                    if not src.startswith("http"):
+                        src = self._resolve_url(src, source)
+                    info["images"].append(src)
+        
+        if site is not None:
+            info["images"] = site.filter_images(info["images"])
+        info["images"] = self._dedupe_images(info["images"], source)[:limit]
         
         return info
 
+    def _dedupe_images(self, images: List[str], source: str) -> List[str]:
+        """標準化圖片網址，去除重複的網址與同一張圖的其他尺寸"""
+        base = source if source.startswith("http") else None
+        images, stats = dedupe_images(images, base)
+        if stats["saved"]:
+            METRICS.inc(IMAGES_DEDUPED, stats["saved"], stage="extract")
+        return images
+
     def _extract_from_jsonld(self, data: Dict) -> Dict:
         """從 JSON-LD 提取"""
         info = {}
@@ -200,16 +249,7 @@ class ProductExtractor:
         """標準化商品資訊"""
         info = self._empty_product()
         
-        # 常見的欄位名稱對應
-        field_mapping = {
-            "name": ["name", "title", "product_name", "商品名稱", "名稱"],
-            "description": ["description", "desc", "product_description", "商品描述", "描述", "介紹"],
-            "price": ["price", "價格", "售價"],
-            "category": ["category", "分類", "類別"],
-            "images": ["images", "image", "圖片", "imgs"]
-        }
-        
-        for field, possible_names in field_mapping.items():
+        for field, possible_names in FIELD_MAPPING.items():
             for name in possible_names:
                 if name in data and data[name]:
                     if field == "images":
@@ -221,6 +261,9 @@ class ProductExtractor:
                         info[field] = data[name]
                         break
         
+        if isinstance(data.get("metadata"), dict):
+            info["metadata"].update(data["metadata"])
+        info["images"] = self._dedupe_images(info["images"], "")
         return info
 
     def _resolve_url(self, url: str, base: str) -> str:
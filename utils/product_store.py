@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+商品狀態記錄
+
+以 SQLite 依商品識別（來源網址或 SKU）記錄上次同步的商品資料、上架資料與已上傳到蝦皮的版本，
+並以內容指紋判斷商品是否有變更。增量同步只需重新處理指紋不同的商品。
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    source_url TEXT PRIMARY KEY,
+    product_fp TEXT,
+    product_json TEXT,
+    listing_fp TEXT,
+    listing_json TEXT,
+    uploaded_fp TEXT,
+    uploaded_json TEXT,
+    item_id TEXT,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    updated_at REAL,
+    uploaded_at REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_products_last_seen ON products (last_seen);
+"""
+
+# 舊版資料庫缺少的欄位：(欄位, 定義)
+MIGRATIONS = (("last_error", "TEXT"),)
+
+# 只影響本機的欄位，不列入上架資料的指紋與差異
+LOCAL_FIELDS = ("local_images",)
+
+
+def fingerprint(data: Dict, exclude=LOCAL_FIELDS) -> str:
+    """以排序後的 JSON 計算內容指紋"""
+    data = {k: v for k, v in data.items() if k not in exclude}
+    canonical = json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def diff_fields(old: Optional[Dict], new: Dict, exclude=LOCAL_FIELDS) -> Dict:
+    """列出新舊資料不同的欄位：{欄位: {"old": 舊值, "new": 新值}}"""
+    old = old or {}
+    changes = {}
+    for key in sorted(set(old) | set(new)):
+        if key in exclude:
+            continue
+        if old.get(key) != new.get(key):
+            changes[key] = {"old": old.get(key), "new": new.get(key)}
+    return changes
+
+
+class ProductStore:
+    def __init__(self, db_path: str):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(products)")}
+            for column, definition in MIGRATIONS:
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE products ADD COLUMN {column} {definition}")
+
+    def _connect(self) -> sqlite3.Connection:
+        """每個執行緒各用一條連線"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, source_url: str) -> Optional[Dict]:
+        """取得商品的記錄，JSON 欄位已解析"""
+        row = self._connect().execute("SELECT * FROM products WHERE source_url = ?", (source_url,)).fetchone()
+        if row is None:
+            return None
+        record = dict(row)
+        for key in ("product_json", "listing_json", "uploaded_json"):
+            record[key[:-5]] = json.loads(record.pop(key)) if record[key] else None
+        return record
+
+    def touch(self, source_url: str, seen_at: float, error: Optional[str] = None):
+        """記錄本次同步有看到這個商品；error 為提取失敗的原因（商品仍在目錄中，不算下架）"""
+        self._connect().execute(
+            "INSERT INTO products (source_url, first_seen, last_seen, last_error) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(source_url) DO UPDATE SET last_seen = excluded.last_seen, last_error = excluded.last_error",
+            (source_url, seen_at, seen_at, error),
+        )
+
+    def save_listing(self, source_url: str, product: Dict, listing: Dict):
+        """記錄最新的商品與上架資料"""
+        self._connect().execute(
+            "UPDATE products SET product_fp = ?, product_json = ?, listing_fp = ?, listing_json = ?, "
+            "updated_at = ? WHERE source_url = ?",
+            (fingerprint(product), _dumps(product), fingerprint(listing), _dumps(listing), time.time(), source_url),
+        )
+
+    def mark_uploaded(self, source_url: str, listing: Dict, item_id):
+        """記錄已上傳到蝦皮的版本"""
+        self._connect().execute(
+            "UPDATE products SET uploaded_fp = ?, uploaded_json = ?, item_id = COALESCE(?, item_id), "
+            "uploaded_at = ? WHERE source_url = ?",
+            (fingerprint(listing), _dumps(listing), None if item_id is None else str(item_id), time.time(), source_url),
+        )
+
+    def errored(self, since: float) -> List[str]:
+        """在 since 之後出現過但提取失敗的商品"""
+        rows = self._connect().execute(
+            "SELECT source_url FROM products WHERE last_seen >= ? AND last_error IS NOT NULL ORDER BY source_url",
+            (since,)
+        ).fetchall()
+        return [row["source_url"] for row in rows]
+
+    def missing(self, since: float) -> List[str]:
+        """在 since 之後沒有出現過的商品（可能已下架）；出現過但提取失敗的不算"""
+        rows = self._connect().execute(
+            "SELECT source_url FROM products WHERE last_seen < ? ORDER BY source_url", (since,)
+        ).fetchall()
+        return [row["source_url"] for row in rows]
+
+    def count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+
+def _dumps(data: Dict) -> str:
+    return json.dumps(data, ensure_ascii=False, default=str)
+
+
+def main():
+    """測試用"""
+    store = ProductStore("./cache/products.db")
+    print(f"已記錄 {store.count()} 個商品")
+
+
+if __name__ == "__main__":
+    main()
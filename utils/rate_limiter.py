@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+速率限制工具
+
+令牌桶：每秒補充 rate 個令牌，最多累積 capacity 個。
+短時間內可以一次用掉累積的令牌（突發），長期平均不超過 rate。
+多個執行緒可共用同一個桶。
+另附重試用的退避時間計算與 Retry-After 解析。
+"""
+
+import random
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate 必須大於 0")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """令牌足夠時立即取用並返回 True，否則返回 False"""
+        return self._reserve(tokens) == 0
+
+    def acquire(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        """等待直到取得令牌；超過 timeout 秒仍無法取得時返回 False"""
+        if tokens > self.capacity:
+            raise ValueError(f"一次最多取用 {self.capacity} 個令牌")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._reserve(tokens)
+            if wait == 0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def _reserve(self, tokens: float) -> float:
+        """嘗試取用令牌；成功返回 0，否則返回預估還需等待的秒數"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0
+            return (tokens - self._tokens) / self.rate
+
+
+def backoff_delay(attempt: int, base: float, max_backoff: float, retry_after: Optional[float] = None) -> float:
+    """指數退避加上完全隨機抖動，避免多個執行緒同時重試；伺服器指定的等待時間優先"""
+    delay = random.uniform(0, min(max_backoff, base * 2 ** attempt))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, max_backoff))
+    return delay
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """只處理秒數格式的 Retry-After"""
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None
+
+
+def main():
+    """測試用"""
+    bucket = TokenBucket(rate=5, capacity=2)
+    start = time.monotonic()
+    for i in range(10):
+        bucket.acquire()
+        print(f"第 {i + 1} 個請求：{time.monotonic() - start:.2f} 秒")
+
+
+if __name__ == "__main__":
+    main()
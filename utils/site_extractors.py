@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+網站專用提取器
+
+依網址的主機名稱選擇網站專用的提取器（每層網域一次字典查詢）。
+許多電商頁面把完整的商品資料放在內嵌的 JSON 狀態中（例如 __NEXT_DATA__、
+window.__INITIAL_STATE__），直接從原始 HTML 取出這段 JSON 就能拿到商品圖庫，
+不需要掃描整個頁面，也不會抓到 logo 與導覽列圖示。
+取不到資料時仍回到通用提取，但圖片會經過網站設定的過濾規則。
+
+config.json 的 extractor.sites 範例：
+    {
+      "hosts": ["shop.example.com"],
+      "state": {"script_id": "__NEXT_DATA__"},
+      "fields": {
+        "name": "props.pageProps.product.title",
+        "price": "props.pageProps.product.price",
+        "images": "props.pageProps.product.gallery[*].url"
+      },
+      "image_url": "https://cdn.example.com/{}",
+      "image_include": "/products/",
+      "image_exclude": "thumb|icon",
+      "skip_layout_images": true,
+      "meta": {"shop:product_name": "name"}
+    }
+skip_layout_images（預設 true）略過網址中含 logo、icon、banner 等字的圖片與 svg/gif/ico；
+商品圖片的檔名剛好含這些字的網站請設為 false。通用提取（沒有設定的網站）不套用這個過濾。
+"""
+
+import json
+import re
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+from .extraction_rules import DEFAULT_RULES, PRIORITY_JSONLD, ExtractionRules
+
+
+PRODUCT_FIELDS = ("name", "description", "price", "category", "images")
+
+# 網站設定 skip_layout_images 時略過的圖片：向量圖、動畫圖示與常見的版面元素
+JUNK_IMAGE = re.compile(
+    r"\.(?:svg|gif|ico)(?:$|\?)|(?:^|[/_.-])(?:logo|icons?|sprites?|avatar|banner|badge|placeholder|spacer)(?:[/_.-]|$)",
+    re.IGNORECASE,
+)
+
+_PATH_TOKEN = re.compile(r"([^.\[\]]+)|\[(\*|\d+)\]")
+
+
+class SiteExtractor:
+    """網站專用提取器的基底類別"""
+
+    name = "site"
+
+    def __init__(self, hosts: Iterable[str], rules: Optional[ExtractionRules] = None,
+                 image_include: Optional[str] = None, image_exclude: Optional[str] = None,
+                 skip_layout_images: bool = True):
+        self.hosts = tuple(host.lower() for host in hosts)
+        self.rules = rules
+        self.skip_layout_images = skip_layout_images
+        self.image_include = re.compile(image_include, re.IGNORECASE) if image_include else None
+        self.image_exclude = re.compile(image_exclude, re.IGNORECASE) if image_exclude else None
+
+    def extract(self, html: str, url: str) -> Optional[Dict]:
+        """直接從原始 HTML 提取商品資訊；返回 None 時改用通用提取"""
+        return None
+
+    def filter_images(self, images: List[str], layout: bool = True) -> List[str]:
+        """只保留商品圖庫的圖片；layout=False 時不套用版面元素過濾（圖片來自 JSON 狀態中的商品圖庫）"""
+        result = []
+        for src in images:
+            if self.image_include and not self.image_include.search(src):
+                continue
+            if self.image_exclude and self.image_exclude.search(src):
+                continue
+            if layout and self.skip_layout_images and JUNK_IMAGE.search(src):
+                continue
+            result.append(src)
+        return result
+
+
+class JsonStateExtractor(SiteExtractor):
+    """從頁面內嵌的 JSON 狀態提取，欄位以路徑設定（a.b[0].c、a.list[*].url）"""
+
+    name = "json_state"
+
+    def __init__(self, hosts: Iterable[str], fields: Dict[str, str], script_id: Optional[str] = None,
+                 variable: Optional[str] = None, image_url: Optional[str] = None, **kwargs):
+        super().__init__(hosts, **kwargs)
+        if not (script_id or variable):
+            raise ValueError("JSON 狀態需要設定 script_id 或 variable")
+        unknown = set(fields) - set(PRODUCT_FIELDS)
+        if unknown:
+            raise ValueError(f"不支援的欄位：{', '.join(sorted(unknown))}")
+        self.fields = {field: _compile_path(path) for field, path in fields.items()}
+        self.image_url = image_url
+        if script_id:
+            self._locate = re.compile(
+                r"<script[^>]*\bid=[\"']" + re.escape(script_id) + r"[\"'][^>]*>", re.IGNORECASE)
+        else:
+            self._locate = re.compile(re.escape(variable) + r"\s*=\s*")
+        self._decoder = json.JSONDecoder()
+
+    def extract(self, html: str, url: str) -> Optional[Dict]:
+        state = self._load_state(html)
+        if state is None:
+            return None
+
+        info = {}
+        for field, path in self.fields.items():
+            values = _resolve_path(state, path)
+            if field == "images":
+                images = [str(v) for v in values if v]
+                if self.image_url:
+                    images = [v if v.startswith(("http", "//")) else self.image_url.format(v) for v in images]
+                info["images"] = self.filter_images(list(dict.fromkeys(images)), layout=False)
+            elif values and values[0] not in (None, ""):
+                info[field] = values[0]
+
+        # 至少要有名稱與圖片才採用，否則改用通用提取
+        if not info.get("name") or not info.get("images"):
+            return None
+        return info
+
+    def _load_state(self, html: str):
+        """找到 JSON 開頭後只解碼這一段，不解析其他 HTML"""
+        m = self._locate.search(html)
+        if m is None:
+            return None
+        start = m.end()
+        while start < len(html) and html[start] in " \t\r\n":
+            start += 1
+        try:
+            state, _ = self._decoder.raw_decode(html, start)
+        except ValueError:
+            return None
+        return state
+
+
+class SiteRegistry:
+    """依主機名稱選擇提取器"""
+
+    def __init__(self, extractors: Iterable[SiteExtractor] = ()):
+        self._hosts: Dict[str, SiteExtractor] = {}
+        for extractor in extractors:
+            self.register(extractor)
+
+    def register(self, extractor: SiteExtractor) -> SiteExtractor:
+        for host in extractor.hosts:
+            self._hosts[host] = extractor
+        return extractor
+
+    def for_url(self, url: str) -> Optional[SiteExtractor]:
+        """依序查完整主機名稱與上層網域（m.shop.example.com → shop.example.com → example.com）"""
+        if not self._hosts:
+            return None
+        host = (urlparse(url).hostname or "").lower()
+        while "." in host:
+            extractor = self._hosts.get(host)
+            if extractor is not None:
+                return extractor
+            host = host.partition(".")[2]
+        return None
+
+    def __len__(self) -> int:
+        return len(self._hosts)
+
+
+def build_registry(sites: Optional[List[Dict]] = None) -> SiteRegistry:
+    """依 config.json 的 extractor.sites 建立提取器"""
+    registry = SiteRegistry()
+    for site in sites or []:
+        state = site.get("state") or {}
+        options = dict(
+            image_include=site.get("image_include"),
+            image_exclude=site.get("image_exclude"),
+            skip_layout_images=site.get("skip_layout_images", True),
+        )
+        if site.get("meta"):
+            # 網站專用的 meta 鍵，優先於通用規則
+            rules = DEFAULT_RULES.extended()
+            for key, field in site["meta"].items():
+                rules.add_exact(key, field, PRIORITY_JSONLD)
+            options["rules"] = rules
+        if state:
+            extractor = JsonStateExtractor(
+                site["hosts"], site.get("fields") or {},
+                script_id=state.get("script_id"), variable=state.get("variable"),
+                image_url=site.get("image_url"), **options
+            )
+        else:
+            extractor = SiteExtractor(site["hosts"], **options)
+        registry.register(extractor)
+    return registry
+
+
+def _compile_path(path: str) -> List:
+    tokens = []
+    for key, index in _PATH_TOKEN.findall(path):
+        if key:
+            tokens.append(key)
+        else:
+            tokens.append(index if index == "*" else int(index))
+    return tokens
+
+
+def _resolve_path(data, path: List) -> List:
+    """依路徑取值；[*] 展開清單，找不到時返回空清單"""
+    values = [data]
+    for token in path:
+        next_values = []
+        for value in values:
+            if token == "*":
+                if isinstance(value, list):
+                    next_values.extend(value)
+            elif isinstance(token, int):
+                if isinstance(value, list) and -len(value) <= token < len(value):
+                    next_values.append(value[token])
+            elif isinstance(value, dict) and token in value:
+                next_values.append(value[token])
+        values = next_values
+    # 路徑最後指向清單時展開（例如 "product.images"）
+    if len(values) == 1 and isinstance(values[0], list):
+        return values[0]
+    return values
+
+
+def main():
+    """測試用"""
+    html = ('<html><body><img src="/logo.png"><script id="__NEXT_DATA__" type="application/json">'
+            '{"props": {"product": {"title": "測試商品", "price": 199, '
+            '"gallery": [{"url": "a1.jpg"}, {"url": "a2.jpg"}]}}}</script></body></html>')
+    registry = build_registry([{
+        "hosts": ["shop.example.com"],
+        "state": {"script_id": "__NEXT_DATA__"},
+        "fields": {"name": "props.product.title", "price": "props.product.price",
+                   "images": "props.product.gallery[*].url"},
+        "image_url": "https://cdn.example.com/{}",
+    }])
+    extractor = registry.for_url("https://m.shop.example.com/p/1")
+    print(extractor.extract(html, "https://m.shop.example.com/p/1"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增量同步工具
+
+沿用批次處理的三個階段，但每筆商品提取後先與上次同步的記錄比對：
+- 商品指紋相同（且上傳模式下已上傳最新版本）：直接沿用記錄，不下載、不生成、不上傳
+- 圖片清單沒變且本機檔案都還在：沿用上次下載的圖片
+- 上架資料有變更：上傳模式下只更新變更的欄位，新商品才完整上架
+結果檔中每筆商品附上與上次相比的欄位差異。
+
+商品依 BatchItem.key（網址或 SKU）比對記錄；沒有網址也沒有編號欄位的商品無法確認是哪一筆記錄，
+直接列為失敗，避免把 A 商品的資料更新到 B 商品上架的蝦皮商品，或每次都重新上架。
+"""
+
+import time
+from pathlib import Path
+from typing import Dict, Iterable, TextIO
+
+from .batch_runner import BatchItem, BatchRunner
+from .product_store import ProductStore, diff_fields, fingerprint
+
+
+STATUS_NEW = "new"
+STATUS_CHANGED = "changed"
+STATUS_UNCHANGED = "unchanged"
+
+
+class SyncRunner(BatchRunner):
+    def __init__(self, app, store: ProductStore, auto_upload: bool = False, **kwargs):
+        super().__init__(app, auto_upload=auto_upload, **kwargs)
+        self.store = store
+        self._started = None
+
+    def run(self, records: Iterable[Dict], output: TextIO) -> Dict:
+        """同步所有商品，摘要另外列出這次沒出現的商品與提取失敗的商品"""
+        self._started = time.time()
+        summary = super().run(records, output)
+        summary["missing"] = self.store.missing(self._started)
+        summary["errored"] = self.store.errored(self._started)
+        return summary
+
+    def _extract(self, item: BatchItem):
+        if not item.key:
+            raise ValueError("沒有網址或 SKU 等編號欄位，無法比對上次同步的記錄")
+        try:
+            super()._extract(item)
+        except Exception as e:
+            # 暫時性的提取失敗不代表商品已從目錄移除，記錄為有出現但失敗，避免被列入 missing
+            self.store.touch(item.key, self._started, str(e))
+            raise
+        self.store.touch(item.key, self._started)
+        record = item.previous = self.store.get(item.key)
+        if record is None or record["listing"] is None:
+            return
+
+        unchanged = record["product_fp"] == fingerprint(item.product)
+        if unchanged and self.auto_upload:
+            unchanged = record["uploaded_fp"] == record["listing_fp"]
+        if unchanged:
+            item.status = STATUS_UNCHANGED
+            item.listing = record["listing"]
+            item.images = record["listing"].get("local_images", [])
+
+    def _download(self, item: BatchItem):
+        if item.status == STATUS_UNCHANGED:
+            return
+        self._prefetch_copy(item)
+        record = item.previous
+        if record and record["product"] and record["listing"]:
+            previous_images = record["listing"].get("local_images") or []
+            if (record["product"].get("images") == item.product.get("images")
+                    and all(Path(path).exists() for path in previous_images)):
+                item.images = previous_images
+                return
+        super()._download(item)
+
+    def _generate(self, item: BatchItem):
+        if item.status == STATUS_UNCHANGED:
+            return
+        record = item.previous
+        listing = self._generate_listing(item)
+        listing["local_images"] = item.images
+        item.listing = listing
+
+        if record is None or record["listing"] is None:
+            item.status = STATUS_NEW
+        elif record["listing_fp"] == fingerprint(listing):
+            # 商品資料有變，但不影響上架內容
+            item.status = STATUS_UNCHANGED
+        else:
+            item.status = STATUS_CHANGED
+            item.changes = diff_fields(record["listing"], listing)
+        self.store.save_listing(item.key, item.product, listing)
+
+        if self.auto_upload:
+            self._upload(item, record)
+
+    def _upload(self, item: BatchItem, record: Dict):
+        """新商品完整上架；已上架的商品只更新和蝦皮上版本不同的欄位"""
+        listing = item.listing
+        if record and record["item_id"] and record["uploaded"]:
+            fields = diff_fields(record["uploaded"], listing)
+            if not fields:
+                self.store.mark_uploaded(item.key, listing, None)
+                return
+            item.upload = self.app.update_on_shopee(record["item_id"], listing, list(fields))
+            item_id = None
+        else:
+            item.upload = self.app.upload_to_shopee(listing)
+            item_id = item.upload.get("item_id")
+
+        if not item.upload.get("success"):
+            raise RuntimeError(item.upload.get("error") or "上傳失敗")
+        self.store.mark_uploaded(item.key, listing, item_id)
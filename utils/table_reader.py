@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+表格商品資料讀取工具
+
+逐列讀取供應商提供的 CSV、TSV 與 XLSX，每列為一個商品，不會一次載入整個檔案：
+- CSV / TSV：以 csv 模組逐列解析，自動判斷 UTF-8 或 Big5（cp950）編碼與分隔符號
+- XLSX：以 openpyxl 的唯讀模式逐列讀取（需要 pip install openpyxl）
+
+標題列的欄位名稱依 FIELD_MAPPING 對應到商品欄位（不分大小寫、全半形與空白），
+「圖片1」「image_2」等編號欄位都視為圖片；其他欄位放進 metadata。
+"""
+
+import codecs
+import csv
+import datetime
+import itertools
+import re
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# 常見的欄位名稱對應；ProductExtractor._normalize_product_info 也使用這份對應
+FIELD_MAPPING = {
+    "name": ["name", "title", "product_name", "商品名稱", "名稱"],
+    "description": ["description", "desc", "product_description", "商品描述", "描述", "介紹"],
+    "price": ["price", "價格", "售價"],
+    "category": ["category", "分類", "類別"],
+    "images": ["images", "image", "圖片", "imgs"]
+}
+
+TABLE_SUFFIXES = (".csv", ".tsv", ".xlsx")
+
+# 一個儲存格中的多個圖片網址：以換行、|、; 分隔，或以空白、逗號分隔的完整網址
+IMAGE_SEPARATOR = re.compile(r"\s*[|;\n]\s*|[\s,]+(?=https?://|//)")
+
+_SNIFF_BYTES = 64 * 1024
+
+
+def _header_key(header: str) -> str:
+    """標題比對用：全形轉半形、小寫，去掉空白、底線與連字號"""
+    return re.sub(r"[\s_\-]+", "", unicodedata.normalize("NFKC", header).lower())
+
+
+_ALIASES = {_header_key(alias): field for field, aliases in FIELD_MAPPING.items() for alias in aliases}
+
+
+@lru_cache(maxsize=1024)
+def header_field(header: str) -> Optional[str]:
+    """標題對應的商品欄位，沒有對應時返回 None；圖片欄位可帶編號（圖片1、image_2）"""
+    key = _header_key(header)
+    field = _ALIASES.get(key)
+    if field is None:
+        field = _ALIASES.get(key.rstrip("0123456789"))
+        if field != "images":
+            return None
+    return field
+
+
+def split_images(value: str) -> List[str]:
+    """拆開一個儲存格中的多個圖片網址"""
+    return [url for url in IMAGE_SEPARATOR.split(value.strip()) if url]
+
+
+def to_product(row: Dict[str, str]) -> Dict:
+    """將一列資料轉為商品欄位；同一欄位有多個欄位名稱時取第一個有值的，圖片合併"""
+    product = {"images": [], "metadata": {}}
+    for header, value in row.items():
+        if not value:
+            continue
+        field = header_field(header)
+        if field == "images":
+            product["images"].extend(split_images(value))
+        elif field is None:
+            product["metadata"][header] = value
+        elif field not in product:
+            product[field] = value
+    return product
+
+
+def iter_rows(file_path, sheet: Optional[str] = None) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """依副檔名逐列讀取，產生 (列號, {標題: 值})；跳過空白列，列號與試算表中看到的相同"""
+    file_path = Path(file_path)
+    suffix = file_path.suffix.lower()
+    if suffix == ".xlsx":
+        rows = _iter_xlsx(file_path, sheet)
+    elif suffix in (".csv", ".tsv"):
+        rows = _iter_delimited(file_path, "\t" if suffix == ".tsv" else None)
+    else:
+        raise ValueError(f"不支援的表格格式：{file_path.suffix}")
+
+    headers = None
+    for row_no, values in rows:
+        if headers is None:
+            headers = [str(h).strip() if h is not None else "" for h in values]
+            continue
+        row = {}
+        for header, value in zip(headers, values):
+            if header:
+                row[header] = _cell_text(value)
+        if any(row.values()):
+            yield row_no, row
+
+
+def iter_products(file_path, sheet: Optional[str] = None) -> Iterator[Dict]:
+    """逐列產生商品欄位"""
+    for _, row in iter_rows(file_path, sheet):
+        yield to_product(row)
+
+
+def iter_chunks(items: Iterable, size: int) -> Iterator[List]:
+    """每 size 筆一組，取用下一組時才讀取"""
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _iter_delimited(file_path: Path, delimiter: Optional[str]) -> Iterator[Tuple[int, List[str]]]:
+    with open(file_path, "rb") as f:
+        head = f.read(_SNIFF_BYTES)
+    encoding = _detect_encoding(head)
+    with open(file_path, "r", encoding=encoding, newline="") as f:
+        if delimiter is None:
+            delimiter = _detect_delimiter(head.decode(encoding, errors="ignore"))
+        # 以列計數而非行號：儲存格內有換行時一列會跨多行
+        yield from enumerate(csv.reader(f, delimiter=delimiter), 1)
+
+
+def _detect_encoding(head: bytes) -> str:
+    """檔案開頭能以 UTF-8 解碼就是 UTF-8，否則視為 Excel 在繁體中文 Windows 上另存的 Big5"""
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        return "cp950"
+
+
+def _detect_delimiter(head: str) -> str:
+    """依標題列判斷分隔符號，判斷不出來時用逗號"""
+    try:
+        return csv.Sniffer().sniff(head.split("\n", 1)[0], delimiters=",;\t").delimiter
+    except csv.Error:
+        return ","
+
+
+def _iter_xlsx(file_path: Path, sheet: Optional[str]) -> Iterator[Tuple[int, tuple]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportError("讀取 XLSX 需要安裝 openpyxl: pip install openpyxl")
+
+    # 唯讀模式逐列解析工作表 XML，不會把整個活頁簿載入記憶體
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.worksheets[0]
+        for row_no, values in enumerate(worksheet.iter_rows(values_only=True), 1):
+            yield row_no, values
+    finally:
+        workbook.close()
+
+
+def _cell_text(value) -> str:
+    """儲存格內容轉為字串；Excel 的整數以浮點數儲存，199.0 轉為「199」"""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value).strip()
+
+
+def main():
+    """測試用"""
+    import sys
+    import tempfile
+
+    if len(sys.argv) > 1:
+        file_path = sys.argv[1]
+    else:
+        file_path = Path(tempfile.mkdtemp()) / "products.csv"
+        file_path.write_text(
+            "商品名稱,售價,Category,圖片 1,圖片 2,SKU\n"
+            "純棉T恤,299,上衣,https://example.com/a.jpg,https://example.com/b.jpg,TS-01\n"
+            "保溫瓶,\"1,280\",居家生活,https://example.com/c.jpg|https://example.com/d.jpg,,BT-02\n",
+            encoding="utf-8"
+        )
+
+    for chunk in iter_chunks(iter_products(file_path), 100):
+        for product in chunk:
+            print(product)
+
+
+if __name__ == "__main__":
+    main()